@@ -0,0 +1,123 @@
+from mentorhub_utils import MentorHub_Config
+
+import logging
+logger = logging.getLogger(__name__)
+
+class CurriculumConfig:
+    """Configuration values used only by this API, that are not part of the shared MentorHub_Config"""
+    _instance = None  # Singleton instance
+
+    def __init__(self):
+        if CurriculumConfig._instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            CurriculumConfig._instance = self
+
+            # Declare instance variables to support IDE code assist
+            self.NEXT_STORAGE_MODE = ''
+            self.MENTOR_CACHE_WATCH = ''
+            self.CATALOG_CACHE_WATCH = ''
+            self.WEB_WORKER_CLASS = ''
+            self.WEB_PRELOAD = ''
+            self.JSON_PROVIDER = ''
+            self.COMPRESSION_ENCODINGS = ''
+            self.PROFILE_REQUESTS = ''
+            self.PROFILE_FOLDER = ''
+            self.LOG_FORMAT = ''
+            self.ADMISSION_CONTROL = ''
+            self.CATALOG_READ_PREFERENCE = ''
+            self.PATH_CACHE_TTL_SECONDS = 0
+            self.MENTOR_CACHE_TTL_SECONDS = 0
+            self.MENTOR_CACHE_MAX_SIZE = 0
+            self.CATALOG_CACHE_TTL_SECONDS = 0
+            self.CATALOG_CACHE_MAX_SIZE = 0
+            self.CATALOG_SEARCH_LIMIT = 0
+            self.WEB_WORKERS = 0
+            self.WEB_WORKER_CONNECTIONS = 0
+            self.WEB_KEEPALIVE_SECONDS = 0
+            self.WEB_TIMEOUT_SECONDS = 0
+            self.MONGO_MAX_POOL_SIZE = 0
+            self.MONGO_SIZE_SAMPLE_EVERY = 0
+            self.COMPRESSION_MIN_SIZE = 0
+            self.PROFILE_INTERVAL_SECONDS = 0
+            self.SLOW_REQUEST_MS = 0
+            self.LOG_QUEUE_SIZE = 0
+            self.CATALOG_MAX_CONCURRENCY = 0
+            self.CATALOG_QUEUE_SIZE = 0
+            self.CATALOG_MONGO_TIMEOUT_MS = 0
+            self.CURRICULUM_MAX_CONCURRENCY = 0
+            self.CURRICULUM_QUEUE_SIZE = 0
+            self.CURRICULUM_MONGO_TIMEOUT_MS = 0
+            self.ADMISSION_QUEUE_TIMEOUT_MS = 0
+            self.CIRCUIT_BREAKER_FAILURES = 0
+            self.CIRCUIT_BREAKER_RESET_SECONDS = 0
+            self.CATALOG_MAX_STALENESS_SECONDS = 0
+
+            # Default Values grouped by value type
+            self.config_strings = {
+                "NEXT_STORAGE_MODE": "embedded",
+                "MENTOR_CACHE_WATCH": "false",
+                "CATALOG_CACHE_WATCH": "false",
+                "WEB_WORKER_CLASS": "gevent",
+                "WEB_PRELOAD": "true",
+                "JSON_PROVIDER": "default",
+                "COMPRESSION_ENCODINGS": "zstd,br,gzip",
+                "PROFILE_REQUESTS": "false",
+                "PROFILE_FOLDER": "/tmp/profiles",
+                "LOG_FORMAT": "json",
+                "ADMISSION_CONTROL": "true",
+                "CATALOG_READ_PREFERENCE": "secondaryPreferred"
+            }
+            self.config_ints = {
+                "PATH_CACHE_TTL_SECONDS": "300",
+                "MENTOR_CACHE_TTL_SECONDS": "30",
+                "MENTOR_CACHE_MAX_SIZE": "10000",
+                "CATALOG_CACHE_TTL_SECONDS": "300",
+                "CATALOG_CACHE_MAX_SIZE": "1000",
+                "CATALOG_SEARCH_LIMIT": "1000",
+                "WEB_WORKERS": "0",
+                "WEB_WORKER_CONNECTIONS": "100",
+                "WEB_KEEPALIVE_SECONDS": "5",
+                "WEB_TIMEOUT_SECONDS": "30",
+                "MONGO_MAX_POOL_SIZE": "100",
+                "MONGO_SIZE_SAMPLE_EVERY": "10",
+                "COMPRESSION_MIN_SIZE": "1024",
+                "PROFILE_INTERVAL_SECONDS": "60",
+                "SLOW_REQUEST_MS": "1000",
+                "LOG_QUEUE_SIZE": "10000",
+                "CATALOG_MAX_CONCURRENCY": "50",
+                "CATALOG_QUEUE_SIZE": "50",
+                "CATALOG_MONGO_TIMEOUT_MS": "2000",
+                "CURRICULUM_MAX_CONCURRENCY": "25",
+                "CURRICULUM_QUEUE_SIZE": "25",
+                "CURRICULUM_MONGO_TIMEOUT_MS": "5000",
+                "ADMISSION_QUEUE_TIMEOUT_MS": "500",
+                "CIRCUIT_BREAKER_FAILURES": "5",
+                "CIRCUIT_BREAKER_RESET_SECONDS": "10",
+                "CATALOG_MAX_STALENESS_SECONDS": "90"
+            }
+
+            # Initialize configuration
+            self.initialize()
+
+    def initialize(self):
+        """Initialize configuration values, using the shared config so they are reported by the config endpoint"""
+        config = MentorHub_Config.get_instance()
+
+        # Initialize Config Strings
+        for key, default in self.config_strings.items():
+            value = config._get_config_value(key, default, False)
+            setattr(self, key, value)
+
+        # Initialize Config Integers
+        for key, default in self.config_ints.items():
+            value = int(config._get_config_value(key, default, False))
+            setattr(self, key, value)
+
+    # Singleton Getter
+    @staticmethod
+    def get_instance():
+        """Get the singleton instance of the CurriculumConfig class."""
+        if CurriculumConfig._instance is None:
+            CurriculumConfig()
+        return CurriculumConfig._instance
@@ -0,0 +1,71 @@
+"""
+Gunicorn runtime configuration, used with
+    gunicorn --config python:src.config.gunicorn_config src.server:app
+
+Settings come from CurriculumConfig, so they can be set like any other config value
+and are reported by the config endpoint. Each worker has its own MongoDB connection 
+pool, so the API can open up to WEB_WORKERS * MONGO_MAX_POOL_SIZE connections.
+"""
+import math
+import os
+
+# Gevent must patch the standard library before pymongo (or anything that uses sockets) is imported,
+# which is before config can be loaded, so the worker class is read from the environment here
+if os.environ.get("WEB_WORKER_CLASS", "gevent") == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from src.config.curriculum_config import CurriculumConfig
+from mentorhub_utils import MentorHub_Config
+
+_config = CurriculumConfig.get_instance()
+
+def available_cpus(cpu_max="/sys/fs/cgroup/cpu.max"):
+    """
+    The CPUs this process may use - those it is pinned to, or fewer when a container CPU limit
+    (a cgroup v2 quota) is set. multiprocessing.cpu_count() counts every CPU of the host.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open(cpu_max) as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def default_workers(worker_class, cpus):
+    """A gevent worker serves many requests at once, so one per CPU keeps every CPU busy, sync workers need 2 per CPU plus 1"""
+    return cpus if worker_class == "gevent" else cpus * 2 + 1
+
+bind = f"0.0.0.0:{MentorHub_Config.get_instance().CURRICULUM_API_PORT}"
+worker_class = _config.WEB_WORKER_CLASS
+workers = _config.WEB_WORKERS or default_workers(_config.WEB_WORKER_CLASS, available_cpus())
+worker_connections = _config.WEB_WORKER_CONNECTIONS
+keepalive = _config.WEB_KEEPALIVE_SECONDS
+timeout = _config.WEB_TIMEOUT_SECONDS
+preload_app = _config.WEB_PRELOAD == "true"
+
+def post_fork(server, worker):
+    """A preloaded app connected to MongoDB and started the log writer before the fork, so start a client and writer owned by this worker"""
+    from mentorhub_utils import MentorHubMongoIO
+    from src.utils.mongo_io import MongoIO
+    from src.utils.log_queue import LogQueue
+    LogQueue.restart()
+    if MentorHubMongoIO.get_instance().connected:
+        MongoIO.reconnect()
+        worker.log.info("Worker %s reconnected to MongoDB", worker.pid)
+
+def post_worker_init(worker):
+    """Size the connection pool of a worker that loaded the app itself, closing the client it connected with, and start the change stream watchers"""
+    from src.utils.mongo_io import MongoIO
+    from src.server import start_watchers
+    if not preload_app:
+        MongoIO.reconnect(close=True)
+    start_watchers()
+
+def worker_exit(server, worker):
+    """Write the log records still queued before the worker exits - gunicorn replaces the SIGTERM handler of server.py, and the writer is a daemon thread"""
+    from src.utils.log_queue import LogQueue
+    LogQueue.stop()
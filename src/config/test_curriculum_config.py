@@ -0,0 +1,37 @@
+import os
+import unittest
+from unittest.mock import patch
+from mentorhub_utils import MentorHub_Config
+from src.config.curriculum_config import CurriculumConfig
+
+class TestCurriculumConfig(unittest.TestCase):
+
+    def setUp(self):
+        CurriculumConfig._instance = None
+
+    def tearDown(self):
+        CurriculumConfig._instance = None
+
+    def test_defaults(self):
+        config = CurriculumConfig.get_instance()
+        self.assertEqual(config.NEXT_STORAGE_MODE, "embedded")
+        self.assertEqual(config.PATH_CACHE_TTL_SECONDS, 300)
+
+    @patch.dict(os.environ, {"NEXT_STORAGE_MODE": "reference", "PATH_CACHE_TTL_SECONDS": "60"})
+    def test_environment(self):
+        config = CurriculumConfig.get_instance()
+        self.assertEqual(config.NEXT_STORAGE_MODE, "reference")
+        self.assertEqual(config.PATH_CACHE_TTL_SECONDS, 60)
+
+    def test_reported_in_config_items(self):
+        CurriculumConfig.get_instance()
+        items = MentorHub_Config.get_instance().config_items
+        self.assertIn({"name": "NEXT_STORAGE_MODE", "value": "embedded", "from": "default"}, items)
+
+    def test_singleton(self):
+        self.assertIs(CurriculumConfig.get_instance(), CurriculumConfig.get_instance())
+        with self.assertRaises(Exception):
+            CurriculumConfig()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.config.curriculum_config import CurriculumConfig
+
+class TestGunicornConfig(unittest.TestCase):
+
+    def setUp(self):
+        CurriculumConfig._instance = None
+
+    def tearDown(self):
+        CurriculumConfig._instance = None
+
+    def _load(self):
+        import src.config.gunicorn_config as gunicorn_config
+        return importlib.reload(gunicorn_config)
+
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync", "WEB_WORKERS": "3", "WEB_PRELOAD": "false"})
+    def test_settings(self):
+        gunicorn_config = self._load()
+        self.assertEqual(gunicorn_config.worker_class, "sync")
+        self.assertEqual(gunicorn_config.workers, 3)
+        self.assertEqual(gunicorn_config.worker_connections, 100)
+        self.assertEqual(gunicorn_config.keepalive, 5)
+        self.assertEqual(gunicorn_config.timeout, 30)
+        self.assertFalse(gunicorn_config.preload_app)
+        self.assertEqual(gunicorn_config.bind, "0.0.0.0:8088")
+
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync"})
+    def test_workers_from_cpu_count(self):
+        gunicorn_config = self._load()
+        self.assertEqual(gunicorn_config.workers, gunicorn_config.available_cpus() * 2 + 1)
+        self.assertTrue(gunicorn_config.preload_app)
+
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync"})
+    def test_default_workers(self):
+        gunicorn_config = self._load()
+        self.assertEqual(gunicorn_config.default_workers("gevent", 4), 4)
+        self.assertEqual(gunicorn_config.default_workers("sync", 4), 9)
+
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync"})
+    def test_available_cpus(self):
+        gunicorn_config = self._load()
+        pinned = len(os.sched_getaffinity(0))
+        with tempfile.TemporaryDirectory() as folder:
+            cpu_max = os.path.join(folder, "cpu.max")
+
+            # A container CPU limit of 1.5 CPUs allows 2 workers to run at once
+            with open(cpu_max, "w") as file:
+                file.write("150000 100000\n")
+            self.assertEqual(gunicorn_config.available_cpus(cpu_max), min(pinned, 2))
+
+            with open(cpu_max, "w") as file:
+                file.write("max 100000\n")
+            self.assertEqual(gunicorn_config.available_cpus(cpu_max), pinned)
+            self.assertEqual(gunicorn_config.available_cpus(os.path.join(folder, "missing")), pinned)
+
+    @patch('src.utils.mongo_io.MongoIO.reconnect')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync"})
+    def test_post_fork(self, mock_get_instance, mock_reconnect):
+        gunicorn_config = self._load()
+
+        # Only a client inherited from a preloaded app is replaced
+        mock_get_instance.return_value = MagicMock(connected=False)
+        gunicorn_config.post_fork(MagicMock(), MagicMock())
+        mock_reconnect.assert_not_called()
+
+        mock_get_instance.return_value = MagicMock(connected=True)
+        gunicorn_config.post_fork(MagicMock(), MagicMock())
+        mock_reconnect.assert_called_once_with()
+
+    @patch('src.utils.mongo_io.MongoIO.reconnect')
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync", "WEB_PRELOAD": "false"})
+    def test_post_worker_init(self, mock_reconnect):
+        gunicorn_config = self._load()
+        server = MagicMock()
+
+        # A worker that loaded the app itself replaces, and closes, the client it connected with
+        with patch.dict(sys.modules, {"src.server": server}):
+            gunicorn_config.post_worker_init(MagicMock())
+        mock_reconnect.assert_called_once_with(close=True)
+        server.start_watchers.assert_called_once()
+
+    @patch('src.utils.log_queue.LogQueue.stop')
+    @patch.dict(os.environ, {"WEB_WORKER_CLASS": "sync"})
+    def test_worker_exit(self, mock_stop):
+        gunicorn_config = self._load()
+
+        # The records still queued are written before the worker exits
+        gunicorn_config.worker_exit(MagicMock(), MagicMock())
+        mock_stop.assert_called_once_with()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,29 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from mentorhub_utils import create_breadcrumb, create_token
-from src.services.curriculum_services import CurriculumService
+from src.services.curriculum_services import CurriculumService, PreconditionFailed, UpdateConflict
+from src.utils.admission import processing_error
 
 import logging
 logger = logging.getLogger(__name__)
 
+def _curriculum_response(curriculum):
+    """A curriculum response, tagged with the curriculum etag"""
+    response = jsonify(curriculum)
+    if curriculum and "lastSaved" in curriculum:
+        response.set_etag(CurriculumService.etag(curriculum))
+    return response, 200
+
+def _if_match():
+    """The etags from an If-Match header, or None when the write is unconditional"""
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    # Compressed responses have weak etags, for the same version of the curriculum
+    return request.if_match.as_set(include_weak=True)
+
+def _delta():
+    """True when the client asked for only the changed sections of the curriculum"""
+    return request.args.get("delta", "false").lower() == "true"
+
 def create_curriculum_routes():
     curriculum_routes = Blueprint('curriculum_routes', __name__)
 
@@ -14,12 +33,29 @@ def create_curriculum_routes():
         try:
             token = create_token()
             breadcrumb = create_breadcrumb(token)
-            curriculum = CurriculumService.get_or_create_curriculum(id, token, breadcrumb)
-            logger.info(f"Get Curriculum Successful {breadcrumb}")
-            return jsonify(curriculum), 200
+
+            # Optionally only some fields, and a page of completed
+            fields = [field.strip() for field in request.args.get("fields", "").split(",") if field.strip()]
+            completed_limit = request.args.get("completed_limit", type=int)
+            completed_offset = request.args.get("completed_offset", 0, type=int)
+            if completed_limit != None and completed_limit < 1:
+                return jsonify({"error": "completed_limit must be a positive integer"}), 400
+
+            # The client already has the current version
+            if request.if_none_match:
+                etag = CurriculumService.get_etag(id, token)
+                if etag and request.if_none_match.contains_weak(etag):
+                    response = make_response("", 304)
+                    response.set_etag(etag)
+                    logger.info("Get Curriculum Not Modified", extra={"breadcrumb": breadcrumb})
+                    return response
+
+            curriculum = CurriculumService.get_or_create_curriculum(id, token, breadcrumb, fields or None, completed_limit, completed_offset)
+            logger.info("Get Curriculum Successful", extra={"breadcrumb": breadcrumb})
+            return _curriculum_response(curriculum)
         except Exception as e:
-            logger.warning(f"A processing error occurred {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("A processing error occurred %s", e)
+            return processing_error(e)
 
     # PATCH /api/curriculum/{id} - Update a curriculum
     @curriculum_routes.route('/<string:id>', methods=['PATCH'])
@@ -28,12 +64,15 @@ def create_curriculum_routes():
             token = create_token()
             breadcrumb = create_breadcrumb(token)
             patch_data = request.get_json()
-            curriculum = CurriculumService.update_curriculum(id, patch_data, token, breadcrumb)
-            logger.info(f"Update Curriculum Successful {breadcrumb}")
-            return jsonify(curriculum), 200
+            curriculum = CurriculumService.update_curriculum(id, patch_data, token, breadcrumb, _if_match(), _delta())
+            logger.info("Update Curriculum Successful", extra={"breadcrumb": breadcrumb})
+            return _curriculum_response(curriculum)
+        except PreconditionFailed as e:
+            logger.info("Update Curriculum Precondition Failed %s", e)
+            return jsonify({"error": "The curriculum has been changed"}), 412
         except Exception as e:
-            logger.warning(f"A processing error occurred {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("A processing error occurred %s", e)
+            return processing_error(e)
         
     # DELETE /api/curriculum/{id} - Delete a curriculum
     @curriculum_routes.route('/<string:id>', methods=['DELETE'])
@@ -42,11 +81,11 @@ def create_curriculum_routes():
             token = create_token()
             breadcrumb = create_breadcrumb(token)
             CurriculumService.delete_curriculum(id, token)
-            logger.info(f"Delete Curriculum Successful {breadcrumb}")
+            logger.info("Delete Curriculum Successful", extra={"breadcrumb": breadcrumb})
             return jsonify({"result": "Success"}), 200
         except Exception as e:
-            logger.warning(f"Error during Delete {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("Error during Delete %s", e)
+            return processing_error(e)
         
     # PATCH /api/curriculum/{id}/assign/{link} - Move a resource from Next to Now
     @curriculum_routes.route('/<string:id>/assign/<string:link>', methods=['PATCH'])
@@ -54,12 +93,15 @@ def create_curriculum_routes():
         try:
             token = create_token()
             breadcrumb = create_breadcrumb(token)
-            curriculum = CurriculumService.assign_resource(id, link, token, breadcrumb)
-            logger.info(f"Assign Resource Successful {breadcrumb}")
-            return jsonify(curriculum), 200
+            curriculum = CurriculumService.assign_resource(id, link, token, breadcrumb, _if_match(), _delta())
+            logger.info("Assign Resource Successful", extra={"breadcrumb": breadcrumb})
+            return _curriculum_response(curriculum)
+        except PreconditionFailed as e:
+            logger.info("Assign Resource Precondition Failed %s", e)
+            return jsonify({"error": "The curriculum has been changed"}), 412
         except Exception as e:
-            logger.warning(f"A processing error occurred {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("A processing error occurred %s", e)
+            return processing_error(e)
         
     # PATCH /api/curriculum/{id}/complete/{link} - Move a resource from Now to Complete
     @curriculum_routes.route('/<string:id>/complete/<string:link>', methods=['PATCH'])
@@ -68,12 +110,34 @@ def create_curriculum_routes():
             token = create_token()
             breadcrumb = create_breadcrumb(token)
             review = request.get_json(silent=True) or {}
-            curriculum = CurriculumService.complete_resource(id, link, review, token, breadcrumb)
-            logger.info(f"Complete Resource Successful {breadcrumb}")
-            return jsonify(curriculum), 200
+            curriculum = CurriculumService.complete_resource(id, link, review, token, breadcrumb, _if_match(), _delta())
+            logger.info("Complete Resource Successful", extra={"breadcrumb": breadcrumb})
+            return _curriculum_response(curriculum)
+        except PreconditionFailed as e:
+            logger.info("Complete Resource Precondition Failed %s", e)
+            return jsonify({"error": "The curriculum has been changed"}), 412
+        except Exception as e:
+            logger.warning("A processing error occurred %s", e)
+            return processing_error(e)
+        
+    # PATCH /api/curriculum/{id}/batch - Assign and Complete a list of resources
+    @curriculum_routes.route('/<string:id>/batch', methods=['PATCH'])
+    def batch_update(id):
+        try:
+            token = create_token()
+            breadcrumb = create_breadcrumb(token)
+            operations = request.get_json()
+            if not isinstance(operations, list):
+                return jsonify({"error": "A list of operations is required"}), 400
+            result = CurriculumService.batch_update(id, operations, token, breadcrumb)
+            logger.info("Batch Update Successful", extra={"breadcrumb": breadcrumb})
+            return jsonify(result), 200
+        except UpdateConflict as e:
+            logger.info("Batch Update Conflict %s", e)
+            return jsonify({"error": "The curriculum is being changed by other updates, try again"}), 409
         except Exception as e:
-            logger.warning(f"A processing error occurred {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("A processing error occurred %s", e)
+            return processing_error(e)
         
     # POST /api/curriculum/{curriculum_id}/path/{path_id} - Add a path to Next
     @curriculum_routes.route('/<string:curriculum_id>/path/<string:path_id>', methods=['POST'])
@@ -81,12 +145,12 @@ def create_curriculum_routes():
         try:
             token = create_token()
             breadcrumb = create_breadcrumb(token)
-            curriculum = CurriculumService.add_path(curriculum_id, path_id, token, breadcrumb)
-            logger.info(f"Add Path Successful {breadcrumb}")
-            return jsonify(curriculum), 200
+            curriculum = CurriculumService.add_path(curriculum_id, path_id, token, breadcrumb, _delta())
+            logger.info("Add Path Successful", extra={"breadcrumb": breadcrumb})
+            return _curriculum_response(curriculum)
         except Exception as e:
-            logger.warning(f"A processing error occurred {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("A processing error occurred %s", e)
+            return processing_error(e)
         
     # Ensure the Blueprint is returned correctly
     return curriculum_routes
\ No newline at end of file
@@ -1,5 +1,7 @@
 from mentorhub_utils import create_breadcrumb, create_token
 from src.services.paths_services import PathsService
+from src.utils.name_index import NameIndex
+from src.utils.admission import processing_error
 
 import logging
 logger = logging.getLogger(__name__)
@@ -17,13 +19,35 @@ def create_path_routes():
             # Get the paths
             token = create_token()
             breadcrumb = create_breadcrumb(token)
+
+            # Specific paths, by a comma separated list of ids
+            ids = [id.strip() for id in request.args.get('ids', "").split(",") if id.strip()]
+            if ids:
+                if len(ids) > PathsService.page_size():
+                    return jsonify({"error": "Too many ids"}), 400
+                result = PathsService.get_paths_by_id(ids, token)
+                logger.info("Get Path By Id Success", extra={"breadcrumb": breadcrumb})
+                return jsonify(result), 200
+
             query = request.args.get('query') or ""
-            paths = PathsService.get_paths(query, token)
-            logger.info(f"Get Path Success {breadcrumb}")
-            return jsonify(paths), 200
+            limit = request.args.get('limit', type=int)
+            if limit != None and limit < 1:
+                return jsonify({"error": "limit must be a positive integer"}), 400
+            try:
+                after = NameIndex.decode_cursor(request.args['after']) if request.args.get('after') else None
+            except ValueError:
+                return jsonify({"error": "after is not a valid cursor"}), 400
+            paths = PathsService.get_paths(query, token, limit, after)
+            logger.info("Get Path Success", extra={"breadcrumb": breadcrumb})
+
+            # A full page may be followed by another, fetched with the cursor of its last entry
+            response = jsonify(paths)
+            if paths and len(paths) == PathsService.page_size(limit):
+                response.headers['X-Next-Cursor'] = NameIndex.cursor(paths[-1])
+            return response, 200
         except Exception as e:
-            logger.warn(f"Get Path Error has occurred: {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("Get Path Error has occurred: %s", e)
+            return processing_error(e)
         
     # GET /api/path/id - Return a specific path
     @path_routes.route('/<string:id>', methods=['GET'])
@@ -33,11 +57,11 @@ def create_path_routes():
             token = create_token()
             breadcrumb = create_breadcrumb(token)
             path = PathsService.get_path(id, token)
-            logger.info(f"Get Path Success {breadcrumb}")
+            logger.info("Get Path Success", extra={"breadcrumb": breadcrumb})
             return jsonify(path), 200
         except Exception as e:
-            logger.warn(f"Get Path Error has occurred: {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("Get Path Error has occurred: %s", e)
+            return processing_error(e)
 
     # Ensure the Blueprint is returned correctly
     return path_routes
\ No newline at end of file
@@ -0,0 +1,35 @@
+from mentorhub_utils import create_breadcrumb, create_token
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.profiler import RequestProfiler
+
+import logging
+logger = logging.getLogger(__name__)
+
+from flask import Blueprint, jsonify, send_file
+
+# Define the Blueprint for profile routes
+def create_profile_routes():
+    profile_routes = Blueprint('profile_routes', __name__)
+
+    # GET /api/profile/name - Download a saved request profile
+    @profile_routes.route('/<string:name>', methods=['GET'])
+    def get_profile(name):
+        try:
+            token = create_token()
+            breadcrumb = create_breadcrumb(token)
+            if "Staff" not in token.get("roles", []):
+                return jsonify({"error": "Profiles are only available to Staff"}), 403
+
+            path = RequestProfiler.profile_path(CurriculumConfig.get_instance().PROFILE_FOLDER, name)
+            if path == None:
+                return jsonify({"error": "Profile not found"}), 404
+            logger.info("Get Profile %s", name, extra={"breadcrumb": breadcrumb})
+            return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=name)
+        except FileNotFoundError:
+            return jsonify({"error": "Profile not found"}), 404
+        except Exception as e:
+            logger.warning("Get Profile Error has occurred: %s", e)
+            return jsonify({"error": "A processing error occurred"}), 500
+
+    # Ensure the Blueprint is returned correctly
+    return profile_routes
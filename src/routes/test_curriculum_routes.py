@@ -4,6 +4,7 @@ from unittest.mock import patch, MagicMock
 from bson import ObjectId
 from flask import Flask
 from src.routes.curriculum_routes import create_curriculum_routes
+from src.services.curriculum_services import CurriculumService, PreconditionFailed, UpdateConflict
 from mentorhub_utils import MongoJSONEncoder
 
 class TestCurriculumRoutes(unittest.TestCase):
@@ -91,5 +92,115 @@ class TestCurriculumRoutes(unittest.TestCase):
         data = response.get_json()
         self.assertEqual(data, self.sample_curriculum_decoded)
 
+    @patch('src.routes.curriculum_routes.CurriculumService.batch_update')
+    def test_batch_update_success(self, mock_batch):
+        # Mock the CurriculumService's batch_update method
+        mock_batch.return_value = {"curriculum": self.sample_curriculum_encoded, "results": [{"action": "assign", "link": "link", "result": "Success"}]}
+
+        operations = [{"action": "assign", "link": "link"}]
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001/batch', json=operations)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_json)
+
+        data = response.get_json()
+        self.assertEqual(data, {"curriculum": self.sample_curriculum_decoded, "results": [{"action": "assign", "link": "link", "result": "Success"}]})
+        self.assertEqual(mock_batch.call_args[0][1], operations)
+
+    @patch('src.routes.curriculum_routes.CurriculumService.batch_update')
+    def test_batch_update_conflict(self, mock_batch):
+        mock_batch.side_effect = UpdateConflict("conflict")
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001/batch', json=[{"action": "assign", "link": "link"}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json(), {"error": "The curriculum is being changed by other updates, try again"})
+
+    @patch('src.routes.curriculum_routes.CurriculumService.batch_update')
+    def test_batch_update_not_a_list(self, mock_batch):
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001/batch', json={"action": "assign"})
+        self.assertEqual(response.status_code, 400)
+        mock_batch.assert_not_called()
+
+    @patch('src.routes.curriculum_routes.CurriculumService.get_or_create_curriculum')
+    @patch('src.routes.curriculum_routes.CurriculumService.get_etag')
+    def test_get_curriculum_not_modified(self, mock_get_etag, mock_get_or_create):
+        mock_get_etag.return_value = "abc123"
+
+        response = self.client.get('/api/curriculum/AAAA00000000000000000001', headers={"If-None-Match": '"abc123"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], '"abc123"')
+        self.assertEqual(response.data, b"")
+        mock_get_or_create.assert_not_called()
+
+    @patch('src.routes.curriculum_routes.CurriculumService.get_or_create_curriculum')
+    @patch('src.routes.curriculum_routes.CurriculumService.get_etag')
+    def test_get_curriculum_modified(self, mock_get_etag, mock_get_or_create):
+        curriculum = {**self.sample_curriculum_encoded, "lastSaved": {"atTime": datetime.fromisoformat("2024-08-01T12:00:00")}}
+        mock_get_etag.return_value = "def456"
+        mock_get_or_create.return_value = curriculum
+
+        response = self.client.get('/api/curriculum/AAAA00000000000000000001', headers={"If-None-Match": '"abc123"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], f'"{CurriculumService.etag(curriculum)}"')
+
+    @patch('src.routes.curriculum_routes.CurriculumService.update_curriculum')
+    def test_update_curriculum_if_match(self, mock_update):
+        mock_update.return_value = self.sample_curriculum_encoded
+
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001', json={"now": []}, headers={"If-Match": '"abc123"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_update.call_args[0][4], {"abc123"})
+
+        # The weak etag of a compressed response
+        self.client.patch('/api/curriculum/AAAA00000000000000000001', json={"now": []}, headers={"If-Match": 'W/"abc123"'})
+        self.assertEqual(mock_update.call_args[0][4], {"abc123"})
+
+        # Unconditional writes
+        self.client.patch('/api/curriculum/AAAA00000000000000000001', json={"now": []}, headers={"If-Match": '*'})
+        self.assertIsNone(mock_update.call_args[0][4])
+        self.client.patch('/api/curriculum/AAAA00000000000000000001', json={"now": []})
+        self.assertIsNone(mock_update.call_args[0][4])
+
+    @patch('src.routes.curriculum_routes.CurriculumService.assign_resource')
+    def test_assign_resource_precondition_failed(self, mock_assign):
+        mock_assign.side_effect = PreconditionFailed("changed")
+
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001/assign/link', headers={"If-Match": '"abc123"'})
+        self.assertEqual(response.status_code, 412)
+
+    @patch('src.routes.curriculum_routes.CurriculumService.complete_resource')
+    def test_complete_resource_precondition_failed(self, mock_complete):
+        mock_complete.side_effect = PreconditionFailed("changed")
+
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001/complete/link', headers={"If-Match": '"abc123"'})
+        self.assertEqual(response.status_code, 412)
+
+    @patch('src.routes.curriculum_routes.CurriculumService.get_or_create_curriculum')
+    def test_get_curriculum_fields_and_page(self, mock_get_or_create):
+        mock_get_or_create.return_value = self.sample_curriculum_encoded
+
+        response = self.client.get('/api/curriculum/AAAA00000000000000000001?fields=now, completed&completed_limit=10&completed_offset=20')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_or_create.call_args[0][3:], (["now", "completed"], 10, 20))
+
+        response = self.client.get('/api/curriculum/AAAA00000000000000000001')
+        self.assertEqual(mock_get_or_create.call_args[0][3:], (None, None, 0))
+
+    @patch('src.routes.curriculum_routes.CurriculumService.get_or_create_curriculum')
+    def test_get_curriculum_invalid_page(self, mock_get_or_create):
+        response = self.client.get('/api/curriculum/AAAA00000000000000000001?completed_limit=0')
+        self.assertEqual(response.status_code, 400)
+        mock_get_or_create.assert_not_called()
+
+    @patch('src.routes.curriculum_routes.CurriculumService.assign_resource')
+    def test_assign_resource_delta(self, mock_assign):
+        mock_assign.return_value = {"_id": ObjectId("aaaa00000000000000000001"), "now": [], "next": [], "lastSaved": {"atTime": datetime.fromisoformat("2024-08-01T12:00:00")}}
+
+        response = self.client.patch('/api/curriculum/AAAA00000000000000000001/assign/link?delta=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response.headers)
+        self.assertTrue(mock_assign.call_args[0][5])
+
+        self.client.patch('/api/curriculum/AAAA00000000000000000001/assign/link')
+        self.assertFalse(mock_assign.call_args[0][5])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -2,6 +2,7 @@ import unittest
 from flask import Flask
 from src.routes.path_routes import create_path_routes
 from unittest.mock import patch
+from src.utils.name_index import NameIndex
 from mentorhub_utils import MongoJSONEncoder
 
 class TestPathRoutes(unittest.TestCase):
@@ -34,5 +35,49 @@ class TestPathRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json, {"foo":"bar"})
 
+    @patch('src.routes.path_routes.PathsService')
+    def test_get_paths_query_and_limit(self, mock_service):
+        mock_service.get_paths.return_value = []
+
+        response = self.client.get('/api/path?query=Py&limit=10')
+        self.assertEqual(response.status_code, 200)
+        mock_service.get_paths.assert_called_once_with("Py", unittest.mock.ANY, 10, None)
+
+        response = self.client.get('/api/path?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('src.routes.path_routes.PathsService')
+    def test_get_paths_pages(self, mock_service):
+        mock_service.get_paths.return_value = [{"_id": "1", "name": "A"}, {"_id": "2", "name": "B"}]
+        mock_service.page_size.return_value = 2
+
+        # A full page has a cursor for the next page
+        response = self.client.get('/api/path?limit=2')
+        cursor = response.headers["X-Next-Cursor"]
+        self.assertEqual(NameIndex.decode_cursor(cursor), ("B", "2"))
+
+        mock_service.get_paths.return_value = [{"_id": "3", "name": "C"}]
+        response = self.client.get(f'/api/path?limit=2&after={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+        self.assertEqual(mock_service.get_paths.call_args[0][3], ("B", "2"))
+
+        response = self.client.get('/api/path?after=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('src.routes.path_routes.PathsService')
+    def test_get_paths_by_id(self, mock_service):
+        mock_service.page_size.return_value = 2
+        mock_service.get_paths_by_id.return_value = {"paths": [{"foo": "bar"}], "missing": ["b"]}
+
+        response = self.client.get('/api/path?ids=a, b')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"paths": [{"foo": "bar"}], "missing": ["b"]})
+        mock_service.get_paths_by_id.assert_called_once_with(["a", "b"], unittest.mock.ANY)
+        mock_service.get_paths.assert_not_called()
+
+        response = self.client.get('/api/path?ids=a,b,c')
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
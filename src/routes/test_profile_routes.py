@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from src.config.curriculum_config import CurriculumConfig
+from src.routes.profile_routes import create_profile_routes
+
+class TestProfileRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.folder.name, "profile.prof"), "wb") as file:
+            file.write(b"profile")
+        self.env = patch.dict(os.environ, {"PROFILE_FOLDER": self.folder.name})
+        self.env.start()
+        CurriculumConfig._instance = None
+
+        self.app = Flask(__name__)
+        self.app.register_blueprint(create_profile_routes(), url_prefix='/api/profile')
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.env.stop()
+        self.folder.cleanup()
+        CurriculumConfig._instance = None
+
+    def test_get_profile(self):
+        response = self.client.get('/api/profile/profile.prof')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b"profile")
+        response.close()
+
+    def test_get_profile_not_found(self):
+        self.assertEqual(self.client.get('/api/profile/missing.prof').status_code, 404)
+        self.assertEqual(self.client.get('/api/profile/..%2Fprofile.prof').status_code, 404)
+
+    @patch('src.routes.profile_routes.create_token', return_value={"user_id": "aaaa00000000000000000001", "roles": ["Member"]})
+    def test_get_profile_staff_only(self, mock_token):
+        self.assertEqual(self.client.get('/api/profile/profile.prof').status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from flask import Flask
 from src.routes.topic_routes import create_topic_routes
 from unittest.mock import patch
+from src.utils.name_index import NameIndex
 from mentorhub_utils import MongoJSONEncoder
 
 class TestTopicRoutes(unittest.TestCase):
@@ -39,5 +40,49 @@ class TestTopicRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json, {"foo":"bar"})
 
+    @patch('src.routes.topic_routes.TopicService')
+    def test_get_topics_query_and_limit(self, mock_service):
+        mock_service.get_topics.return_value = []
+
+        response = self.client.get('/api/topic?query=Py&limit=10')
+        self.assertEqual(response.status_code, 200)
+        mock_service.get_topics.assert_called_once_with("Py", unittest.mock.ANY, 10, None)
+
+        response = self.client.get('/api/topic?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('src.routes.topic_routes.TopicService')
+    def test_get_topics_pages(self, mock_service):
+        mock_service.get_topics.return_value = [{"_id": "1", "name": "A"}, {"_id": "2", "name": "B"}]
+        mock_service.page_size.return_value = 2
+
+        # A full page has a cursor for the next page
+        response = self.client.get('/api/topic?limit=2')
+        cursor = response.headers["X-Next-Cursor"]
+        self.assertEqual(NameIndex.decode_cursor(cursor), ("B", "2"))
+
+        mock_service.get_topics.return_value = [{"_id": "3", "name": "C"}]
+        response = self.client.get(f'/api/topic?limit=2&after={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+        self.assertEqual(mock_service.get_topics.call_args[0][3], ("B", "2"))
+
+        response = self.client.get('/api/topic?after=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('src.routes.topic_routes.TopicService')
+    def test_get_topics_by_id(self, mock_service):
+        mock_service.page_size.return_value = 2
+        mock_service.get_topics_by_id.return_value = {"topics": [{"foo": "bar"}], "missing": ["b"]}
+
+        response = self.client.get('/api/topic?ids=a, b')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"topics": [{"foo": "bar"}], "missing": ["b"]})
+        mock_service.get_topics_by_id.assert_called_once_with(["a", "b"], unittest.mock.ANY)
+        mock_service.get_topics.assert_not_called()
+
+        response = self.client.get('/api/topic?ids=a,b,c')
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
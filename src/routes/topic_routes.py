@@ -1,5 +1,7 @@
 from mentorhub_utils import create_breadcrumb, create_token
 from src.services.topics_services import TopicService
+from src.utils.name_index import NameIndex
+from src.utils.admission import processing_error
 
 import logging
 logger = logging.getLogger(__name__)
@@ -17,13 +19,35 @@ def create_topic_routes():
             # Get the topics
             token = create_token()
             breadcrumb = create_breadcrumb(token)
+
+            # Specific topics, by a comma separated list of ids
+            ids = [id.strip() for id in request.args.get('ids', "").split(",") if id.strip()]
+            if ids:
+                if len(ids) > TopicService.page_size():
+                    return jsonify({"error": "Too many ids"}), 400
+                result = TopicService.get_topics_by_id(ids, token)
+                logger.info("Get Topics By Id Success", extra={"breadcrumb": breadcrumb})
+                return jsonify(result), 200
+
             query = request.args.get('query') or ""
-            topics = TopicService.get_topics(query, token)
-            logger.info(f"Get Topics Success {breadcrumb}")
-            return jsonify(topics), 200
+            limit = request.args.get('limit', type=int)
+            if limit != None and limit < 1:
+                return jsonify({"error": "limit must be a positive integer"}), 400
+            try:
+                after = NameIndex.decode_cursor(request.args['after']) if request.args.get('after') else None
+            except ValueError:
+                return jsonify({"error": "after is not a valid cursor"}), 400
+            topics = TopicService.get_topics(query, token, limit, after)
+            logger.info("Get Topics Success", extra={"breadcrumb": breadcrumb})
+
+            # A full page may be followed by another, fetched with the cursor of its last entry
+            response = jsonify(topics)
+            if topics and len(topics) == TopicService.page_size(limit):
+                response.headers['X-Next-Cursor'] = NameIndex.cursor(topics[-1])
+            return response, 200
         except Exception as e:
-            logger.warning(f"Get Topic Error has occurred: {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("Get Topic Error has occurred: %s", e)
+            return processing_error(e)
         
     # GET /api/topic/{id} - Return a list of topics that match query
     @topic_routes.route('/<string:id>', methods=['GET'])
@@ -33,11 +57,11 @@ def create_topic_routes():
             token = create_token()
             breadcrumb = create_breadcrumb(token)
             topic = TopicService.get_topic(id, token)
-            logger.info(f"Get Topic Success {breadcrumb}")
+            logger.info("Get Topic Success", extra={"breadcrumb": breadcrumb})
             return jsonify(topic), 200
         except Exception as e:
-            logger.warn(f"Get Topic Error has occurred: {e}")
-            return jsonify({"error": "A processing error occurred"}), 500
+            logger.warning("Get Topic Error has occurred: %s", e)
+            return processing_error(e)
         
     # Ensure the Blueprint is returned correctly
     return topic_routes
\ No newline at end of file
@@ -5,6 +5,18 @@ from flask import Flask
 from src.routes.path_routes import create_path_routes
 from src.routes.topic_routes import create_topic_routes
 from src.routes.curriculum_routes import create_curriculum_routes
+from src.routes.profile_routes import create_profile_routes
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.catalog_cache import CatalogCache
+from src.utils.mentor_cache import MentorCache
+from src.utils import fast_json
+from src.utils.compression import Compression
+from src.utils.metrics import MongoMetrics
+from src.utils.profiler import RequestProfiler
+from src.utils.log_queue import LogQueue
+from src.utils.admission import AdmissionControl
+from src.utils.mongo_io import MongoIO
+from pymongo import monitoring
 from prometheus_flask_exporter import PrometheusMetrics
 from mentorhub_utils import create_config_routes
 from mentorhub_utils import MentorHub_Config
@@ -14,46 +26,79 @@ from mentorhub_utils import MentorHubMongoIO
 # Initialize Config
 config = MentorHub_Config.get_instance()
 
-# Initialize Logging
+# Initialize Logging, records are written by a background thread so requests do not wait for them
 import logging
-logging.basicConfig(level=logging.INFO)
+LogQueue.start(CurriculumConfig.get_instance().LOG_FORMAT, CurriculumConfig.get_instance().LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
 # Initialize Flask App
 app = Flask(__name__)
-app.json = MongoJSONEncoder(app)
+if CurriculumConfig.get_instance().JSON_PROVIDER == "orjson":
+    if fast_json.orjson == None:
+        logger.warning("JSON_PROVIDER is orjson, but orjson is not installed")
+    app.json = fast_json.FastMongoJSONProvider(app)
+else:
+    app.json = MongoJSONEncoder(app)
+
+# Time every MongoDB command, the listener must be registered before the client is created
+monitoring.register(MongoMetrics(CurriculumConfig.get_instance().MONGO_SIZE_SAMPLE_EVERY))
 
 # Initialize Database Connection, and load one-time data
 mongo = MentorHubMongoIO.get_instance()
 mongo.configure(config.CURRICULUM_COLLECTION_NAME)
 
+# Read each collection with its configured read preference, the catalog from secondaries by default
+MongoIO.route_reads()
+
+# Keep the caches current, when configured. Watchers are threads, so they are started 
+# in each process that serves requests - gunicorn workers start them after they fork
+def start_watchers():
+    if CurriculumConfig.get_instance().MENTOR_CACHE_WATCH == "true":
+        MentorCache.watch()
+    if CurriculumConfig.get_instance().CATALOG_CACHE_WATCH == "true":
+        CatalogCache.watch(config.PATHS_COLLECTION_NAME)
+        CatalogCache.watch(config.TOPICS_COLLECTION_NAME)
+
 # Apply Prometheus monitoring middleware
 metrics = PrometheusMetrics(app, path='/api/health/')
 metrics.info('app_info', 'Application info', version=config.BUILT_AT)
 
+# Turn requests away with a 503 when too many are waiting for MongoDB. Registered first, so rejected requests do no other work
+admission = AdmissionControl(app)
+
+# Log slow requests, and profile requests when asked. Registered before compression, so that its time is included
+profiler = RequestProfiler(app)
+
+# Compress large responses, but not the metrics scraped by Prometheus
+compression = Compression(app, skip_paths=['/api/health/'])
+
 # Initialize Route Handlers
 config_handler = create_config_routes()
 curriculum_handler = create_curriculum_routes()
 path_handler = create_path_routes()
 topic_handler = create_topic_routes()
+profile_handler = create_profile_routes()
 
 # Register routes
 app.register_blueprint(curriculum_handler, url_prefix='/api/curriculum')
 app.register_blueprint(path_handler, url_prefix='/api/path')
 app.register_blueprint(topic_handler, url_prefix='/api/topic')
 app.register_blueprint(config_handler, url_prefix='/api/config')
+app.register_blueprint(profile_handler, url_prefix='/api/profile')
 
 # Define a signal handler for SIGTERM and SIGINT
 def handle_exit(signum, frame):
-    logger.info(f"Received signal {signum}. Initiating shutdown...")
+    logger.info("Received signal %s. Initiating shutdown...", signum)
     mongo.disconnect()
     logger.info('MongoDB connection closed.')
+    LogQueue.stop()
     sys.exit(0)
 
 # Register the signal handler
 signal.signal(signal.SIGTERM, handle_exit)
 signal.signal(signal.SIGINT, handle_exit)
 
-# Expose the app object for Gunicorn
+# Expose the app object for Gunicorn, see src/config/gunicorn_config.py
 if __name__ == "__main__":
+    start_watchers()
     app.run(host='0.0.0.0', port=config.CURRICULUM_API_PORT)
\ No newline at end of file
@@ -1,19 +1,36 @@
+import hashlib
 from datetime import datetime
-from bson import ObjectId
+from bson import BSON, ObjectId
 from flask import jsonify
+from pymongo.errors import DuplicateKeyError
 from mentorhub_utils import MentorHub_Config, MentorHubMongoIO
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.mentor_cache import MentorCache
+from src.utils.mongo_io import MongoIO
+from src.utils.path_cache import PathCache
+from src.utils.metrics import timed
 
 import logging
 logger = logging.getLogger(__name__)
 
+class PreconditionFailed(Exception):
+    """The curriculum has changed since the version the client last read"""
+
+class UpdateConflict(Exception):
+    """The curriculum kept changing while an update was being applied to it"""
+
 class CurriculumService:
-    
+
+    # The resource index is maintained by the service, and is not returned by the API
+    PROJECTION = {"resourceIndex": 0}
+
+    # How many times a batch update is tried when the curriculum changes while it is being applied
+    BATCH_ATTEMPTS = 3
+
     @staticmethod 
+    @timed
     def _check_user_access(curriculum_id, token):
         """Role Based Access Control logic"""
-        config = MentorHub_Config.get_instance()
-        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
-        
         # Staff can edit all curriculums
         if "Staff" in token["roles"]: return
         
@@ -22,163 +39,526 @@ class CurriculumService:
         
         # Mentors can access their apprentices curriculums
         if "Mentor" in token["roles"]:
-            apprentice = mentorhub_mongoIO.get_document(config.PEOPLE_COLLECTION_NAME, curriculum_id)
-            if apprentice["mentorId"] == token["user_id"]:
+            if MentorCache.get_mentor_id(curriculum_id) == token["user_id"]:
                 return
         
         # User has No Access! Log a warning and raise an exception
-        logger.warning(f"Access Denied: {curriculum_id}, {token['user_id']}, {token['roles']}")
+        logger.warning("Access Denied: %s, %s, %s", curriculum_id, token['user_id'], token['roles'])
         raise Exception("Access Denied")
         
     @staticmethod
-    def get_or_create_curriculum(curriculum_id, token, breadcrumb):
-        """Get a curriculum if it exits, if not create a new one and return that"""
+    def _hydrate_path(path):
+        """Expand a path stored by reference, without the resources that have been removed from it"""
+        if "pathId" not in path or "segments" in path:
+            return path
+
+        cached = PathCache.get(path["pathId"])
+        if cached == None:
+            logger.warning("Referenced path not found %s", path['pathId'])
+            return None
+
+        removed = set(path.get("removed", []))
+        if not removed:
+            return cached["path"]
+
+        segments = []
+        for segment in cached["path"].get('segments', []):
+            topics = []
+            for topic in segment.get('topics', []):
+                resources = [resource for resource in topic.get('resources', []) if resource.get('link') not in removed]
+                if resources:
+                    topics.append({**topic, "resources": resources})
+            if topics:
+                segments.append({**segment, "topics": topics})
+        return {**cached["path"], "segments": segments} if segments else None
+
+    @staticmethod
+    @timed
+    def _hydrate(curriculum):
+        """Expand any paths in next that are stored by reference"""
+        if curriculum == None or not curriculum.get("next"):
+            return curriculum
+
+        paths = [CurriculumService._hydrate_path(path) for path in curriculum["next"]]
+        curriculum["next"] = [path for path in paths if path != None]
+        return curriculum
+
+    @staticmethod
+    def etag(curriculum):
+        """
+        A strong entity tag for a curriculum, that changes with every save. It is built only from the stored document,
+        so every worker gives the same tag - a referenced path keeps the version it was added at until the curriculum is saved.
+        """
+        version = BSON.encode({"lastSaved": curriculum.get("lastSaved")})
+        return hashlib.blake2b(version, digest_size=16).hexdigest()
+
+    @staticmethod
+    @timed
+    def get_etag(curriculum_id, token):
+        """Get the current entity tag of a curriculum, reading only lastSaved, or None if it does not exist"""
         config = MentorHub_Config.get_instance()
-        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
         CurriculumService._check_user_access(curriculum_id, token)
 
-        curriculum = mentorhub_mongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id)
-        if curriculum == None:
-            document = {
-                "_id": ObjectId(curriculum_id),
-                "lastSaved": breadcrumb
-            }
-            mentorhub_mongoIO.create_document(config.CURRICULUM_COLLECTION_NAME, document)
-            curriculum = mentorhub_mongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id)
-        return curriculum
+        curriculum = MongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, {"lastSaved": 1}, primary=True)
+        return CurriculumService.etag(curriculum) if curriculum != None else None
 
     @staticmethod
-    def update_curriculum(curriculum_id, patch_data, token, breadcrumb):
-        """Update the specified curriculum"""
+    def _check_etag(curriculum_id, etags):
+        """Check that the curriculum is still at one of the etags, and return the lastSaved to match the write on"""
+        config = MentorHub_Config.get_instance()
+
+        curriculum = MongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, {"lastSaved": 1}, primary=True)
+        if curriculum == None or CurriculumService.etag(curriculum) not in etags:
+            raise PreconditionFailed(f"Curriculum '{curriculum_id}' has changed")
+        return curriculum.get("lastSaved")
+
+    @staticmethod
+    def _projection(fields=None, completed_limit=None, completed_offset=0):
+        """Project only the fields asked for, and a page of completed, keeping lastSaved for the etag"""
+        if fields:
+            projection = {field: 1 for field in fields if field.split(".")[0] not in ["", "resourceIndex"] and "$" not in field}
+            projection["lastSaved"] = 1
+        else:
+            projection = dict(CurriculumService.PROJECTION)
+        if completed_limit != None and (not fields or "completed" in projection):
+            projection["completed"] = {"$slice": [completed_offset or 0, completed_limit]}
+        return projection
+
+    @staticmethod
+    def _changed_projection(sections, delta):
+        """Project only the changed sections of a curriculum for a delta response, otherwise the whole curriculum"""
+        if not delta:
+            return CurriculumService.PROJECTION
+        return {**{section: 1 for section in sections if section != "resourceIndex"}, "lastSaved": 1}
+
+    @staticmethod
+    @timed
+    def get_or_create_curriculum(curriculum_id, token, breadcrumb, fields=None, completed_limit=None, completed_offset=0):
+        """Get a curriculum if it exits, if not create a new one and return that, with only the fields and completed page asked for"""
         config = MentorHub_Config.get_instance()
-        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
         CurriculumService._check_user_access(curriculum_id, token)
+        projection = CurriculumService._projection(fields, completed_limit, completed_offset)
+
+        # Upsert, the breadcrumb and empty index are only set when the curriculum is created
+        new_curriculum = {"$setOnInsert": {
+            "lastSaved": breadcrumb,
+            "resourceIndex": {}
+        }}
+        # Not coalesced with concurrent gets, a get that started before a write would return the curriculum without it
+        try:
+            curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, new_curriculum, projection=projection, upsert=True)
+        except DuplicateKeyError:
+            # A concurrent first visit inserted it, so this upsert will find it
+            curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, new_curriculum, projection=projection, upsert=True)
+        return CurriculumService._hydrate(curriculum)
 
-        # Add breadcrumb to patch_data
+    @staticmethod
+    @timed
+    def update_curriculum(curriculum_id, patch_data, token, breadcrumb, etags=None, delta=False):
+        """Update the specified curriculum, if it is still at one of the etags when they are given, returning only the changes for a delta"""
+        config = MentorHub_Config.get_instance()
+
+        CurriculumService._check_user_access(curriculum_id, token)
+        match = {"lastSaved": CurriculumService._check_etag(curriculum_id, etags)} if etags is not None else None
+
+        # Add breadcrumb to patch_data, and re-index a replaced next
         patch_data["lastSaved"] = breadcrumb
-        curriculum = mentorhub_mongoIO.update_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, patch_data)
-        return curriculum
+        if "next" in patch_data:
+            patch_data["resourceIndex"] = CurriculumService._build_index(patch_data["next"])
+        projection = CurriculumService._changed_projection(patch_data.keys(), delta)
+        curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, {"$set": patch_data}, match, projection)
+        if curriculum == None and etags is not None:
+            raise PreconditionFailed(f"Curriculum '{curriculum_id}' has changed")
+        return CurriculumService._hydrate(curriculum)
 
     @staticmethod
+    @timed
     def delete_curriculum(curriculum_id, token):
         """Remove a curriculum - for testing"""
         config = MentorHub_Config.get_instance()
         mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
         if not "Staff" in token["roles"]:
-            logger.warning(f"Delete Access Denied, Staff only: {token['roles']}")
+            logger.warning("Delete Access Denied, Staff only: %s", token['roles'])
             raise Exception("Access Denied")
     
         mentorhub_mongoIO.delete_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id)
         return 
 
     @staticmethod
-    def assign_resource(curriculum_id, link, token, breadcrumb):
-        """Promote a resource from Next to Now"""
+    def _index_key(link):
+        """A compact key for a resource link, that is safe to use as a field name"""
+        return hashlib.blake2b(link.encode(), digest_size=8).hexdigest()
+
+    @staticmethod
+    def _build_index(paths):
+        """Map the resource links in paths to every path, segment and topic that contains them"""
+        index = {}
+        for path in paths:
+            for segment in path.get('segments', []):
+                for topic in segment.get('topics', []):
+                    for resource in topic.get('resources', []):
+                        locations = index.setdefault(CurriculumService._index_key(resource.get('link', '')), [])
+                        location = {
+                            "path": path.get('path'),
+                            "segment": segment.get('segment'),
+                            "topic": topic.get('topic')
+                        }
+                        if location not in locations:
+                            locations.append(location)
+        return index
+
+    @staticmethod
+    @timed
+    def _index_curriculum(curriculum_id):
+        """Build the resource index for a curriculum saved before it was indexed, returns True if it was built"""
         config = MentorHub_Config.get_instance()
-        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
+        curriculum = MongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, {"next": 1, "resourceIndex": 1}, primary=True)
+        if curriculum == None or "resourceIndex" in curriculum:
+            return False
+
+        index = CurriculumService._build_index(curriculum.get('next', []))
+        MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, {"$set": {"resourceIndex": index}}, {"resourceIndex": {"$exists": False}})
+        logger.info("Resource Index built for %s", curriculum_id)
+        return True
+
+    @staticmethod
+    def _assign_pipeline(link, breadcrumb):
+        """
+        Update pipeline that moves the resource with link from Next to Now, pruning emptied containers.
+        The resource is taken from the first location indexed for the link, and that location is dropped
+        from the index, leaving any other copies of the resource to be assigned later.
+        """
+        key = CurriculumService._index_key(link)
+        locations = f"$resourceIndex.{key}"
+        location = "$$location"
+        link = {"$literal": link}
+
+        def matches(item, field, value):
+            return {"$eq": [{"$ifNull": [f"{item}.{field}", None]}, {"$ifNull": [value, None]}]}
+
+        # Use the index to go straight to the topic that holds the resource
+        def find(array, name, field, value):
+            return {"$arrayElemAt": [{"$filter": {
+                "input": {"$ifNull": [array, []]},
+                "as": name,
+                "cond": matches(f"$${name}", field, value)
+            }}, 0]}
+        def children(item, name, field):
+            return {"$let": {"vars": {name: item}, "in": f"$${name}.{field}"}}
+        path = find("$next", "path", "path", f"{location}.path")
+        segment = find(children(path, "path", "segments"), "segment", "segment", f"{location}.segment")
+        topic = find(children(segment, "segment", "topics"), "topic", "topic", f"{location}.topic")
+        resource = find(children(topic, "topic", "resources"), "resource", "link", link)
+
+        # Rebuild only the indexed containers, pruning them if they were emptied
+        def prune(array, name, field, value, rebuilt_field, rebuilt):
+            item = f"$${name}"
+            return {"$filter": {
+                "input": {"$map": {
+                    "input": {"$ifNull": [array, []]},
+                    "as": name,
+                    "in": {"$cond": [
+                        matches(item, field, value),
+                        {"$mergeObjects": [item, {rebuilt_field: rebuilt}]},
+                        item
+                    ]}
+                }},
+                "as": name,
+                "cond": {"$or": [
+                    {"$not": [matches(item, field, value)]},
+                    {"$gt": [{"$size": {"$ifNull": [f"{item}.{rebuilt_field}", []]}}, 0]}
+                ]}
+            }}
+        remaining = {"$filter": {"input": {"$ifNull": ["$$topic.resources", []]}, "as": "resource", "cond": {"$ne": ["$$resource.link", link]}}}
+        topics = prune("$$segment.topics", "topic", "topic", f"{location}.topic", "resources", remaining)
+        segments = prune("$$path.segments", "segment", "segment", f"{location}.segment", "topics", topics)
+        paths = prune("$next", "path", "path", f"{location}.path", "segments", segments)
+
+        def at_location(expression):
+            return {"$let": {"vars": {"location": {"$arrayElemAt": [locations, 0]}}, "in": expression}}
+
+        return [
+            {"$set": {
+                "now": at_location({"$let": {
+                    "vars": {"resource": resource},
+                    "in": {"$concatArrays": [{"$ifNull": ["$now", []]}, {"$cond": [
+                        {"$ifNull": ["$$resource", False]}, [{
+                            "name": "$$resource.name",
+                            "link": "$$resource.link",
+                            "description": "$$resource.description"
+                        }], []
+                    ]}]}
+                }}),
+                "next": at_location(paths),
+                "lastSaved": {"$literal": breadcrumb},
+                f"resourceIndex.{key}": {"$cond": [
+                    {"$gt": [{"$size": locations}, 1]},
+                    {"$slice": [locations, 1, {"$size": locations}]},
+                    "$$REMOVE"
+                ]}
+            }}
+        ]
+
+    @staticmethod
+    @timed
+    def _assign_embedded(curriculum_id, link, breadcrumb, condition=None, projection=PROJECTION):
+        """Move an indexed resource in an embedded path from Next to Now, in one atomic update"""
+        config = MentorHub_Config.get_instance()
+
+        # The resource must still be in Next, so that a stale index entry is not found rather than moving nothing
+        match = {
+            f"resourceIndex.{CurriculumService._index_key(link)}": {"$exists": True},
+            "next.segments.topics.resources.link": link,
+            **(condition or {})
+        }
+        pipeline = CurriculumService._assign_pipeline(link, breadcrumb)
+        return MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, pipeline, match, projection)
+
+    @staticmethod
+    @timed
+    def _assign_referenced(curriculum_id, link, breadcrumb, condition=None, projection=PROJECTION):
+        """Mark a resource in a path stored by reference as removed, and add it to Now, in one atomic update"""
+        config = MentorHub_Config.get_instance()
+
+        # Like an embedded assign, the resource is taken from the first path that still has it. The positional
+        # operator marks only the reference matched by $elemMatch, so a path added twice keeps its other copy
+        for path_id, resource in PathCache.resources_with(link):
+            update = {
+                "$push": {"now": {
+                    "name": resource.get('name'),
+                    "link": resource.get('link'),
+                    "description": resource.get('description')
+                }},
+                "$addToSet": {"next.$.removed": link},
+                "$set": {"lastSaved": breadcrumb}
+            }
+            match = {"next": {"$elemMatch": {"pathId": ObjectId(path_id), "removed": {"$ne": link}}}, **(condition or {})}
+            curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, update, match, projection)
+            if curriculum != None:
+                return curriculum
+        return None
+
+    @staticmethod
+    @timed
+    def assign_resource(curriculum_id, link, token, breadcrumb, etags=None, delta=False):
+        """Promote a resource from Next to Now, if the curriculum is still at one of the etags when they are given, returning only the changes for a delta"""
         CurriculumService._check_user_access(curriculum_id, token)
+        condition = {"lastSaved": CurriculumService._check_etag(curriculum_id, etags)} if etags is not None else None
+        projection = CurriculumService._changed_projection(["now", "next"], delta)
 
-        curriculum = mentorhub_mongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id)
-        
-        # Initialize curriculum, we won't be changing any of these values
-        del curriculum["_id"]
-        del curriculum["completed"]
-        del curriculum["later"]
-        
-        # Set the breadcrumb
-        curriculum["lastSaved"] = breadcrumb
+        # Try the configured storage mode first
+        attempts = [CurriculumService._assign_embedded, CurriculumService._assign_referenced]
+        if CurriculumConfig.get_instance().NEXT_STORAGE_MODE == "reference":
+            attempts.reverse()
+        for attempt in attempts:
+            curriculum = attempt(curriculum_id, link, breadcrumb, condition, projection)
+            if curriculum != None:
+                return CurriculumService._hydrate(curriculum)
 
-        # Find the resource in curriculum.next by link
-        for path in curriculum.get('next', []):
-            for segment in path.get('segments', []):
-                for topic in segment.get('topics', []):
-                    for resource in topic.get('resources', []):
-                        if resource.get('link') == link:
-                            # Add resource to curriculum.now 
-                            curriculum.get('now').append({
-                                'name': resource.get('name'),
-                                'link': resource.get('link'),
-                                'description': resource.get('description')
-                            })
-
-                            # Remove the resource from curriculum.next
-                            topic['resources'].remove(resource)
-
-                            # Remove empty containers (topic, segment, path) from next
-                            if not topic['resources']:
-                                segment['topics'].remove(topic)
-                            if not segment['topics']:
-                                path['segments'].remove(segment)
-                            if not path['segments']:
-                                curriculum['next'].remove(path)
-                                
-                            # Update the curriculum and return
-                            curriculum = mentorhub_mongoIO.update_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, curriculum)
-                            return curriculum
+        # Curricula saved before they were indexed are indexed and retried
+        if CurriculumService._index_curriculum(curriculum_id):
+            curriculum = CurriculumService._assign_embedded(curriculum_id, link, breadcrumb, condition, projection)
+            if curriculum != None:
+                return CurriculumService._hydrate(curriculum)
+
+        # A concurrent save is a conflict, rather than a missing resource
+        if etags is not None:
+            CurriculumService._check_etag(curriculum_id, etags)
         raise ValueError(f"Resource with link '{link}' not found in next")
-    
+
+    @staticmethod
+    def _complete_pipeline(link, review, completed, breadcrumb):
+        """Update pipeline that moves the resource with link from Now to Completed"""
+        link = {"$literal": link}
+        now = {"$ifNull": ["$now", []]}
+        resource = {"$arrayElemAt": [{"$filter": {"input": now, "as": "resource", "cond": {"$eq": ["$$resource.link", link]}}}, 0]}
+        return [
+            {"$set": {
+                "completed": {"$concatArrays": [{"$ifNull": ["$completed", []]}, [
+                    {"$mergeObjects": [resource, {"completed": {"$literal": completed}}, {"$literal": review}]}
+                ]]},
+                "now": {"$filter": {"input": now, "as": "resource", "cond": {"$ne": ["$$resource.link", link]}}},
+                "lastSaved": {"$literal": breadcrumb}
+            }}
+        ]
+
     @staticmethod
-    def complete_resource(curriculum_id, link, review, token, breadcrumb):
-        """Promote a resource from Now to Completed"""
+    @timed
+    def complete_resource(curriculum_id, link, review, token, breadcrumb, etags=None, delta=False):
+        """Promote a resource from Now to Completed, if the curriculum is still at one of the etags when they are given, returning only the changes for a delta"""
         config = MentorHub_Config.get_instance()
-        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
         CurriculumService._check_user_access(curriculum_id, token)
 
-        curriculum = mentorhub_mongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id)
-        
-        # Initialize curriculum, we won't be changing any of these values
-        del curriculum["_id"]
-        del curriculum["next"]
-        del curriculum["later"]
-        
-        # Set the breadcrumb
-        curriculum["lastSaved"] = breadcrumb
-        
-        # Find the resource in curriculum.now by link
-        for resource in curriculum['now']:
-            if resource.get('link') == link:
-                # Remove the resource from curriculum.now
-                curriculum['now'].remove(resource)
+        # Move the resource server side, in one atomic update
+        match = {"now.link": link}
+        if etags is not None:
+            match["lastSaved"] = CurriculumService._check_etag(curriculum_id, etags)
+        pipeline = CurriculumService._complete_pipeline(link, review, datetime.now(), breadcrumb)
+        projection = CurriculumService._changed_projection(["now", "completed"], delta)
+        curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, pipeline, match, projection)
+        if curriculum == None:
+            if etags is not None:
+                CurriculumService._check_etag(curriculum_id, etags)
+            raise ValueError(f"Resource with link '{link}' not found in now")
+        return CurriculumService._hydrate(curriculum)
+    
+    @staticmethod
+    @timed
+    def _apply_assign(curriculum, link):
+        """Move a resource from Next to Now in a curriculum document, returns False if it is not in Next"""
+        index = curriculum.setdefault("resourceIndex", {})
+        key = CurriculumService._index_key(link)
+        paths = curriculum.setdefault("next", [])
 
-                # Add resource to curriculum.completed
-                resource["completed"] = datetime.now()
-                resource = {**resource, **review}
-                curriculum.get('completed').append(resource)
+        # Embedded paths are located with the resource index, like _assign_pipeline the resource is removed
+        # from every container with the names of its first location, and that location is dropped
+        while index.get(key):
+            location = index[key].pop(0)
+            if not index[key]:
+                del index[key]
+            resource = None
+            for path in [path for path in paths if "segments" in path and path.get('path') == location["path"]]:
+                for segment in [segment for segment in path['segments'] if segment.get('segment') == location["segment"]]:
+                    for topic in [topic for topic in segment.get('topics', []) if topic.get('topic') == location["topic"]]:
+                        resource = resource or next((resource for resource in topic.get('resources', []) if resource.get('link') == link), None)
+                        topic['resources'] = [resource for resource in topic.get('resources', []) if resource.get('link') != link]
+                    segment['topics'] = [topic for topic in segment.get('topics', []) if topic.get('topic') != location["topic"] or topic['resources']]
+                path['segments'] = [segment for segment in path['segments'] if segment.get('segment') != location["segment"] or segment['topics']]
+            paths[:] = [path for path in paths if "segments" not in path or path.get('path') != location["path"] or path['segments']]
+            if resource != None:
+                curriculum.setdefault("now", []).append({
+                    'name': resource.get('name'),
+                    'link': resource.get('link'),
+                    'description': resource.get('description')
+                })
+                return True
+
+        # Referenced paths are located with the path cache
+        for path_id, resource in PathCache.resources_with(link):
+            for path in paths:
+                if path.get("pathId") == ObjectId(path_id) and link not in path.get("removed", []):
+                    path.setdefault("removed", []).append(link)
+                    curriculum.setdefault("now", []).append({
+                        'name': resource.get('name'),
+                        'link': resource.get('link'),
+                        'description': resource.get('description')
+                    })
+                    return True
+        return False
+
+    @staticmethod
+    @timed
+    def _apply_complete(curriculum, link, review, completed):
+        """Move a resource from Now to Completed in a curriculum document, returns False if it is not in Now"""
+        now = curriculum.setdefault("now", [])
+        for position, resource in enumerate(now):
+            if resource.get('link') == link:
+                del now[position]
+                curriculum.setdefault("completed", []).append({**resource, "completed": completed, **review})
+                return True
+        return False
 
-                # Update the curriculum and return
-                curriculum = mentorhub_mongoIO.update_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, curriculum)
-                return curriculum
-        raise ValueError(f"Resource with link '{link}' not found in {curriculum['now']}")
-    
     @staticmethod
-    def add_path(curriculum_id, path_id, token, breadcrumb):
-        """Add a path to Next"""
+    @timed
+    def batch_update(curriculum_id, operations, token, breadcrumb):
+        """Assign and Complete a list of resources, with one read and one atomic write"""
         config = MentorHub_Config.get_instance()
-        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
         CurriculumService._check_user_access(curriculum_id, token)
 
-        curriculum = mentorhub_mongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id)
-        path = mentorhub_mongoIO.get_document(config.PATHS_COLLECTION_NAME, path_id)
-        
-        # Initialize curriculum, we won't be changing any of these values
-        del curriculum["_id"]
-        del curriculum["completed"]
-        del curriculum["now"]
-        del curriculum["later"]
-        
-        # Set the breadcrumb
-        curriculum["lastSaved"] = breadcrumb
+        # Retry if the curriculum is changed between the read and the write
+        for attempt in range(CurriculumService.BATCH_ATTEMPTS):
+            curriculum = MongoIO.get_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, primary=True)
+            if curriculum == None:
+                raise ValueError(f"Curriculum '{curriculum_id}' not found")
+            last_saved = curriculum.get("lastSaved")
+            if "resourceIndex" not in curriculum:
+                curriculum["resourceIndex"] = CurriculumService._build_index(curriculum.get("next", []))
 
-        # Add the path
-        curriculum["next"] = curriculum["next"] + [path]
+            # Apply the operations in order
+            results = []
+            changed = set()
+            completed = datetime.now()
+            for operation in operations:
+                if not isinstance(operation, dict):
+                    results.append({"action": None, "link": None, "result": "Invalid Operation"})
+                    continue
+                action = operation.get("action")
+                link = operation.get("link")
+                if not isinstance(link, str):
+                    results.append({"action": action, "link": None, "result": "Invalid Operation"})
+                    continue
+                if action == "assign" and link:
+                    done = CurriculumService._apply_assign(curriculum, link)
+                    sections = ["now", "next", "resourceIndex"]
+                elif action == "complete" and link:
+                    review = {key: operation[key] for key in ["rating", "review"] if key in operation}
+                    done = CurriculumService._apply_complete(curriculum, link, review, completed)
+                    sections = ["now", "completed"]
+                else:
+                    results.append({"action": action, "link": link, "result": "Invalid Operation"})
+                    continue
+                if done:
+                    changed.update(sections)
+                results.append({"action": action, "link": link, "result": "Success" if done else "Not Found"})
 
-        # Update the database, get the updated document        
-        curriculum = mentorhub_mongoIO.update_document(config.CURRICULUM_COLLECTION_NAME, curriculum_id, curriculum)
-        return curriculum
-    
+            # Nothing to write
+            if not changed:
+                del curriculum["resourceIndex"]
+                return {"curriculum": CurriculumService._hydrate(curriculum), "results": results}
+
+            # Write the changed sections, if the curriculum is unchanged since it was read
+            update = {"$set": {**{section: curriculum[section] for section in changed}, "lastSaved": breadcrumb}}
+            updated = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, update, {"lastSaved": last_saved}, CurriculumService.PROJECTION)
+            if updated != None:
+                return {"curriculum": CurriculumService._hydrate(updated), "results": results}
+            logger.info("Batch update conflict on %s, attempt %s", curriculum_id, attempt + 1)
+        raise UpdateConflict(f"Batch update conflict on {curriculum_id}")
+
+    @staticmethod
+    @timed
+    def add_path(curriculum_id, path_id, token, breadcrumb, delta=False):
+        """Add a path to Next, returning only the changes for a delta"""
+        config = MentorHub_Config.get_instance()
+
+        CurriculumService._check_user_access(curriculum_id, token)
+        projection = CurriculumService._changed_projection(["next"], delta)
+
+        # Add the path by reference, from the catalog cache that hydrates it, reading just this path when it was created since the catalog was loaded
+        if CurriculumConfig.get_instance().NEXT_STORAGE_MODE == "reference":
+            cached = PathCache.get(path_id)
+            if cached == None:
+                cached = PathCache.load(path_id)
+            if cached == None:
+                raise ValueError(f"Path '{path_id}' not found")
+            update = {
+                "$push": {"next": {
+                    "pathId": ObjectId(path_id),
+                    "path": cached["path"].get('path'),
+                    "version": cached["version"],
+                    "removed": []
+                }},
+                "$set": {"lastSaved": breadcrumb}
+            }
+            curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, update, projection=projection)
+            return CurriculumService._hydrate(curriculum)
+
+        # Or embed a copy of the path as it is now, and index its resources
+        path = MongoIO.get_document(config.PATHS_COLLECTION_NAME, path_id, primary=True)
+        if path == None:
+            raise ValueError(f"Path '{path_id}' not found")
+        update = {
+            "$push": {"next": path},
+            "$addToSet": {f"resourceIndex.{key}": {"$each": locations} for key, locations in CurriculumService._build_index([path]).items()},
+            "$set": {"lastSaved": breadcrumb}
+        }
+        match = {"resourceIndex": {"$exists": True}}
+        curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, update, match, projection)
+        if curriculum == None and CurriculumService._index_curriculum(curriculum_id):
+            curriculum = MongoIO.find_one_and_update(config.CURRICULUM_COLLECTION_NAME, curriculum_id, update, match, projection)
+        return CurriculumService._hydrate(curriculum)
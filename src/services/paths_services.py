@@ -1,5 +1,9 @@
-from pymongo import ASCENDING
+from bson import ObjectId
 from mentorhub_utils import MentorHub_Config, MentorHubMongoIO
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.catalog_cache import CatalogCache
+from src.utils.name_index import NameIndex
+from src.utils.metrics import timed
 
 import logging
 logger = logging.getLogger(__name__)
@@ -13,26 +17,59 @@ class PathsService:
         return
 
     @staticmethod
-    def get_paths(query, token):
-        """Get a list of paths that match query"""
+    @timed
+    def _name_index():
+        """The name search index of the paths catalog, rebuilt when the catalog cache expires or is invalidated"""
         config = MentorHub_Config.get_instance()
         mentorhub_mongoIO = MentorHubMongoIO.get_instance()
-        
-        PathsService._check_user_access(token)
 
-        match = {"name": {"$regex": query}}
-        order = [('name', ASCENDING)]
         project = {"_id":1,"name":1}
-        paths = mentorhub_mongoIO.get_documents(config.PATHS_COLLECTION_NAME, match, project, order)
-        return paths
+        return CatalogCache.get(config.PATHS_COLLECTION_NAME, "name_index", lambda: NameIndex(mentorhub_mongoIO.get_documents(config.PATHS_COLLECTION_NAME, {}, project)))
+
+    @staticmethod
+    def page_size(limit=None):
+        """The most paths returned in a page, the limit asked for capped at CATALOG_SEARCH_LIMIT"""
+        max_limit = CurriculumConfig.get_instance().CATALOG_SEARCH_LIMIT
+        return min(limit, max_limit) if limit != None else max_limit
+
+    @staticmethod
+    @timed
+    def get_paths(query, token, limit=None, after=None):
+        """Get a page of paths whose name contains query, ignoring case, in name order after the (name, _id) key"""
+        PathsService._check_user_access(token)
+
+        return PathsService._name_index().search(query, PathsService.page_size(limit), after)
 
     @staticmethod
+    @timed
     def get_path(path_id, token):
-        """Get the specified path"""
+        """Get the specified path, from the catalog cache"""
         config = MentorHub_Config.get_instance()
         mentorhub_mongoIO = MentorHubMongoIO.get_instance()
 
         PathsService._check_user_access(token)
 
-        path = mentorhub_mongoIO.get_document(config.PATHS_COLLECTION_NAME, path_id)
+        path = CatalogCache.get(config.PATHS_COLLECTION_NAME, ("document", path_id), lambda: mentorhub_mongoIO.get_document(config.PATHS_COLLECTION_NAME, path_id))
         return path
+
+    @staticmethod
+    @timed
+    def get_paths_by_id(ids, token):
+        """Get the specified paths in the order asked for, with one query for those that are not cached, and the ids that were not found"""
+        config = MentorHub_Config.get_instance()
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+
+        PathsService._check_user_access(token)
+
+        def load(keys):
+            match = {"_id": {"$in": [ObjectId(key[1]) for key in keys]}}
+            return {("document", str(path["_id"])): path for path in mentorhub_mongoIO.get_documents(config.PATHS_COLLECTION_NAME, match) or []}
+
+        # Ids that are not valid ObjectIds can not be found
+        keys = [("document", str(ObjectId(path_id))) if ObjectId.is_valid(path_id) else None for path_id in ids]
+        valid = [key for key in keys if key != None]
+        found = dict(zip(valid, CatalogCache.get_many(config.PATHS_COLLECTION_NAME, valid, load)))
+        return {
+            "paths": [found[key] for key in keys if found.get(key) != None],
+            "missing": [path_id for path_id, key in zip(ids, keys) if found.get(key) == None]
+        }
@@ -0,0 +1,317 @@
+import copy
+from datetime import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from mentorhub_utils import MentorHub_Config
+from src.services.curriculum_services import CurriculumService
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+MISSING = object()  # a field that is not in the document, which is not the same as null
+
+def _field(value, path):
+    """The value at a dotted field path, mapped over arrays of documents as MongoDB does"""
+    for name in path.split(".") if path else []:
+        if isinstance(value, dict):
+            value = value.get(name, MISSING)
+        elif isinstance(value, list):
+            value = [item[name] for item in value if isinstance(item, dict) and name in item]
+        else:
+            return MISSING
+    return value
+
+def _true(value):
+    return not (value is MISSING or value is None or value is False or (type(value) in (int, float) and value == 0))
+
+def _null(value):
+    return value is MISSING or value is None
+
+def _equal(a, b):
+    return a is b if MISSING in (a, b) else a == b
+
+def _slice(array, *arguments):
+    position, count = arguments if len(arguments) == 2 else (0, arguments[0])
+    return array[position:position + count] if count >= 0 else array[count:]
+
+def _if_null(arguments, evaluate):
+    for argument in arguments[:-1]:
+        value = evaluate(argument)
+        if not _null(value):
+            return value
+    return evaluate(arguments[-1])
+
+def _cond(arguments, evaluate):
+    condition, then, otherwise = arguments if isinstance(arguments, list) else (arguments["if"], arguments["then"], arguments["else"])
+    return evaluate(then) if _true(evaluate(condition)) else evaluate(otherwise)
+
+def _each(arguments, evaluate, each):
+    """Evaluate each item of the input of $filter or $map with the item as a variable"""
+    array = evaluate(arguments["input"])
+    if _null(array):
+        return None
+    return each(array, lambda item, expression: evaluate(expression, {arguments["as"]: item}))
+
+OPERATORS = {
+    "$literal": lambda arguments, evaluate: arguments,
+    "$let": lambda arguments, evaluate: evaluate(arguments["in"], {name: evaluate(value) for name, value in arguments["vars"].items()}),
+    "$filter": lambda arguments, evaluate: _each(arguments, evaluate, lambda array, item: [value for value in array if _true(item(value, arguments["cond"]))]),
+    "$map": lambda arguments, evaluate: _each(arguments, evaluate, lambda array, item: [item(value, arguments["in"]) for value in array]),
+    "$cond": _cond,
+    "$ifNull": _if_null,
+    "$eq": lambda arguments, evaluate: _equal(*map(evaluate, arguments)),
+    "$ne": lambda arguments, evaluate: not _equal(*map(evaluate, arguments)),
+    "$gt": lambda arguments, evaluate: evaluate(arguments[0]) > evaluate(arguments[1]),
+    "$not": lambda arguments, evaluate: not _true(evaluate(arguments[0])),
+    "$or": lambda arguments, evaluate: any(_true(evaluate(argument)) for argument in arguments),
+    "$size": lambda arguments, evaluate: len(evaluate(arguments)),
+    "$slice": lambda arguments, evaluate: _slice(*map(evaluate, arguments)),
+    "$arrayElemAt": lambda arguments, evaluate: (lambda array, index: None if _null(array) else array[index] if -len(array) <= index < len(array) else MISSING)(*map(evaluate, arguments)),
+    "$concatArrays": lambda arguments, evaluate: (lambda arrays: None if any(map(_null, arrays)) else [item for array in arrays for item in array])(list(map(evaluate, arguments))),
+    "$mergeObjects": lambda arguments, evaluate: {key: value for document in map(evaluate, arguments) if not _null(document) for key, value in document.items()}
+}
+
+def evaluate(expression, document, variables=None):
+    """Evaluate the aggregation expressions used by the service's update pipelines, as MongoDB does"""
+    variables = variables or {}
+    if isinstance(expression, str) and expression.startswith("$$"):
+        name, _, path = expression[2:].partition(".")
+        return MISSING if name == "REMOVE" else _field(variables[name], path)
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _field(document, expression[1:])
+    if isinstance(expression, list):
+        return [evaluate(item, document, variables) for item in expression]
+    if isinstance(expression, dict):
+        if len(expression) == 1 and next(iter(expression)).startswith("$"):
+            operator, arguments = next(iter(expression.items()))
+            return OPERATORS[operator](arguments, lambda argument, bound=None: evaluate(argument, document, {**variables, **(bound or {})}))
+        values = {name: evaluate(value, document, variables) for name, value in expression.items()}
+        return {name: value for name, value in values.items() if value is not MISSING}
+    return expression
+
+class PipelineCollection:
+    """A mongomock collection that also runs the update pipelines of find_one_and_update, which mongomock does not"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def find_one(self, match=None, projection=None, *args, **kwargs):
+        return self.collection.find_one(match, dict(projection) if projection != None else None, *args, **kwargs)
+
+    def find_one_and_update(self, match, update, projection=None, upsert=False, array_filters=None, return_document=None):
+        # mongomock adds _id to the projection it is given, which is shared by the service
+        projection = dict(projection) if projection != None else None
+        if not isinstance(update, list):
+            return self.collection.find_one_and_update(match, update, projection=projection, upsert=upsert, array_filters=array_filters, return_document=return_document)
+
+        document = self.collection.find_one(match)
+        if document == None:
+            return None
+        for stage in update:
+            values = {name: evaluate(value, document) for name, value in stage["$set"].items()}
+            document = copy.deepcopy(document)
+            for name, value in values.items():
+                *parents, field = name.split(".")
+                parent = document
+                for parent_name in parents:
+                    parent = parent.setdefault(parent_name, {})
+                if value is MISSING:
+                    parent.pop(field, None)
+                else:
+                    parent[field] = value
+        self.collection.replace_one({"_id": document["_id"]}, document)
+        return self.collection.find_one({"_id": document["_id"]}, projection)
+
+class PipelineDatabase:
+    """A mongomock database, with collections that run update pipelines"""
+
+    def __init__(self, database):
+        self.database = database
+
+    def __getattr__(self, name):
+        return getattr(self.database, name)
+
+    def get_collection(self, name, *args, **kwargs):
+        return PipelineCollection(self.database.get_collection(name))
+
+    def __getitem__(self, name):
+        return self.get_collection(name)
+
+class TestCurriculumPipelines(unittest.TestCase):
+    """
+    The assign and complete updates, before and after, run by the database at MONGO_CONNECTION_STRING. When there is
+    no database to connect to they are run against mongomock, with the update pipelines evaluated by this test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        config = MentorHub_Config.get_instance()
+        cls.client = MongoClient(config.MONGO_CONNECTION_STRING, serverSelectionTimeoutMS=1000)
+        cls.emulated = False
+        try:
+            cls.client.admin.command("ping")
+            cls.db = cls.client.get_database("curriculumPipelineTests")
+        except PyMongoError:
+            cls.client.close()
+            if mongomock == None:
+                raise unittest.SkipTest("No MongoDB or mongomock to run the update pipelines against")
+            cls.client = mongomock.MongoClient()
+            cls.db = PipelineDatabase(cls.client.get_database("curriculumPipelineTests"))
+            cls.emulated = True
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.drop_database(cls.db.name)
+        cls.client.close()
+
+    def setUp(self):
+        self.maxDiff = None
+        config = MentorHub_Config.get_instance()
+        self.collection = self.db.get_collection(config.CURRICULUM_COLLECTION_NAME)
+        self.collection.delete_many({})
+
+        # Run the service against the test database, with no paths stored by reference
+        mongo_io = MagicMock(connected=True, db=self.db)
+        patchers = [
+            patch('mentorhub_utils.MentorHubMongoIO.get_instance', return_value=mongo_io),
+            patch('src.services.curriculum_services.PathCache')
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # Setup Test Data
+        self.token = {"user_id":"ObjectID", "roles":["Staff"]}
+        self.breadcrumb = {"atTime":datetime.fromisoformat("2024-08-01T12:00:00"),"byUser":ObjectId("aaaa00000000000000000001"),"fromIp":"127.0.0.1","correlationId":"aaaa-aaaa-aaaa-aaaa"}
+        self.later = {**self.breadcrumb, "atTime": datetime.fromisoformat("2024-08-02T12:00:00")}
+
+    def insert(self, curriculum):
+        """Save a curriculum, indexed as the service indexes it"""
+        self.collection.insert_one({**curriculum, "resourceIndex": CurriculumService._build_index(curriculum.get("next", []))})
+
+    def saved(self):
+        return self.collection.find_one({"_id": ObjectId("aaaa00000000000000000001")})
+
+    def test_assign_resource_simple_success(self):
+        before_update = {"_id": ObjectId("aaaa00000000000000000001"), "completed": [], "later": [], "now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some.com/resource","description":"bar"}],"next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"},{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}]}]}]}],"lastSaved":self.breadcrumb}
+        expected_after = {"_id": ObjectId("aaaa00000000000000000001"), "completed": [], "later": [], "now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some.com/resource","description":"bar"},{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}],"next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"}]}]}]}],"lastSaved":self.later}
+        self.insert(before_update)
+
+        # Promote one of two resources, no containers removed
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://somevalidlink.22.com", self.token, self.later)
+        self.assertEqual(curriculum, expected_after)
+        self.assertEqual(self.saved()["resourceIndex"], CurriculumService._build_index(expected_after["next"]))
+
+    def test_assign_resource_cleaning_success(self):
+        before_update = {"_id": ObjectId("aaaa00000000000000000001"), "completed": [], "later": [], "now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","description":"test","link":"https://some.com/resource"}]}]}]}],"lastSaved":self.breadcrumb}
+        expected_after = {"_id": ObjectId("aaaa00000000000000000001"), "completed": [], "later": [], "now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"},{"name":"A one-off resource","link":"https://some.com/resource","description":"test"}],"next":[],"lastSaved":self.later}
+        self.insert(before_update)
+
+        # Promote one of one resources containers removed
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual(curriculum, expected_after)
+        self.assertEqual(self.saved()["resourceIndex"], {})
+
+    def test_assign_resource_removes_every_copy_in_the_topic(self):
+        resource = {"name":"A one-off resource","link":"https://some.com/resource","description":"test"}
+        self.insert({"_id": ObjectId("aaaa00000000000000000001"), "now": [], "next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[resource, {"name":"Other","link":"https://other.com"}, resource]}]}]}]})
+
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual(curriculum["now"], [resource])
+        self.assertEqual(curriculum["next"][0]["segments"][0]["topics"][0]["resources"], [{"name":"Other","link":"https://other.com"}])
+
+    def test_assign_resource_rebuilds_containers_with_the_same_names(self):
+        path = {"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","link":"https://some.com/resource","description":"test"}]}]}]}
+        other = {"path":"EngineerKit","segments":[{"segment":"Web","topics":[{"topic":"HTML","resources":[{"name":"Other","link":"https://other.com"}]}]}]}
+        self.insert({"_id": ObjectId("aaaa00000000000000000001"), "now": [], "next": [path, other, path]})
+
+        # Both copies of the path are emptied and pruned, leaving the other path as it was
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual(curriculum["now"], [{"name":"A one-off resource","link":"https://some.com/resource","description":"test"}])
+        self.assertEqual(curriculum["next"], [other])
+        self.assertEqual(self.saved()["resourceIndex"], CurriculumService._build_index([other]))
+
+    def test_assign_resource_shared_by_two_paths(self):
+        path = {"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","link":"https://some.com/resource","description":"test"},{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}]}]}]}
+        other = {"path":"EngineerKit","segments":[{"segment":"Web","topics":[{"topic":"HTML","resources":[{"name":"Shared","link":"https://some.com/resource"}]}]}]}
+        self.collection.insert_one({"_id": ObjectId("aaaa00000000000000000001"), "now": [], "next": [], "resourceIndex": {}})
+        paths = self.db.get_collection(MentorHub_Config.get_instance().PATHS_COLLECTION_NAME)
+        paths.delete_many({})
+        for path_id, added in [("cccc00000000000000000001", path), ("cccc00000000000000000002", other)]:
+            paths.insert_one({"_id": ObjectId(path_id), **added})
+            CurriculumService.add_path("aaaa00000000000000000001", path_id, self.token, self.breadcrumb)
+
+        # The resource is assigned from each path in turn
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual([path["path"] for path in curriculum["next"]], ["The Odin Project", "EngineerKit"])
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual([path["path"] for path in curriculum["next"]], ["The Odin Project"])
+        self.assertEqual([resource["link"] for resource in curriculum["now"]], ["https://some.com/resource", "https://some.com/resource"])
+        with self.assertRaises(ValueError):
+            CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual(self.saved()["resourceIndex"], CurriculumService._build_index(curriculum["next"]))
+
+    def test_assign_resource_with_a_stale_index(self):
+        curriculum = {"_id": ObjectId("aaaa00000000000000000001"), "now": [], "next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"Other","link":"https://other.com"}]}]}]}], "lastSaved": self.breadcrumb}
+        stale = CurriculumService._build_index([{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"link":"https://some.com/resource"}]}]}]}])
+        self.collection.insert_one({**curriculum, "resourceIndex": {**CurriculumService._build_index(curriculum["next"]), **stale}})
+
+        # An index entry for a resource that is no longer in Next is not found, and nothing is saved
+        with self.assertRaises(ValueError):
+            CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.later)
+        self.assertEqual(self.saved()["lastSaved"], self.breadcrumb)
+        self.assertEqual(self.saved()["next"], curriculum["next"])
+
+    def test_assign_resource_by_reference_marks_one_path(self):
+        if self.emulated:
+            self.skipTest("mongomock does not support the positional operator with $elemMatch")
+        resource = {"name":"A one-off resource","link":"https://some.com/resource","description":"test"}
+        reference = {"pathId": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "version": "v1", "removed": []}
+        self.collection.insert_one({"_id": ObjectId("aaaa00000000000000000001"), "now": [], "next": [reference, reference], "resourceIndex": {}})
+
+        # As with embedded paths, each assign takes the resource from one copy of the path
+        with patch('src.services.curriculum_services.PathCache') as mock_path_cache:
+            mock_path_cache.resources_with.return_value = [("cccc00000000000000000001", resource)]
+            for removed in [[["https://some.com/resource"], []], [["https://some.com/resource"], ["https://some.com/resource"]]]:
+                CurriculumService._assign_referenced("aaaa00000000000000000001", "https://some.com/resource", self.later)
+                self.assertEqual([path["removed"] for path in self.saved()["next"]], removed)
+            self.assertIsNone(CurriculumService._assign_referenced("aaaa00000000000000000001", "https://some.com/resource", self.later))
+        self.assertEqual(self.saved()["now"], [resource, resource])
+
+    @patch('src.services.curriculum_services.datetime')
+    def test_complete_resource_with_rating_success(self, mock_datetime):
+        before_update = {"_id":ObjectId("aaaa00000000000000000001"),"next":[],"later":[],"completed":[],"now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.breadcrumb}
+        expected_after = {"_id":ObjectId("aaaa00000000000000000001"),"next":[],"later":[],"completed":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00"),"completed":datetime.fromisoformat("2024-01-01T12:34:56"),"rating":4,"review":"Nice"}],"now":[{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.later}
+        self.insert(before_update)
+        mock_datetime.now.return_value = datetime.fromisoformat("2024-01-01T12:34:56")
+
+        curriculum = CurriculumService.complete_resource("aaaa00000000000000000001", "https://somevalidlink.35.com", {"rating": 4, "review": "Nice"}, self.token, self.later)
+        self.assertEqual(curriculum, expected_after)
+
+    @patch('src.services.curriculum_services.datetime')
+    def test_complete_resource_without_rating_success(self, mock_datetime):
+        before_update = {"_id":ObjectId("aaaa00000000000000000001"),"next":[],"later":[],"completed":[],"now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.breadcrumb}
+        expected_after = {"_id":ObjectId("aaaa00000000000000000001"),"next":[],"later":[],"completed":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00"),"completed":datetime.fromisoformat("2024-01-01T12:34:56")}],"now":[{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.later}
+        self.insert(before_update)
+        mock_datetime.now.return_value = datetime.fromisoformat("2024-01-01T12:34:56")
+
+        curriculum = CurriculumService.complete_resource("aaaa00000000000000000001", "https://somevalidlink.35.com", {}, self.token, self.later)
+        self.assertEqual(curriculum, expected_after)
+
+    def test_complete_resource_not_found(self):
+        self.insert({"_id":ObjectId("aaaa00000000000000000001"),"now":[],"completed":[]})
+        with self.assertRaises(ValueError):
+            CurriculumService.complete_resource("aaaa00000000000000000001", "https://somevalidlink.35.com", {}, self.token, self.later)
+        self.assertEqual(self.saved()["completed"], [])
+
+if __name__ == '__main__':
+    unittest.main()
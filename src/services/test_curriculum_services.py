@@ -4,8 +4,9 @@ import unittest
 from unittest.mock import MagicMock, patch
 
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from mentorhub_utils import MentorHub_Config
-from src.services.curriculum_services import CurriculumService
+from src.services.curriculum_services import CurriculumService, PreconditionFailed, UpdateConflict
 
 class TestCurriculumService(unittest.TestCase):
     
@@ -15,28 +16,32 @@ class TestCurriculumService(unittest.TestCase):
         # Setup Test Data
         self.token = {"user_id":"ObjectID", "roles":["Staff"]}
         self.breadcrumb = {"atTime":datetime.fromisoformat("2024-08-01T12:00:00"),"byUser":ObjectId("aaaa00000000000000000001"),"fromIp":"127.0.0.1","correlationId":"aaaa-aaaa-aaaa-aaaa"}
+        self.new_curriculum = {"$setOnInsert": {"lastSaved": self.breadcrumb, "resourceIndex": {}}}
+        self.path = {"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"},{"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"}]}]}]}
         
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_token_staff(self, mock_get_instance):
+    def test_token_staff(self, mock_get_instance, mock_mongo_io_class):
         config = MentorHub_Config.get_instance()
         mock_mongo_io = MagicMock()
         mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = {"foo": "bar"}
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
         
         curriculum = CurriculumService.get_or_create_curriculum("curriculum_id", self.token, self.breadcrumb)
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "curriculum_id")
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "curriculum_id", self.new_curriculum, projection={"resourceIndex": 0}, upsert=True)
         self.assertEqual(curriculum, {"foo": "bar"})
 
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_token_member_pass(self, mock_get_instance):
+    def test_token_member_pass(self, mock_get_instance, mock_mongo_io_class):
         config = MentorHub_Config.get_instance()
         token = {"user_id":"000000000000000000000000", "roles":["Member"]}
         mock_mongo_io = MagicMock()
         mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = {"foo": "bar"}
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
 
         curriculum = CurriculumService.get_or_create_curriculum("000000000000000000000000", token, self.breadcrumb)
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000")
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000", self.new_curriculum, projection={"resourceIndex": 0}, upsert=True)
         self.assertEqual(curriculum, {"foo": "bar"})
 
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
@@ -49,85 +54,172 @@ class TestCurriculumService(unittest.TestCase):
         with self.assertRaises(Exception) as context:
             CurriculumService.get_or_create_curriculum("", {}, {})
 
+    @patch('src.services.curriculum_services.MentorCache')
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_token_mentor_pass(self, mock_get_instance):
+    def test_token_mentor_pass(self, mock_get_instance, mock_mongo_io_class, mock_mentor_cache):
         config = MentorHub_Config.get_instance()
         token = {"user_id":"000000000000000000000012", "roles":["Mentor"]}
         mock_mongo_io = MagicMock()
         mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.side_effect = [
-            {"mentorId": "000000000000000000000012"},
-            {"foo": "bar"}
-        ]
+        mock_mentor_cache.get_mentor_id.return_value = "000000000000000000000012"
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
 
         curriculum = CurriculumService.get_or_create_curriculum("000000000000000000000000", token, self.breadcrumb)
-        mock_mongo_io.get_document.assert_has_calls([
-            unittest.mock.call(config.PEOPLE_COLLECTION_NAME, "000000000000000000000000"),
-            unittest.mock.call(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000")
-        ])
+        mock_mentor_cache.get_mentor_id.assert_called_once_with("000000000000000000000000")
+        mock_mongo_io.get_document.assert_not_called()
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000", self.new_curriculum, projection={"resourceIndex": 0}, upsert=True)
         self.assertEqual(curriculum, {"foo": "bar"})
 
+    @patch('src.services.curriculum_services.MentorCache')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_token_mentor_fail(self, mock_get_instance):
+    def test_token_mentor_fail(self, mock_get_instance, mock_mentor_cache):
         token = {"user_id":"000000000000000000000012", "roles":["Mentor"]}
         mock_mongo_io = MagicMock()
         mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = {"mentorId": "000000000000000000001234"}
+        mock_mentor_cache.get_mentor_id.return_value = "000000000000000000001234"
 
         with self.assertRaises(Exception) as context:
-            CurriculumService.get_or_create_curriculum("", {}, {})
+            CurriculumService.get_or_create_curriculum("000000000000000000000000", token, self.breadcrumb)
+        self.assertEqual(str(context.exception), "Access Denied")
 
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_get_or_create_curriculum_new_success(self, mock_get_instance):
+    def test_get_or_create_curriculum_success(self, mock_get_instance, mock_mongo_io_class):
         config = MentorHub_Config.get_instance()
         return_curriculum = {"_id":ObjectId("aaaa00000000000000000999"),"completed":[],"now":[],"next":[],"later":[],"lastSaved":self.breadcrumb}
         mock_mongo_io = MagicMock()
         mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.side_effect = [None, return_curriculum]
-        mock_mongo_io.create_document.return_value = {}
+        mock_mongo_io_class.find_one_and_update.return_value = return_curriculum
         
         # Call get_or_create_curriculum and test results
         curriculum = CurriculumService.get_or_create_curriculum("000000000000000000000000", self.token, self.breadcrumb)
         
-        # Assert new document and downstream calls
+        # Assert a single upsert, that only sets values on insert
         self.assertEqual(curriculum, return_curriculum)
-        mock_mongo_io.create_document.assert_called_once_with(
-            config.CURRICULUM_COLLECTION_NAME, {
-                "_id": ObjectId("000000000000000000000000"),
-                "lastSaved": self.breadcrumb
-            }
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(
+            config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000", {
+                "$setOnInsert": {
+                    "lastSaved": self.breadcrumb,
+                    "resourceIndex": {}
+                }
+            }, projection={"resourceIndex": 0}, upsert=True
         )
-        
-        mock_mongo_io.get_document.assert_has_calls([
-            unittest.mock.call(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000"),
-            unittest.mock.call(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000")
-        ])
+        mock_mongo_io.get_document.assert_not_called()
+        mock_mongo_io.create_document.assert_not_called()
             
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_get_or_create_curriculum_existing_success(self, mock_get_instance):
-        config = MentorHub_Config.get_instance()
-        return_curriculum = {"_id":ObjectId("aaaa00000000000000000999"),"completed":[],"now":[],"next":[],"later":[],"lastSaved":self.breadcrumb}
-        mock_mongo_io = MagicMock()
-        mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = return_curriculum
-        
-        # Call get_or_create_curriculum and test results
+    def test_get_or_create_curriculum_concurrent_insert(self, mock_get_instance, mock_mongo_io_class):
+        return_curriculum = {"_id":ObjectId("aaaa00000000000000000999"),"lastSaved":self.breadcrumb}
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.find_one_and_update.side_effect = [DuplicateKeyError("E11000"), return_curriculum]
+
+        # The losing upsert of a race is retried, and finds the winning document
         curriculum = CurriculumService.get_or_create_curriculum("000000000000000000000000", self.token, self.breadcrumb)
-        
-        # Assert new document and downstream calls
         self.assertEqual(curriculum, return_curriculum)
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "000000000000000000000000")
-            
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_count, 2)
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_or_create_curriculum_fields(self, mock_get_instance, mock_mongo_io_class):
+        config = MentorHub_Config.get_instance()
+        mock_mongo_io_class.find_one_and_update.return_value = {"now": []}
+
+        # Only now is read, with lastSaved for the etag, and never the index
+        curriculum = CurriculumService.get_or_create_curriculum("aaaa00000000000000000001", self.token, self.breadcrumb, ["now", "resourceIndex", "$where"])
+        self.assertEqual(curriculum, {"now": []})
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", self.new_curriculum, projection={"now": 1, "lastSaved": 1}, upsert=True)
+
+    def test_projection(self):
+        self.assertEqual(CurriculumService._projection(), {"resourceIndex": 0})
+        self.assertEqual(CurriculumService._projection(None, 10, 20), {"resourceIndex": 0, "completed": {"$slice": [20, 10]}})
+        self.assertEqual(CurriculumService._projection(["now", "completed"], 10), {"now": 1, "completed": {"$slice": [0, 10]}, "lastSaved": 1})
+        self.assertEqual(CurriculumService._projection(["now"], 10), {"now": 1, "lastSaved": 1})
+        self.assertEqual(CurriculumService._projection(["resourceIndex.abc", "next.path"]), {"next.path": 1, "lastSaved": 1})
+
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_update_curriculum_success(self, mock_get_instance):
+    def test_update_curriculum_success(self, mock_get_instance, mock_mongo_io_class):
         config = MentorHub_Config.get_instance()
         return_curriculum = {"_id":ObjectId("aaaa00000000000000000999"),"completed":[],"now":[],"next":[],"later":[],"lastSaved":self.breadcrumb}
-        mock_mongo_io = MagicMock()
-        mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = return_curriculum
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.find_one_and_update.return_value = return_curriculum
 
         curriculum = CurriculumService.update_curriculum("aaaa00000000000000000001", {"now": []}, self.token, self.breadcrumb)
-        mock_mongo_io.update_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001",{"now": [], "lastSaved": self.breadcrumb})
+        self.assertEqual(curriculum, return_curriculum)
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {"$set": {"now": [], "lastSaved": self.breadcrumb}}, None, {"resourceIndex": 0})
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_update_curriculum_next_reindexed(self, mock_get_instance, mock_mongo_io_class):
+        config = MentorHub_Config.get_instance()
+        paths = [self.path]
+        mock_get_instance.return_value = MagicMock()
+
+        CurriculumService.update_curriculum("aaaa00000000000000000001", {"next": paths}, self.token, self.breadcrumb)
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {"$set": {
+            "next": paths, 
+            "lastSaved": self.breadcrumb, 
+            "resourceIndex": CurriculumService._build_index(paths)
+        }}, None, {"resourceIndex": 0})
+
+    def test_etag(self):
+        etag = CurriculumService.etag({"lastSaved": self.breadcrumb, "now": []})
+        self.assertEqual(etag, CurriculumService.etag({"lastSaved": dict(self.breadcrumb), "now": [{"foo": "bar"}]}))
+        self.assertNotEqual(etag, CurriculumService.etag({"lastSaved": {**self.breadcrumb, "correlationId": "bbbb"}}))
+        self.assertEqual(len(etag), 32)
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.CurriculumConfig.get_instance')
+    def test_etag_by_reference(self, mock_config, mock_path_cache):
+        mock_config.return_value.NEXT_STORAGE_MODE = "reference"
+
+        # The tag depends only on the stored curriculum, never on the catalog a worker has cached
+        etag = CurriculumService.etag({"lastSaved": self.breadcrumb})
+        self.assertEqual(etag, CurriculumService.etag({"lastSaved": self.breadcrumb}))
+        mock_path_cache.assert_not_called()
+        self.assertEqual(mock_path_cache.method_calls, [])
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_etag(self, mock_get_instance, mock_mongo_io_class):
+        config = MentorHub_Config.get_instance()
+        mock_mongo_io_class.get_document.return_value = {"_id": ObjectId("aaaa00000000000000000001"), "lastSaved": self.breadcrumb}
+
+        etag = CurriculumService.get_etag("aaaa00000000000000000001", self.token)
+        self.assertEqual(etag, CurriculumService.etag({"lastSaved": self.breadcrumb}))
+        mock_mongo_io_class.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {"lastSaved": 1}, primary=True)
+
+        mock_mongo_io_class.get_document.return_value = None
+        self.assertIsNone(CurriculumService.get_etag("aaaa00000000000000000001", self.token))
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_update_curriculum_if_match(self, mock_get_instance, mock_mongo_io_class):
+        config = MentorHub_Config.get_instance()
+        etag = CurriculumService.etag({"lastSaved": self.breadcrumb})
+        mock_mongo_io_class.get_document.return_value = {"lastSaved": self.breadcrumb}
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
+
+        # The write only matches the version that was checked
+        curriculum = CurriculumService.update_curriculum("aaaa00000000000000000001", {"now": []}, self.token, {"atTime": "later"}, {etag})
+        self.assertEqual(curriculum, {"foo": "bar"})
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {"$set": {"now": [], "lastSaved": {"atTime": "later"}}}, {"lastSaved": self.breadcrumb}, {"resourceIndex": 0})
+
+        # Changed since it was checked
+        mock_mongo_io_class.find_one_and_update.return_value = None
+        with self.assertRaises(PreconditionFailed):
+            CurriculumService.update_curriculum("aaaa00000000000000000001", {"now": []}, self.token, self.breadcrumb, {etag})
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_update_curriculum_precondition_failed(self, mock_get_instance, mock_mongo_io_class):
+        mock_mongo_io_class.get_document.return_value = {"lastSaved": self.breadcrumb}
+
+        with self.assertRaises(PreconditionFailed):
+            CurriculumService.update_curriculum("aaaa00000000000000000001", {"now": []}, self.token, self.breadcrumb, {"stale"})
+        mock_mongo_io_class.find_one_and_update.assert_not_called()
 
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
     def test_delete_curriculum_success(self, mock_get_instance):
@@ -139,58 +231,106 @@ class TestCurriculumService(unittest.TestCase):
         curriculum = CurriculumService.delete_curriculum("aaaa00000000000000000001", self.token)
         mock_mongo_io.delete_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001")
 
+    def test_build_index(self):
+        index = CurriculumService._build_index([self.path])
+        self.assertEqual(index, {
+            CurriculumService._index_key("https://somevalidlink.22.com"): [{"path": "The Odin Project", "segment": "Intermediate HTML and CSS", "topic": "Intermediate HTML"}],
+            CurriculumService._index_key("https://some.com/resource"): [{"path": "The Odin Project", "segment": "Intermediate HTML and CSS", "topic": "Intermediate HTML"}]
+        })
+        self.assertEqual(len(CurriculumService._index_key("https://some.com/resource")), 16)
+
+    def test_build_index_shared_link(self):
+        other = {"path": "EngineerKit", "segments": [{"segment": "Web", "topics": [{"topic": "HTML", "resources": [{"link": "https://some.com/resource"}]}]}]}
+        index = CurriculumService._build_index([self.path, other, self.path])
+
+        # Every location of a link is kept, once
+        self.assertEqual(index[CurriculumService._index_key("https://some.com/resource")], [
+            {"path": "The Odin Project", "segment": "Intermediate HTML and CSS", "topic": "Intermediate HTML"},
+            {"path": "EngineerKit", "segment": "Web", "topic": "HTML"}
+        ])
+
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_assign_resource_simple_success(self, mock_get_instance):
+    def test_assign_resource_success(self, mock_get_instance, mock_mongo_io_class):
         # Setup test data
         config = MentorHub_Config.get_instance()
-        before_update = {"_id": ObjectId("aaaa00000000000000000001"), "completed": [], "later": [], "now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some.com/resource","description":"bar"}],"next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"},{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}]}]}]}],"lastSaved":self.breadcrumb}
-        expected_after = {"now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some.com/resource","description":"bar"},{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}],"next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"}]}]}]}],"lastSaved":self.breadcrumb}
-        
-        # Mock the MongoIO methods
         mock_mongo_io = MagicMock()
         mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = before_update
-        mock_mongo_io.update_document.return_value = {"foo":"bar"}
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo":"bar"}
+        key = CurriculumService._index_key("https://somevalidlink.22.com")
 
-        # Promote one of two resources, no containers removed
+        # Promote the resource with a single atomic update
         curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://somevalidlink.22.com", self.token, self.breadcrumb)
         self.assertEqual(curriculum, {"foo":"bar"})
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001")
-        mock_mongo_io.update_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", expected_after)
+        mock_mongo_io.get_document.assert_not_called()
+        mock_mongo_io.update_document.assert_not_called()
+        mock_mongo_io_class.get_document.assert_not_called()
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(
+            config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001",
+            CurriculumService._assign_pipeline("https://somevalidlink.22.com", self.breadcrumb),
+            {f"resourceIndex.{key}": {"$exists": True}, "next.segments.topics.resources.link": "https://somevalidlink.22.com"},
+            {"resourceIndex": 0}
+        )
 
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_assign_resource_cleaning_success(self, mock_get_instance):
-        # Setup test data
+    def test_assign_resource_not_found(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_path_cache.resources_with.return_value = []
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.find_one_and_update.return_value = None
+        mock_mongo_io_class.get_document.return_value = {"next": [], "resourceIndex": {}}
+
+        with self.assertRaises(ValueError):
+            CurriculumService.assign_resource("aaaa00000000000000000001", "https://not.found.com", self.token, self.breadcrumb)
+        mock_mongo_io_class.find_one_and_update.assert_called_once()
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_assign_resource_builds_missing_index(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_path_cache.resources_with.return_value = []
         config = MentorHub_Config.get_instance()
-        before_update = {"_id": ObjectId("aaaa00000000000000000001"), "completed": [], "later": [], "now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"next":[{"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"A one-off resource","description":"test","link":"https://some.com/resource"}]}]}]}],"lastSaved":self.breadcrumb}
-        expected_after = {"now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"},{"name":"A one-off resource","description":"test","link":"https://some.com/resource"}],"next":[],"lastSaved":self.breadcrumb}
-        
-        # Mock the MongoIO methods
-        mock_mongo_io = MagicMock()
-        mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = before_update
-        mock_mongo_io.update_document.return_value = {"foo":"bar"}
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.find_one_and_update.side_effect = [None, {}, {"foo": "bar"}]
+        mock_mongo_io_class.get_document.return_value = {"next": [self.path]}
 
-        # Promote one of one resources containers removed
-        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://some.com/resource", self.token, self.breadcrumb)
-        self.assertEqual(curriculum, {"foo":"bar"})
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001")
-        mock_mongo_io.update_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", expected_after)
+        # A curriculum saved before indexing is indexed, then the assign is retried
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", "https://somevalidlink.22.com", self.token, self.breadcrumb)
+        self.assertEqual(curriculum, {"foo": "bar"})
+        mock_mongo_io_class.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {"next": 1, "resourceIndex": 1}, primary=True)
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args_list[1], unittest.mock.call(
+            config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001",
+            {"$set": {"resourceIndex": CurriculumService._build_index([self.path])}},
+            {"resourceIndex": {"$exists": False}}
+        ))
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_count, 3)
+
+    def test_assign_pipeline(self):
+        key = CurriculumService._index_key("https://somevalidlink.22.com")
+        pipeline = CurriculumService._assign_pipeline("https://somevalidlink.22.com", self.breadcrumb)
+
+        # Now and Next are rebuilt at the first location, the breadcrumb set, and the first location dropped
+        self.assertEqual(len(pipeline), 1)
+        self.assertEqual(list(pipeline[0]["$set"].keys()), ["now", "next", "lastSaved", f"resourceIndex.{key}"])
+        self.assertEqual(pipeline[0]["$set"]["lastSaved"], {"$literal": self.breadcrumb})
+        self.assertEqual(pipeline[0]["$set"]["next"]["$let"]["vars"], {"location": {"$arrayElemAt": [f"$resourceIndex.{key}", 0]}})
+        self.assertEqual(pipeline[0]["$set"][f"resourceIndex.{key}"], {"$cond": [
+            {"$gt": [{"$size": f"$resourceIndex.{key}"}, 1]},
+            {"$slice": [f"$resourceIndex.{key}", 1, {"$size": f"$resourceIndex.{key}"}]},
+            "$$REMOVE"
+        ]})
 
     @patch('src.services.curriculum_services.datetime')
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_complete_resource_with_rating_success(self, mock_get_instance, mock_datetime):
+    def test_complete_resource_with_rating_success(self, mock_get_instance, mock_mongo_io_class, mock_datetime):
         # Setup test data
         config = MentorHub_Config.get_instance()
-        before_update = {"_id":ObjectId("aaaa00000000000000000001"),"next":[],"later":[],"completed":[],"now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.breadcrumb}
-        expected_after = {"completed":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00"),"completed":datetime.fromisoformat("2024-01-01T12:34:56"),"rating":4,"review":"Nice"}],"now":[{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.breadcrumb}
-
-        # Mock the MongoIO methods
-        mock_mongo_io = MagicMock()
-        mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = before_update.copy()
-        mock_mongo_io.update_document.return_value = {"foo": "bar"}
-        mock_datetime.now.return_value = datetime.fromisoformat("2024-01-01T12:34:56")
+        completed = datetime.fromisoformat("2024-01-01T12:34:56")
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
+        mock_datetime.now.return_value = completed
 
         # Call complete_resource
         curriculum = CurriculumService.complete_resource(
@@ -203,53 +343,339 @@ class TestCurriculumService(unittest.TestCase):
 
         # Assertions
         self.assertEqual(curriculum, {"foo": "bar"})
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001")
-        mock_mongo_io.update_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", expected_after)
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(
+            config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001",
+            CurriculumService._complete_pipeline("https://somevalidlink.35.com", {"rating": 4, "review": "Nice"}, completed, self.breadcrumb),
+            {"now.link": "https://somevalidlink.35.com"},
+            {"resourceIndex": 0}
+        )
     
-    @patch('src.services.curriculum_services.datetime')
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_complete_resource_without_rating_success(self, mock_get_instance, mock_datetime):
-        # Setup test data
-        config = MentorHub_Config.get_instance()
-        before_update = {"_id":ObjectId("aaaa00000000000000000001"),"next":[],"later":[],"completed":[],"now":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00")},{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.breadcrumb}
-        expected_after = {"completed":[{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","started":datetime.fromisoformat("2024-07-15T13:00:00"),"completed":datetime.fromisoformat("2024-01-01T12:34:56")}],"now":[{"name":"Some Unique Resource","link":"https://some-other.com/resource","description":"bar"}],"lastSaved":self.breadcrumb}
+    def test_complete_resource_not_found(self, mock_get_instance, mock_mongo_io_class):
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.find_one_and_update.return_value = None
 
-        # Mock the MongoIO methods
-        mock_mongo_io = MagicMock()
-        mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.return_value = before_update.copy()
-        mock_mongo_io.update_document.return_value = {"foo": "bar"}
-        mock_datetime.now.return_value = datetime.fromisoformat("2024-01-01T12:34:56")
+        with self.assertRaises(ValueError):
+            CurriculumService.complete_resource("aaaa00000000000000000001", "https://not.found.com", {}, self.token, self.breadcrumb)
 
-        # Call complete_resource
-        curriculum = CurriculumService.complete_resource("aaaa00000000000000000001", "https://somevalidlink.35.com", {}, self.token, self.breadcrumb)
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_assign_resource_if_match(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_path_cache.resources_with.return_value = []
+        etag = CurriculumService.etag({"lastSaved": self.breadcrumb})
+        mock_mongo_io_class.get_document.side_effect = [{"lastSaved": self.breadcrumb}, {"resourceIndex": {}}, {"lastSaved": {"atTime": "later"}}]
+        mock_mongo_io_class.find_one_and_update.return_value = None
+        key = CurriculumService._index_key("https://somevalidlink.22.com")
 
-        # Assertions
+        # A save between the check and the write is reported as a conflict, not a missing resource
+        with self.assertRaises(PreconditionFailed):
+            CurriculumService.assign_resource("aaaa00000000000000000001", "https://somevalidlink.22.com", self.token, self.breadcrumb, {etag})
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args[0][3], {f"resourceIndex.{key}": {"$exists": True}, "next.segments.topics.resources.link": "https://somevalidlink.22.com", "lastSaved": self.breadcrumb})
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_complete_resource_if_match(self, mock_get_instance, mock_mongo_io_class):
+        etag = CurriculumService.etag({"lastSaved": self.breadcrumb})
+        mock_mongo_io_class.get_document.return_value = {"lastSaved": self.breadcrumb}
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
+
+        curriculum = CurriculumService.complete_resource("aaaa00000000000000000001", "https://somevalidlink.35.com", {}, self.token, self.breadcrumb, {etag})
         self.assertEqual(curriculum, {"foo": "bar"})
-        mock_mongo_io.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001")
-        mock_mongo_io.update_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", expected_after)
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args[0][3], {"now.link": "https://somevalidlink.35.com", "lastSaved": self.breadcrumb})
+
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_mutations_delta(self, mock_get_instance, mock_mongo_io_class):
+        mock_mongo_io_class.find_one_and_update.return_value = {"now": []}
+
+        # Only the changed sections are returned, with lastSaved for the etag
+        CurriculumService.assign_resource("aaaa00000000000000000001", "https://somevalidlink.22.com", self.token, self.breadcrumb, delta=True)
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args[0][4], {"now": 1, "next": 1, "lastSaved": 1})
+        CurriculumService.complete_resource("aaaa00000000000000000001", "https://somevalidlink.35.com", {}, self.token, self.breadcrumb, delta=True)
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args[0][4], {"now": 1, "completed": 1, "lastSaved": 1})
+        CurriculumService.update_curriculum("aaaa00000000000000000001", {"later": []}, self.token, self.breadcrumb, delta=True)
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args[0][4], {"later": 1, "lastSaved": 1})
+        CurriculumService.update_curriculum("aaaa00000000000000000001", {"next": []}, self.token, self.breadcrumb, delta=True)
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_args[0][4], {"next": 1, "lastSaved": 1})
 
+    def test_complete_pipeline(self):
+        completed = datetime.fromisoformat("2024-01-01T12:34:56")
+        pipeline = CurriculumService._complete_pipeline("https://somevalidlink.35.com", {}, completed, self.breadcrumb)
+
+        self.assertEqual(len(pipeline), 1)
+        self.assertEqual(list(pipeline[0]["$set"].keys()), ["completed", "now", "lastSaved"])
+        self.assertEqual(pipeline[0]["$set"]["lastSaved"], {"$literal": self.breadcrumb})
+        self.assertIn("{'completed': {'$literal': datetime.datetime(2024, 1, 1, 12, 34, 56)}}, {'$literal': {}}", str(pipeline))
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
-    def test_add_path_success(self, mock_get_instance):
+    def test_add_path_success(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
         # Setup Test Data
         config = MentorHub_Config.get_instance()
-        curriculum = {"_id": "", "completed": [], "now": [], "next": [], "later": []}
-        path = {"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"},{"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"}]}]}]}
-        expected_update = {"next":[path], "lastSaved":self.breadcrumb}
+        expected_update = {
+            "$push": {"next": self.path},
+            "$addToSet": {f"resourceIndex.{key}": {"$each": locations} for key, locations in CurriculumService._build_index([self.path]).items()},
+            "$set": {"lastSaved": self.breadcrumb}
+        }
         
         # Mock the MongoIO methods
-        mock_mongo_io = MagicMock()
-        mock_get_instance.return_value = mock_mongo_io
-        mock_mongo_io.get_document.side_effect = [curriculum,path]
-        mock_mongo_io.update_document.return_value = {"foo":"bar"}
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.get_document.return_value = self.path
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo":"bar"}
         
+        # An embedded path is read as it is now, not from the catalog cache
         curriculum = CurriculumService.add_path("aaaa00000000000000000001", "cccc00000000000000000001", self.token, self.breadcrumb)
         self.assertEqual(curriculum, {"foo":"bar"})
-        mock_mongo_io.update_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", expected_update)
-        mock_mongo_io.get_document.assert_has_calls([
-            unittest.mock.call(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001"),
-            unittest.mock.call(config.PATHS_COLLECTION_NAME, "cccc00000000000000000001")
+        mock_mongo_io_class.get_document.assert_called_once_with(config.PATHS_COLLECTION_NAME, "cccc00000000000000000001", primary=True)
+        mock_path_cache.get.assert_not_called()
+        mock_path_cache.load.assert_not_called()
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(
+            config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", expected_update, {"resourceIndex": {"$exists": True}}, {"resourceIndex": 0}
+        )
+
+    @patch('src.services.curriculum_services.CurriculumConfig.get_instance')
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_add_path_by_reference_success(self, mock_get_instance, mock_mongo_io_class, mock_path_cache, mock_config):
+        config = MentorHub_Config.get_instance()
+        mock_get_instance.return_value = MagicMock()
+        mock_config.return_value = MagicMock(NEXT_STORAGE_MODE="reference")
+        mock_path_cache.get.return_value = {"path": self.path, "version": "v1", "resources": {}}
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo":"bar"}
+
+        # Only a reference to the path is stored
+        curriculum = CurriculumService.add_path("aaaa00000000000000000001", "cccc00000000000000000001", self.token, self.breadcrumb)
+        self.assertEqual(curriculum, {"foo":"bar"})
+        mock_mongo_io_class.find_one_and_update.assert_called_once_with(
+            config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {
+                "$push": {"next": {"pathId": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "version": "v1", "removed": []}},
+                "$set": {"lastSaved": self.breadcrumb}
+            }, projection={"resourceIndex": 0}
+        )
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_add_path_not_found(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_get_instance.return_value = MagicMock()
+        mock_mongo_io_class.get_document.return_value = None
+
+        with self.assertRaises(ValueError):
+            CurriculumService.add_path("aaaa00000000000000000001", "cccc00000000000000000001", self.token, self.breadcrumb)
+        mock_mongo_io_class.find_one_and_update.assert_not_called()
+
+    @patch('src.services.curriculum_services.CurriculumConfig.get_instance')
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_add_path_by_reference_not_found(self, mock_get_instance, mock_mongo_io_class, mock_path_cache, mock_config):
+        mock_get_instance.return_value = MagicMock()
+        mock_config.return_value = MagicMock(NEXT_STORAGE_MODE="reference")
+        mock_path_cache.get.return_value = None
+        mock_path_cache.load.return_value = None
+
+        # Only the missing path is read, before it is reported missing
+        with self.assertRaises(ValueError):
+            CurriculumService.add_path("aaaa00000000000000000001", "cccc00000000000000000001", self.token, self.breadcrumb)
+        mock_path_cache.load.assert_called_once_with("cccc00000000000000000001")
+        mock_path_cache.invalidate.assert_not_called()
+        mock_mongo_io_class.find_one_and_update.assert_not_called()
+
+    @patch('src.services.curriculum_services.CurriculumConfig.get_instance')
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_assign_resource_by_reference_success(self, mock_get_instance, mock_mongo_io_class, mock_path_cache, mock_config):
+        config = MentorHub_Config.get_instance()
+        link = "https://somevalidlink.22.com"
+        mock_get_instance.return_value = MagicMock()
+        mock_config.return_value = MagicMock(NEXT_STORAGE_MODE="reference")
+        resource = {"name":"Howdocomputersreadcode?V","link":link,"description":"test-it1","tags":["Video"]}
+        mock_path_cache.resources_with.return_value = [("cccc00000000000000000001", resource), ("cccc00000000000000000002", resource)]
+        mock_mongo_io_class.find_one_and_update.side_effect = [None, {"now": []}]
+
+        # Only the first referenced path that still has the link records it as removed, one atomic update per path tried
+        curriculum = CurriculumService.assign_resource("aaaa00000000000000000001", link, self.token, self.breadcrumb)
+        self.assertEqual(curriculum, {"now": []})
+        self.assertEqual(mock_mongo_io_class.find_one_and_update.call_count, 2)
+        mock_mongo_io_class.find_one_and_update.assert_called_with(
+            config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", {
+                "$push": {"now": {"name":"Howdocomputersreadcode?V","link":link,"description":"test-it1"}},
+                "$addToSet": {"next.$.removed": link},
+                "$set": {"lastSaved": self.breadcrumb}
+            },
+            {"next": {"$elemMatch": {"pathId": ObjectId("cccc00000000000000000002"), "removed": {"$ne": link}}}},
+            {"resourceIndex": 0}
+        )
+        mock_path_cache.get.assert_not_called()
+
+    @patch('src.services.curriculum_services.PathCache')
+    def test_hydrate(self, mock_path_cache):
+        mock_path_cache.get.side_effect = lambda path_id: {"path": self.path, "version": "v1"} if path_id == ObjectId("cccc00000000000000000001") else None
+        embedded = {"path": "Embedded", "segments": []}
+        curriculum = {"now": [], "next": [
+            embedded,
+            {"pathId": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "version": "v1", "removed": []},
+            {"pathId": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "version": "v1", "removed": ["https://some.com/resource"]},
+            {"pathId": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "version": "v1", "removed": ["https://some.com/resource", "https://somevalidlink.22.com"]},
+            {"pathId": ObjectId("cccc00000000000000000002"), "path": "Deleted", "version": "v1", "removed": []}
+        ]}
+
+        # Embedded paths are untouched, removed resources and emptied or missing paths are dropped
+        hydrated = CurriculumService._hydrate(curriculum)
+        self.assertEqual(hydrated["next"], [
+            embedded,
+            self.path,
+            {"path":"The Odin Project","segments":[{"segment":"Intermediate HTML and CSS","topics":[{"topic":"Intermediate HTML","resources":[{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}]}]}]}
         ])
+        self.assertEqual(len(self.path["segments"][0]["topics"][0]["resources"]), 2)
+
+    @patch('src.services.curriculum_services.PathCache')
+    def test_apply_assign_embedded(self, mock_path_cache):
+        mock_path_cache.resources_with.return_value = []
+        curriculum = {"now": [], "next": [copy.deepcopy(self.path)], "resourceIndex": CurriculumService._build_index([self.path])}
+
+        # Assigning both resources empties and prunes the path
+        self.assertTrue(CurriculumService._apply_assign(curriculum, "https://somevalidlink.22.com"))
+        self.assertEqual(len(curriculum["next"][0]["segments"][0]["topics"][0]["resources"]), 1)
+        self.assertTrue(CurriculumService._apply_assign(curriculum, "https://some.com/resource"))
+        self.assertEqual(curriculum["next"], [])
+        self.assertEqual(curriculum["resourceIndex"], {})
+        self.assertEqual(curriculum["now"], [
+            {"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"},
+            {"name":"A one-off resource","link":"https://some.com/resource","description":"test-it2"}
+        ])
+        self.assertFalse(CurriculumService._apply_assign(curriculum, "https://some.com/resource"))
+
+    @patch('src.services.curriculum_services.PathCache')
+    def test_apply_assign_shared_link(self, mock_path_cache):
+        mock_path_cache.resources_with.return_value = []
+        other = {"path": "EngineerKit", "segments": [{"segment": "Web", "topics": [{"topic": "HTML", "resources": [{"name": "Shared", "link": "https://some.com/resource"}]}]}]}
+        curriculum = {"now": [], "next": [copy.deepcopy(self.path), copy.deepcopy(other)], "resourceIndex": CurriculumService._build_index([self.path, other])}
+
+        # A link in two paths is assigned from each in turn, pruning the second path when it is emptied
+        self.assertTrue(CurriculumService._apply_assign(curriculum, "https://some.com/resource"))
+        self.assertEqual(len(curriculum["next"][0]["segments"][0]["topics"][0]["resources"]), 1)
+        self.assertEqual(curriculum["next"][1], other)
+        self.assertTrue(CurriculumService._apply_assign(curriculum, "https://some.com/resource"))
+        self.assertEqual([path["path"] for path in curriculum["next"]], ["The Odin Project"])
+        self.assertNotIn(CurriculumService._index_key("https://some.com/resource"), curriculum["resourceIndex"])
+        self.assertFalse(CurriculumService._apply_assign(curriculum, "https://some.com/resource"))
+        self.assertEqual([resource["link"] for resource in curriculum["now"]], ["https://some.com/resource", "https://some.com/resource"])
+
+    @patch('src.services.curriculum_services.PathCache')
+    def test_apply_assign_referenced(self, mock_path_cache):
+        link = "https://somevalidlink.22.com"
+        mock_path_cache.resources_with.return_value = [("cccc00000000000000000001", {"name":"Howdocomputersreadcode?V","link":link,"description":"test-it1"})]
+        reference = {"pathId": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "version": "v1", "removed": []}
+        curriculum = {"next": [copy.deepcopy(reference), copy.deepcopy(reference)]}
+
+        # As in _assign_referenced, one reference is marked per assign
+        self.assertTrue(CurriculumService._apply_assign(curriculum, link))
+        self.assertEqual([path["removed"] for path in curriculum["next"]], [[link], []])
+        self.assertEqual(curriculum["now"], [{"name":"Howdocomputersreadcode?V","link":link,"description":"test-it1"}])
+        self.assertTrue(CurriculumService._apply_assign(curriculum, link))
+        self.assertFalse(CurriculumService._apply_assign(curriculum, link))
+
+    def test_apply_complete(self):
+        completed = datetime.fromisoformat("2024-01-01T12:34:56")
+        curriculum = {"now": [{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo"}]}
+
+        self.assertTrue(CurriculumService._apply_complete(curriculum, "https://somevalidlink.35.com", {"rating": 4}, completed))
+        self.assertEqual(curriculum, {"now": [], "completed": [{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo","completed":completed,"rating":4}]})
+        self.assertFalse(CurriculumService._apply_complete(curriculum, "https://somevalidlink.35.com", {}, completed))
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_batch_update_success(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        config = MentorHub_Config.get_instance()
+        mock_get_instance.return_value = MagicMock()
+        mock_path_cache.resources_with.return_value = []
+        last_saved = {"atTime": datetime.fromisoformat("2024-07-01T12:00:00")}
+        mock_mongo_io_class.get_document.return_value = {
+            "_id": ObjectId("aaaa00000000000000000001"),
+            "now": [{"name":"AWSStorageResource","link":"https://somevalidlink.35.com","description":"foo"}],
+            "next": [copy.deepcopy(self.path)],
+            "completed": [],
+            "resourceIndex": CurriculumService._build_index([self.path]),
+            "lastSaved": last_saved
+        }
+        mock_mongo_io_class.find_one_and_update.return_value = {"foo": "bar"}
+
+        result = CurriculumService.batch_update("aaaa00000000000000000001", [
+            {"action": "assign", "link": "https://somevalidlink.22.com"},
+            {"action": "complete", "link": "https://somevalidlink.35.com", "rating": 5},
+            {"action": "assign", "link": "https://not.found.com"},
+            {"action": "delete", "link": "https://some.com/resource"}
+        ], self.token, self.breadcrumb)
+
+        # Per item results, with one read and one write that is guarded against concurrent changes
+        self.assertEqual(result["curriculum"], {"foo": "bar"})
+        self.assertEqual([item["result"] for item in result["results"]], ["Success", "Success", "Not Found", "Invalid Operation"])
+        mock_mongo_io_class.get_document.assert_called_once_with(config.CURRICULUM_COLLECTION_NAME, "aaaa00000000000000000001", primary=True)
+        mock_mongo_io_class.find_one_and_update.assert_called_once()
+        args = mock_mongo_io_class.find_one_and_update.call_args[0]
+        self.assertEqual(set(args[2]["$set"].keys()), {"now", "next", "completed", "resourceIndex", "lastSaved"})
+        self.assertEqual(args[2]["$set"]["now"], [{"name":"Howdocomputersreadcode?V","link":"https://somevalidlink.22.com","description":"test-it1"}])
+        self.assertEqual(args[3], {"lastSaved": last_saved})
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_batch_update_conflict_retried(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_get_instance.return_value = MagicMock()
+        mock_path_cache.resources_with.return_value = []
+        mock_mongo_io_class.get_document.side_effect = lambda *args, **kwargs: {"now": [{"link": "https://somevalidlink.35.com"}], "lastSaved": {}}
+        mock_mongo_io_class.find_one_and_update.side_effect = [None, {"foo": "bar"}]
+
+        result = CurriculumService.batch_update("aaaa00000000000000000001", [{"action": "complete", "link": "https://somevalidlink.35.com"}], self.token, self.breadcrumb)
+        self.assertEqual(result["curriculum"], {"foo": "bar"})
+        self.assertEqual(mock_mongo_io_class.get_document.call_count, 2)
+
+        # Give up after repeated conflicts
+        mock_mongo_io_class.find_one_and_update.side_effect = None
+        mock_mongo_io_class.find_one_and_update.return_value = None
+        with self.assertRaises(UpdateConflict):
+            CurriculumService.batch_update("aaaa00000000000000000001", [{"action": "complete", "link": "https://somevalidlink.35.com"}], self.token, self.breadcrumb)
+        self.assertEqual(mock_mongo_io_class.get_document.call_count, 2 + CurriculumService.BATCH_ATTEMPTS)
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_batch_update_invalid_operations(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_get_instance.return_value = MagicMock()
+        mock_path_cache.resources_with.return_value = []
+        mock_mongo_io_class.get_document.return_value = {"now": [], "next": [], "resourceIndex": {}}
+
+        # Items that are not operations are reported, rather than failing the batch
+        result = CurriculumService.batch_update("aaaa00000000000000000001", [
+            "assign", None, ["assign", "link"], {"action": "assign", "link": {"$ne": ""}}, {"action": "complete"}
+        ], self.token, self.breadcrumb)
+        self.assertEqual(result["results"], [
+            {"action": None, "link": None, "result": "Invalid Operation"},
+            {"action": None, "link": None, "result": "Invalid Operation"},
+            {"action": None, "link": None, "result": "Invalid Operation"},
+            {"action": "assign", "link": None, "result": "Invalid Operation"},
+            {"action": "complete", "link": None, "result": "Invalid Operation"}
+        ])
+        mock_mongo_io_class.find_one_and_update.assert_not_called()
+
+    @patch('src.services.curriculum_services.PathCache')
+    @patch('src.services.curriculum_services.MongoIO')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_batch_update_nothing_to_write(self, mock_get_instance, mock_mongo_io_class, mock_path_cache):
+        mock_get_instance.return_value = MagicMock()
+        mock_path_cache.resources_with.return_value = []
+        mock_mongo_io_class.get_document.return_value = {"now": [], "next": [], "resourceIndex": {}}
+
+        result = CurriculumService.batch_update("aaaa00000000000000000001", [{"action": "assign", "link": "https://not.found.com"}], self.token, self.breadcrumb)
+        self.assertEqual(result, {"curriculum": {"now": [], "next": []}, "results": [{"action": "assign", "link": "https://not.found.com", "result": "Not Found"}]})
+        mock_mongo_io_class.find_one_and_update.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
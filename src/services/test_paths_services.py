@@ -1,9 +1,18 @@
 import unittest
 from unittest.mock import MagicMock, patch
+from bson import ObjectId
+from mentorhub_utils import MentorHub_Config
+from src.utils.catalog_cache import CatalogCache
 from src.services.paths_services import PathsService
 
 class TestPathsService(unittest.TestCase):
-    
+
+    def setUp(self):
+        CatalogCache.invalidate()
+
+    def tearDown(self):
+        CatalogCache.invalidate()
+
     @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
     def test_get_path_success(self, mock_get_instance):
         # Mock the MongoIO methods
@@ -25,5 +34,64 @@ class TestPathsService(unittest.TestCase):
         documents = PathsService.get_paths("", {})
         self.assertEqual(documents, [{"test":"document"}])
 
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_catalog_cached(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_document.return_value = {"test": "document"}
+        mock_mongo_io.get_documents.return_value = [{"test": "document"}]
+
+        # Repeated reads are served from memory, until the cache is invalidated
+        for attempt in range(3):
+            self.assertEqual(PathsService.get_path("000000000000000000000000", {}), {"test":"document"})
+            self.assertEqual(PathsService.get_paths("", {}), [{"test":"document"}])
+        self.assertEqual(mock_mongo_io.get_document.call_count, 1)
+        self.assertEqual(mock_mongo_io.get_documents.call_count, 1)
+
+        CatalogCache.invalidate()
+        PathsService.get_paths("", {})
+        PathsService.get_paths("other", {})
+        self.assertEqual(mock_mongo_io.get_documents.call_count, 2)
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_paths_search(self, mock_get_instance):
+        config = MentorHub_Config.get_instance()
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_documents.return_value = [
+            {"_id": "3", "name": "Python (Advanced)"},
+            {"_id": "1", "name": "Intro to Python"},
+            {"_id": "2", "name": "HTML and CSS"}
+        ]
+
+        # Queries are literal and case insensitive, and results are in name order
+        self.assertEqual(PathsService.get_paths("PYTHON", {}), [{"_id": "1", "name": "Intro to Python"}, {"_id": "3", "name": "Python (Advanced)"}])
+        self.assertEqual(PathsService.get_paths("(adv", {}), [{"_id": "3", "name": "Python (Advanced)"}])
+        self.assertEqual(PathsService.get_paths(".*", {}), [])
+        self.assertEqual(PathsService.get_paths("", {}, 2), [{"_id": "2", "name": "HTML and CSS"}, {"_id": "1", "name": "Intro to Python"}])
+        mock_mongo_io.get_documents.assert_called_once_with(config.PATHS_COLLECTION_NAME, {}, {"_id":1,"name":1})
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_paths_by_id(self, mock_get_instance):
+        config = MentorHub_Config.get_instance()
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        first = {"_id": ObjectId("cccc00000000000000000001"), "name": "First"}
+        second = {"_id": ObjectId("cccc00000000000000000002"), "name": "Second"}
+        mock_mongo_io.get_documents.return_value = [first, second]
+
+        # One query, results in the order asked for, and the ids not found
+        ids = ["cccc00000000000000000002", "not-an-id", "CCCC00000000000000000001", "cccc00000000000000000009"]
+        result = PathsService.get_paths_by_id(ids, {})
+        self.assertEqual(result, {"paths": [second, first], "missing": ["not-an-id", "cccc00000000000000000009"]})
+        mock_mongo_io.get_documents.assert_called_once_with(config.PATHS_COLLECTION_NAME, {"_id": {"$in": [
+            ObjectId("cccc00000000000000000002"), ObjectId("cccc00000000000000000001"), ObjectId("cccc00000000000000000009")
+        ]}})
+
+        # All of them, including the missing id, are now cached
+        mock_mongo_io.get_documents.reset_mock()
+        self.assertEqual(PathsService.get_paths_by_id(ids[::-1], {}), {"paths": [first, second], "missing": ["cccc00000000000000000009", "not-an-id"]})
+        mock_mongo_io.get_documents.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
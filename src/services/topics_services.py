@@ -1,5 +1,9 @@
-from pymongo import ASCENDING
+from bson import ObjectId
 from mentorhub_utils import MentorHubMongoIO, MentorHub_Config
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.catalog_cache import CatalogCache
+from src.utils.name_index import NameIndex
+from src.utils.metrics import timed
 
 import logging
 logger = logging.getLogger(__name__)
@@ -13,20 +17,31 @@ class TopicService:
         return
 
     @staticmethod
-    def get_topics(query, token):
-        """Get a list of topics that match query"""
+    @timed
+    def _name_index():
+        """The name search index of the topics catalog, rebuilt when the catalog cache expires or is invalidated"""
         config = MentorHub_Config.get_instance()
         mentorhub_mongoIO = MentorHubMongoIO.get_instance()
-        
-        TopicService._check_user_access(token)
 
-        match = {"name": {"$regex": query}}
-        order = [('name', ASCENDING)]
         project = {"_id":1,"name":1}
-        topics = mentorhub_mongoIO.get_documents(config.TOPICS_COLLECTION_NAME, match, project, order)
-        return topics
+        return CatalogCache.get(config.TOPICS_COLLECTION_NAME, "name_index", lambda: NameIndex(mentorhub_mongoIO.get_documents(config.TOPICS_COLLECTION_NAME, {}, project)))
+
+    @staticmethod
+    def page_size(limit=None):
+        """The most topics returned in a page, the limit asked for capped at CATALOG_SEARCH_LIMIT"""
+        max_limit = CurriculumConfig.get_instance().CATALOG_SEARCH_LIMIT
+        return min(limit, max_limit) if limit != None else max_limit
+
+    @staticmethod
+    @timed
+    def get_topics(query, token, limit=None, after=None):
+        """Get a page of topics whose name contains query, ignoring case, in name order after the (name, _id) key"""
+        TopicService._check_user_access(token)
+
+        return TopicService._name_index().search(query, TopicService.page_size(limit), after)
 
     @staticmethod
+    @timed
     def get_topic(path_id, token):
         """Get the specified path"""
         config = MentorHub_Config.get_instance()
@@ -34,5 +49,27 @@ class TopicService:
 
         TopicService._check_user_access(token)
 
-        topic = mentorhub_mongoIO.get_document(config.TOPICS_COLLECTION_NAME, path_id)
+        topic = CatalogCache.get(config.TOPICS_COLLECTION_NAME, ("document", path_id), lambda: mentorhub_mongoIO.get_document(config.TOPICS_COLLECTION_NAME, path_id))
         return topic
+
+    @staticmethod
+    @timed
+    def get_topics_by_id(ids, token):
+        """Get the specified topics in the order asked for, with one query for those that are not cached, and the ids that were not found"""
+        config = MentorHub_Config.get_instance()
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+
+        TopicService._check_user_access(token)
+
+        def load(keys):
+            match = {"_id": {"$in": [ObjectId(key[1]) for key in keys]}}
+            return {("document", str(topic["_id"])): topic for topic in mentorhub_mongoIO.get_documents(config.TOPICS_COLLECTION_NAME, match) or []}
+
+        # Ids that are not valid ObjectIds can not be found
+        keys = [("document", str(ObjectId(topic_id))) if ObjectId.is_valid(topic_id) else None for topic_id in ids]
+        valid = [key for key in keys if key != None]
+        found = dict(zip(valid, CatalogCache.get_many(config.TOPICS_COLLECTION_NAME, valid, load)))
+        return {
+            "topics": [found[key] for key in keys if found.get(key) != None],
+            "missing": [topic_id for topic_id, key in zip(ids, keys) if found.get(key) == None]
+        }
@@ -0,0 +1,228 @@
+import math
+import threading
+import time
+import pymongo
+from flask import g, has_request_context, jsonify, request
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo.errors import PyMongoError
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.metrics import LATENCY_BUCKETS
+
+import logging
+logger = logging.getLogger(__name__)
+
+ADMISSION_REQUESTS = Counter('admission_requests', 'Requests admitted, rejected or timed out by admission control', ['route_class', 'outcome'])
+ADMISSION_IN_FLIGHT = Gauge('admission_in_flight', 'Requests being processed', ['route_class'])
+ADMISSION_WAITING = Gauge('admission_waiting', 'Requests waiting to be admitted', ['route_class'])
+ADMISSION_WAIT_SECONDS = Histogram('admission_wait_seconds', 'Time requests waited to be admitted', ['route_class'], buckets=LATENCY_BUCKETS)
+CIRCUIT_BREAKER_STATE = Gauge('circuit_breaker_state', 'Circuit breaker state, 0 closed, 1 open, 2 half open', ['route_class'])
+
+class Limiter:
+    """Admits up to limit requests at a time, and queues up to queue_size more for a free slot"""
+
+    def __init__(self, limit, queue_size):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout):
+        """Returns "admitted", or why the request was not - "queue_full" or "queue_timeout" """
+        with self._condition:
+            if self.active < self.limit:
+                self.active += 1
+                return "admitted"
+            if self.waiting >= self.queue_size:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                if not self._condition.wait_for(lambda: self.active < self.limit, timeout):
+                    return "queue_timeout"
+                self.active += 1
+                return "admitted"
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+class CircuitBreaker:
+    """
+    Opens after failures consecutive MongoDB timeouts, and rejects requests until reset_seconds have passed.
+    Then one trial request is let through - it closes the breaker if it does not time out, and opens it again if it does.
+    While the breaker is open or half open, only the trial request can close it, requests that were admitted before
+    it opened do not.
+    """
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+    def __init__(self, failures, reset_seconds):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = CircuitBreaker.CLOSED
+        self.timeouts = 0               # Consecutive timeouts
+        self.opened = 0                 # time.monotonic() when the breaker opened
+        self.trial = False              # A half open trial request is in flight
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns "allowed", "trial" for the half open trial request, or "open" when the request is rejected"""
+        with self._lock:
+            if self.state == CircuitBreaker.OPEN and time.monotonic() - self.opened >= self.reset_seconds:
+                self.state = CircuitBreaker.HALF_OPEN
+            if self.state == CircuitBreaker.CLOSED:
+                return "allowed"
+            if self.state == CircuitBreaker.OPEN or self.trial:
+                return "open"
+            self.trial = True
+            return "trial"
+
+    def record(self, timed_out, trial=False):
+        """Record whether a request that used MongoDB timed out, and returns the state of the breaker"""
+        with self._lock:
+            if trial:
+                self.trial = False
+                self.timeouts = self.timeouts + 1 if timed_out else 0
+                self.state = CircuitBreaker.OPEN if timed_out else CircuitBreaker.CLOSED
+                if timed_out:
+                    self.opened = time.monotonic()
+            elif self.state == CircuitBreaker.CLOSED:
+                self.timeouts = self.timeouts + 1 if timed_out else 0
+                if self.timeouts >= self.failures:
+                    self.state = CircuitBreaker.OPEN
+                    self.opened = time.monotonic()
+            return self.state
+
+    def abandon_trial(self):
+        """The trial request did not use MongoDB, so the next request is the trial"""
+        with self._lock:
+            self.trial = False
+
+    def retry_after(self):
+        """Seconds until the breaker lets a trial request through"""
+        return max(1, math.ceil(self.reset_seconds - (time.monotonic() - self.opened)))
+
+def processing_error(e):
+    """
+    The response to a request that failed with e. When MongoDB timed out - including when no server could be
+    selected, or no connection was free in the pool - the request is marked for admission control, and gets a
+    503 and Retry-After. Any other error is a 500.
+    """
+    if isinstance(e, PyMongoError) and e.timeout:
+        if has_request_context():
+            g.mongo_timeout = True
+        return AdmissionControl._overloaded("The database did not respond in time, try again later", AdmissionControl.RETRY_AFTER)
+    return jsonify({"error": "A processing error occurred"}), 500
+
+class AdmissionControl:
+    """
+    Limits the requests each process handles at a time, separately for each route class, so that when MongoDB
+    slows down requests are turned away quickly with a 503 and Retry-After, instead of piling up until they time
+    out. Each class has a limit on the requests in flight, a bounded queue for more, a deadline applied to all of
+    the MongoDB operations of a request with pymongo.timeout(), and a circuit breaker that opens on repeated timeouts.
+    Requests to other blueprints, such as the config and health endpoints, are not limited.
+    """
+
+    # Blueprint -> route class
+    ROUTE_CLASSES = {"path_routes": "catalog", "topic_routes": "catalog", "curriculum_routes": "curriculum"}
+
+    # Seconds a client is asked to wait when the queue is full
+    RETRY_AFTER = 1
+
+    def __init__(self, app=None):
+        config = CurriculumConfig.get_instance()
+        self.enabled = config.ADMISSION_CONTROL == "true"
+        self.queue_timeout = config.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        self.limiters = {
+            "catalog": Limiter(config.CATALOG_MAX_CONCURRENCY, config.CATALOG_QUEUE_SIZE),
+            "curriculum": Limiter(config.CURRICULUM_MAX_CONCURRENCY, config.CURRICULUM_QUEUE_SIZE)
+        }
+        self.deadlines = {
+            "catalog": config.CATALOG_MONGO_TIMEOUT_MS / 1000,
+            "curriculum": config.CURRICULUM_MONGO_TIMEOUT_MS / 1000
+        }
+        self.breakers = {
+            route_class: CircuitBreaker(config.CIRCUIT_BREAKER_FAILURES, config.CIRCUIT_BREAKER_RESET_SECONDS) for route_class in self.limiters
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Limit the requests of the app, register before the other request handlers so rejected requests do no work"""
+        if not self.enabled:
+            return
+        app.before_request(self.admit)
+        app.teardown_request(self.release)
+        logger.info("Admission control limits %s requests at a time", ", ".join(f"{name} to {limiter.limit}" for name, limiter in self.limiters.items()))
+
+    @staticmethod
+    def _overloaded(message, retry_after):
+        response = jsonify({"error": message})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    def admit(self):
+        """A before_request handler, that admits the request or returns a 503"""
+        route_class = AdmissionControl.ROUTE_CLASSES.get(request.blueprint)
+        if route_class == None:
+            return None
+
+        start = time.perf_counter()
+        ADMISSION_WAITING.labels(route_class).inc()
+        try:
+            outcome = self.limiters[route_class].acquire(self.queue_timeout)
+        finally:
+            ADMISSION_WAITING.labels(route_class).dec()
+        ADMISSION_WAIT_SECONDS.labels(route_class).observe(time.perf_counter() - start)
+        if outcome != "admitted":
+            ADMISSION_REQUESTS.labels(route_class, outcome).inc()
+            return AdmissionControl._overloaded("The service is busy, try again later", AdmissionControl.RETRY_AFTER)
+
+        breaker = self.breakers[route_class]
+        allowed = breaker.allow()
+        if allowed == "open":
+            self.limiters[route_class].release()
+            ADMISSION_REQUESTS.labels(route_class, "circuit_open").inc()
+            return AdmissionControl._overloaded("The database is unavailable, try again later", breaker.retry_after())
+
+        ADMISSION_REQUESTS.labels(route_class, "admitted").inc()
+        ADMISSION_IN_FLIGHT.labels(route_class).inc()
+        g.admitted = route_class
+        g.breaker_trial = allowed == "trial"
+        g.mongo_timeout = False
+        g.mongo_seconds = 0
+        g.mongo_commands = 0
+        g.mongo_deadline = pymongo.timeout(self.deadlines[route_class])
+        g.mongo_deadline.__enter__()
+        return None
+
+    def release(self, error=None):
+        """A teardown_request handler, that frees the slot of an admitted request and records its outcome"""
+        route_class = g.pop("admitted", None)
+        if route_class == None:
+            return
+        g.pop("mongo_deadline").__exit__(None, None, None)
+        ADMISSION_IN_FLIGHT.labels(route_class).dec()
+        self.limiters[route_class].release()
+
+        # Only requests that used MongoDB say anything about it, catalog requests served from the cache do not
+        breaker = self.breakers[route_class]
+        before = breaker.state
+        timed_out = g.get("mongo_timeout", False)
+        if timed_out:
+            ADMISSION_REQUESTS.labels(route_class, "mongo_timeout").inc()
+        if not timed_out and g.get("mongo_commands", 0) == 0:
+            if g.get("breaker_trial"):
+                breaker.abandon_trial()
+            return
+        state = breaker.record(timed_out, g.get("breaker_trial", False))
+        CIRCUIT_BREAKER_STATE.labels(route_class).set(state)
+        if state != before and state == CircuitBreaker.OPEN:
+            logger.warning("Circuit breaker for %s opened after %s MongoDB timeouts", route_class, breaker.timeouts)
+        elif state != before and state == CircuitBreaker.CLOSED:
+            logger.info("Circuit breaker for %s closed", route_class)
@@ -0,0 +1,112 @@
+import threading
+import time
+from mentorhub_utils import MentorHub_Config, MentorHubMongoIO
+from prometheus_client import Counter
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.path_cache import PathCache
+from src.utils.single_flight import SingleFlight
+from src.utils.ttl_cache import TTLCache
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Exported by PrometheusMetrics on /api/health/
+CATALOG_CACHE_REQUESTS = Counter('catalog_cache_requests', 'Catalog cache lookups', ['collection', 'result'])
+
+class CatalogCache:
+    """Process wide cache of the read only catalog collections (paths and topics), both lists and documents.
+    Cached values are shared by every request, and must not be changed."""
+    _lock = threading.Lock()
+    _caches = {}        # collection name -> TTLCache
+    _watchers = {}      # collection name -> change stream thread
+    _flight = SingleFlight()
+
+    # Seconds to wait before re-opening a failed change stream
+    RETRY_SECONDS = 5
+
+    @staticmethod
+    def _get_cache(collection_name):
+        with CatalogCache._lock:
+            if collection_name not in CatalogCache._caches:
+                config = CurriculumConfig.get_instance()
+                CatalogCache._caches[collection_name] = TTLCache(config.CATALOG_CACHE_MAX_SIZE, config.CATALOG_CACHE_TTL_SECONDS)
+            return CatalogCache._caches[collection_name]
+
+    @staticmethod
+    def get(collection_name, key, load):
+        """Get the cached value of key, calling load() to read it from the database on a miss"""
+        cache = CatalogCache._get_cache(collection_name)
+        value = cache.get(key, TTLCache.MISSING)
+        if value is not TTLCache.MISSING:
+            CATALOG_CACHE_REQUESTS.labels(collection_name, "hit").inc()
+            return value
+
+        CATALOG_CACHE_REQUESTS.labels(collection_name, "miss").inc()
+
+        # Concurrent misses share one database read, and the cached value itself, like a hit
+        def load_and_cache():
+            value = load()
+            cache.set(key, value)
+            return value
+        return CatalogCache._flight.do((collection_name, key), load_and_cache, copy_result=False)
+
+    @staticmethod
+    def get_many(collection_name, keys, load):
+        """Get the cached values of keys in order, calling load(missed keys) once to read a dict of the misses from the database"""
+        cache = CatalogCache._get_cache(collection_name)
+        values = {}
+        for key in keys:
+            values[key] = cache.get(key, TTLCache.MISSING)
+        missed = [key for key, value in values.items() if value is TTLCache.MISSING]
+        CATALOG_CACHE_REQUESTS.labels(collection_name, "hit").inc(len(values) - len(missed))
+
+        if missed:
+            CATALOG_CACHE_REQUESTS.labels(collection_name, "miss").inc(len(missed))
+            loaded = load(missed)
+            for key in missed:
+                values[key] = loaded.get(key)
+                cache.set(key, values[key])
+        return [values[key] for key in keys]
+
+    @staticmethod
+    def invalidate(collection_name=None):
+        """Discard the cached lists and documents of a collection, or of every collection"""
+        with CatalogCache._lock:
+            caches = list(CatalogCache._caches.items())
+        for name, cache in caches:
+            if collection_name is None or name == collection_name:
+                cache.clear()
+
+    @staticmethod
+    def apply_changes(collection_name, changes):
+        """Invalidate a collection as change events for it arrive, changes is a change stream or a list of events"""
+        config = MentorHub_Config.get_instance()
+        for change in changes:
+            # Any change can affect the lists, so the whole collection is invalidated
+            CatalogCache.invalidate(collection_name)
+            if collection_name == config.PATHS_COLLECTION_NAME:
+                PathCache.invalidate()
+            logger.info("Catalog cache invalidated by %s on %s", change.get('operationType'), collection_name)
+
+    @staticmethod
+    def _watch(collection_name):
+        """Follow the change stream of a collection, invalidating it whenever events may have been missed"""
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+        while True:
+            try:
+                with mentorhub_mongoIO.db.get_collection(collection_name).watch() as changes:
+                    CatalogCache.apply_changes(collection_name, changes)
+            except Exception as e:
+                logger.warning("Catalog cache change stream on %s failed, retrying: %s", collection_name, e)
+            CatalogCache.invalidate(collection_name)
+            time.sleep(CatalogCache.RETRY_SECONDS)
+
+    @staticmethod
+    def watch(collection_name):
+        """Start invalidating a collection from its change stream, in a background thread"""
+        with CatalogCache._lock:
+            if collection_name in CatalogCache._watchers:
+                return
+            CatalogCache._watchers[collection_name] = threading.Thread(target=CatalogCache._watch, args=(collection_name,), name=f"catalog-cache-watch-{collection_name}", daemon=True)
+            CatalogCache._watchers[collection_name].start()
+        logger.info("Catalog cache is watching for changes to %s", collection_name)
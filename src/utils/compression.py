@@ -0,0 +1,118 @@
+import gzip
+import zlib
+from flask import request
+from src.config.curriculum_config import CurriculumConfig
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Compression:
+    """
+    Compress responses with the best encoding the client accepts, from COMPRESSION_ENCODINGS. Complete
+    responses are only compressed when they are at least COMPRESSION_MIN_SIZE bytes, streamed responses
+    are compressed a chunk at a time, and flushed after each chunk so that nothing is held back.
+    """
+
+    # Levels that favour speed, for JSON generated per request
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 4
+    ZSTD_LEVEL = 3
+
+    # Content types that are worth compressing
+    MIMETYPES = {"application/json", "application/yaml", "text/plain", "text/html", "text/csv"}
+
+    def __init__(self, app=None, skip_paths=()):
+        config = CurriculumConfig.get_instance()
+        self.min_size = config.COMPRESSION_MIN_SIZE
+        self.skip_paths = tuple(skip_paths)
+        self.encodings = []
+        for encoding in [encoding.strip() for encoding in config.COMPRESSION_ENCODINGS.split(",") if encoding.strip()]:
+            if Compression.available(encoding):
+                self.encodings.append(encoding)
+            else:
+                logger.info("Compression encoding %s is not available, and will not be used", encoding)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Compress the responses of the app"""
+        app.after_request(self.compress)
+        logger.info("Compressing responses with %s", self.encodings)
+
+    @staticmethod
+    def available(encoding):
+        """True if the encoding is supported and its library is installed"""
+        if encoding == "br":
+            return brotli is not None
+        if encoding == "zstd":
+            return zstandard is not None
+        return encoding == "gzip"
+
+    @staticmethod
+    def compress_data(encoding, data):
+        """Compress a complete response body"""
+        if encoding == "br":
+            return brotli.compress(data, quality=Compression.BROTLI_QUALITY)
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=Compression.ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=Compression.GZIP_LEVEL, mtime=0)
+
+    @staticmethod
+    def compress_stream(encoding, chunks):
+        """Compress a streamed response body, a chunk at a time"""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=Compression.BROTLI_QUALITY)
+            compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=Compression.ZSTD_LEVEL).compressobj()
+            compress, flush, finish = compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush
+        else:
+            compressor = zlib.compressobj(Compression.GZIP_LEVEL, zlib.DEFLATED, 31)
+            compress, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+        for chunk in chunks:
+            if chunk:
+                yield compress(chunk.encode() if isinstance(chunk, str) else chunk) + flush()
+        yield finish()
+
+    def compress(self, response):
+        """An after_request handler, that compresses the response when it is worth it and the client accepts it"""
+        if (not self.encodings or request.path.startswith(self.skip_paths)
+                or response.mimetype not in Compression.MIMETYPES
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or "Content-Encoding" in response.headers
+                or "no-transform" in response.headers.get("Cache-Control", "")):
+            return response
+
+        # The response depends on the Accept-Encoding header, even when it is not compressed
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.direct_passthrough = False
+            response.response = Compression.compress_stream(encoding, response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(Compression.compress_data(encoding, data))
+        response.headers["Content-Encoding"] = encoding
+
+        # The compressed bytes are a different representation of the same version
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
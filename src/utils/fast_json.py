@@ -0,0 +1,65 @@
+import codecs
+import re
+from json.encoder import encode_basestring_ascii
+from mentorhub_utils import MongoJSONEncoder
+
+# Encoding to ascii with this error handler escapes each run of non ascii characters, with the 
+# same C function that json.dumps(ensure_ascii=True) uses for strings, e.g. \u00e9 or \ud83d\ude00
+codecs.register_error("fast_json_escape", lambda error: (encode_basestring_ascii(error.object[error.start:error.end])[1:-1], error.end))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+class FastMongoJSONProvider(MongoJSONEncoder):
+    """
+    A drop in replacement for the MongoJSONEncoder JSON provider, that encodes responses with orjson
+    when it is installed. Responses are byte for byte the same as MongoJSONEncoder, except that NaN 
+    and Infinity (which are not valid JSON) are encoded as null. ObjectId's, datetimes and anything 
+    else orjson does not encode the same way are passed to the same default(). Documents that orjson 
+    can not encode identically, such as very large or small floats, are encoded by MongoJSONEncoder.
+    """
+
+    # Floats that orjson writes differently to Python, those with an exponent (1e16 not 1e+16, 2.5e-7 not 2.5e-07) 
+    # and those below 1e-4 (0.000015 not 1.5e-05). An "e" followed by digits and the end of a value is rare in 
+    # text, and hex strings such as ObjectId's end with a quote, so this is a cheap check with few false positives
+    _EXPONENT = re.compile(rb'e-?[0-9]{1,3}(?:[,}\]]|$)')
+    _SMALL = b"0.0000"
+
+    @staticmethod
+    def _ensure_ascii(body):
+        """Escape the non ASCII characters in JSON bytes, as json.dumps(ensure_ascii=True) does"""
+        body = body.decode().encode("ascii", "fast_json_escape")
+        return body.replace(b"\x7f", b"\\u007f") if b"\x7f" in body else body
+
+    def _fast_dumps(self, obj):
+        """Compact JSON bytes, or None if the object can not be encoded exactly as MongoJSONEncoder would"""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            body = orjson.dumps(obj, default=self.default, option=option)
+        except (TypeError, orjson.JSONEncodeError):
+            # e.g. non string keys, or integers larger than 64 bits
+            return None
+
+        if FastMongoJSONProvider._SMALL in body or FastMongoJSONProvider._EXPONENT.search(body):
+            return None
+        if self.ensure_ascii and (not body.isascii() or b"\x7f" in body):
+            body = FastMongoJSONProvider._ensure_ascii(body)
+        return body
+
+    def response(self, *args, **kwargs):
+        """Encode a compact response with orjson, falling back to MongoJSONEncoder"""
+        indented = (self.compact is None and self._app.debug) or self.compact is False
+        if orjson == None or indented:
+            return super().response(*args, **kwargs)
+
+        body = self._fast_dumps(self._prepare_response_obj(args, kwargs))
+        if body == None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
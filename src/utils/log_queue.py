@@ -0,0 +1,157 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from flask import has_request_context, request
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+LOG_RECORDS_DROPPED = Counter('log_records_dropped', 'Log records dropped because the log queue was full', ['level'])
+
+# The default format of logging.basicConfig
+TEXT_FORMAT = logging.BASIC_FORMAT
+
+def correlation_id(record):
+    """The correlationId of the breadcrumb logged with a record, or of the request it was logged in"""
+    breadcrumb = getattr(record, "breadcrumb", None)
+    if isinstance(breadcrumb, dict) and breadcrumb.get("correlationId"):
+        return breadcrumb["correlationId"]
+    if has_request_context():
+        return request.headers.get('X-Correlation-Id', "")
+    return ""
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one line of JSON, with the fields of the breadcrumb logged with it"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlationId": getattr(record, "correlationId", ""),
+            "pid": record.process,
+            "thread": record.threadName
+        }
+        breadcrumb = getattr(record, "breadcrumb", None)
+        if isinstance(breadcrumb, dict):
+            entry.update({key: str(value) for key, value in breadcrumb.items() if key not in entry})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The logging.basicConfig format, followed by the breadcrumb logged with the record"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        text = super().format(record)
+        breadcrumb = getattr(record, "breadcrumb", None)
+        return f"{text} {breadcrumb}" if breadcrumb is not None else text
+
+def _originals():
+    """
+    The Thread and SimpleQueue classes, before gevent patched them. The writer must be a real thread, so that
+    writing a log does not block the greenlets serving requests, and the queue must work between threads
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched("threading"):
+            return monkey.get_original("threading", "Thread"), monkey.get_original("queue", "SimpleQueue")
+    except ImportError:
+        pass
+    return threading.Thread, queue.SimpleQueue
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a queue, for the LogQueue thread to format and write. When the queue holds size records
+    the record is dropped and counted, rather than making the request wait for the log to be written.
+    """
+
+    def __init__(self, log_queue, size):
+        super().__init__(log_queue)
+        self.size = size
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Keep the message and arguments for the writer thread to format, unlike QueueHandler.prepare, but
+        capture what only the logging thread has - the correlationId of the request and the traceback
+        """
+        record.correlationId = correlation_id(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.size:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.labels(record.levelname).inc()
+        else:
+            self.queue.put(record)
+
+class LogQueue:
+    """
+    Replaces the handlers of the root logger with a DroppingQueueHandler, and formats and writes the
+    records on a background thread, to stderr, as JSON lines or in the text format of logging.basicConfig
+    """
+    handler = None
+    thread = None
+    settings = None     # The arguments of start, to restart with
+
+    @staticmethod
+    def start(log_format="json", size=10000, level=logging.INFO, stream=None):
+        LogQueue.stop()
+        LogQueue.settings = (log_format, size, level, stream)
+        Thread, SimpleQueue = _originals()
+        formatter = JsonFormatter() if log_format == "json" else TextFormatter()
+        LogQueue.handler = DroppingQueueHandler(SimpleQueue(), size)
+        LogQueue.thread = Thread(target=LogQueue._write, args=(LogQueue.handler.queue, formatter, stream or sys.stderr), name="log-writer", daemon=True)
+        LogQueue.thread.start()
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(LogQueue.handler)
+        root.setLevel(level)
+
+    @staticmethod
+    def _write(log_queue, formatter, stream):
+        """Write records until the None that stop() queues, flushing when the queue is empty"""
+        while True:
+            record = log_queue.get()
+            if record is None:
+                break
+            try:
+                stream.write(formatter.format(record) + "\n")
+                if log_queue.empty():
+                    stream.flush()
+            except Exception:
+                # Nowhere to log a failure to log
+                pass
+        stream.flush()
+
+    @staticmethod
+    def restart():
+        """Start a new writer thread in a forked process, threads do not survive a fork"""
+        if LogQueue.settings != None:
+            LogQueue.start(*LogQueue.settings)
+
+    @staticmethod
+    def stop():
+        """Write the records still on the queue, and stop the writer thread"""
+        if LogQueue.thread != None:
+            logging.getLogger().removeHandler(LogQueue.handler)
+            LogQueue.handler.queue.put(None)
+            LogQueue.thread.join(timeout=5)
+            LogQueue.thread = None
+            LogQueue.handler = None
@@ -0,0 +1,79 @@
+import threading
+import time
+from bson import ObjectId
+from mentorhub_utils import MentorHub_Config, MentorHubMongoIO
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.mongo_io import MongoIO
+from src.utils.ttl_cache import TTLCache
+
+import logging
+logger = logging.getLogger(__name__)
+
+class MentorCache:
+    """Cache of the mentorId of each person, used for Role Based Access Control"""
+    _cache = None
+    _watcher = None
+
+    # Seconds to wait before re-opening a failed change stream
+    RETRY_SECONDS = 5
+
+    @staticmethod
+    def _get_cache():
+        if MentorCache._cache is None:
+            config = CurriculumConfig.get_instance()
+            MentorCache._cache = TTLCache(config.MENTOR_CACHE_MAX_SIZE, config.MENTOR_CACHE_TTL_SECONDS)
+        return MentorCache._cache
+
+    @staticmethod
+    def get_mentor_id(person_id):
+        """Get the mentorId of a person, reading only that field from the database on a cache miss"""
+        config = MentorHub_Config.get_instance()
+        cache = MentorCache._get_cache()
+        key = str(ObjectId(person_id))
+
+        mentor_id = cache.get(key, TTLCache.MISSING)
+        if mentor_id is TTLCache.MISSING:
+            person = MongoIO.get_document(config.PEOPLE_COLLECTION_NAME, key, {"mentorId": 1})
+            mentor_id = person.get("mentorId") if person else None
+            cache.set(key, mentor_id)
+        return mentor_id
+
+    @staticmethod
+    def invalidate(person_id=None):
+        """Discard the cached mentorId of a person, or of everyone"""
+        if person_id is None:
+            MentorCache._get_cache().clear()
+        else:
+            MentorCache._get_cache().invalidate(str(person_id))
+
+    @staticmethod
+    def apply_changes(changes):
+        """Invalidate people as change events for them arrive, changes is a change stream or a list of events"""
+        for change in changes:
+            person_id = change.get("documentKey", {}).get("_id")
+            if person_id is not None:
+                MentorCache.invalidate(person_id)
+
+    @staticmethod
+    def _watch():
+        """Follow the people change stream, clearing the cache whenever events may have been missed"""
+        config = MentorHub_Config.get_instance()
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+        while True:
+            try:
+                with mentorhub_mongoIO.db.get_collection(config.PEOPLE_COLLECTION_NAME).watch(pipeline) as changes:
+                    MentorCache.apply_changes(changes)
+            except Exception as e:
+                logger.warning("Mentor cache change stream failed, retrying: %s", e)
+            MentorCache.invalidate()
+            time.sleep(MentorCache.RETRY_SECONDS)
+
+    @staticmethod
+    def watch():
+        """Start invalidating the cache from the people change stream, in a background thread"""
+        if MentorCache._watcher is not None:
+            return
+        MentorCache._watcher = threading.Thread(target=MentorCache._watch, name="mentor-cache-watch", daemon=True)
+        MentorCache._watcher.start()
+        logger.info("Mentor cache is watching for changes to people")
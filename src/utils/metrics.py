@@ -0,0 +1,113 @@
+import functools
+import threading
+import time
+from bson import BSON
+from flask import g, has_request_context
+from prometheus_client import Histogram
+from pymongo import monitoring
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Most operations take a few milliseconds, so the default buckets (5ms and up) are too coarse
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+MONGO_OPERATION_SECONDS = Histogram('mongo_operation_seconds', 'MongoDB command latency', ['collection', 'operation', 'outcome'], buckets=LATENCY_BUCKETS)
+MONGO_DOCUMENT_BYTES = Histogram('mongo_document_bytes', 'BSON size of documents read from and written to MongoDB', ['collection', 'direction'], buckets=SIZE_BUCKETS)
+SERVICE_METHOD_SECONDS = Histogram('service_method_seconds', 'Service method latency', ['service', 'method', 'outcome'], buckets=LATENCY_BUCKETS)
+
+def timed(function):
+    """Time a service method, labelled with its class and name, and whether it raised an exception"""
+    service, method = function.__qualname__.split(".")[0], function.__name__
+    success = SERVICE_METHOD_SECONDS.labels(service, method, "success")
+    failure = SERVICE_METHOD_SECONDS.labels(service, method, "failure")
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            failure.observe(time.perf_counter() - start)
+            raise
+        success.observe(time.perf_counter() - start)
+        return result
+    return wrapper
+
+class MongoMetrics(monitoring.CommandListener):
+    """
+    A pymongo command listener that times every command sent to MongoDB, and measures the documents that
+    findAndModify and insert commands write and return, for one in every sample_every commands - measuring
+    a document encodes it again, which takes milliseconds for a large curriculum. Register it before the
+    client is created, with pymongo.monitoring.register(MongoMetrics())
+    """
+
+    # The commands whose documents are measured
+    MEASURED = ["findAndModify", "insert"]
+
+    def __init__(self, sample_every=1):
+        self.sample_every = max(1, sample_every)
+        self._measured = 0
+        self._collections = {}      # (connection, request id) -> collection of the started command, and whether it is measured
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(command, command_name):
+        """The collection a command operates on, getMore names it separately from the cursor id"""
+        collection = command.get("collection") if command_name == "getMore" else command.get(command_name)
+        return collection if isinstance(collection, str) else ""
+
+    @staticmethod
+    def _written(command, command_name):
+        """The documents a command writes"""
+        if command_name == "insert":
+            return command.get("documents", [])
+        if command_name == "findAndModify":
+            return [command.get("update")]
+        return []
+
+    @staticmethod
+    def _read(reply, command_name):
+        """The documents a command reply contains"""
+        if command_name == "findAndModify":
+            return [reply.get("value")]
+        return []
+
+    @staticmethod
+    def _observe_sizes(collection, direction, documents):
+        for document in documents:
+            # Update pipelines are lists, and replacements or operators are documents
+            if isinstance(document, dict):
+                MONGO_DOCUMENT_BYTES.labels(collection, direction).observe(len(BSON.encode(document)))
+
+    def started(self, event):
+        collection = MongoMetrics._collection(event.command, event.command_name)
+        with self._lock:
+            measured = False
+            if event.command_name in MongoMetrics.MEASURED:
+                self._measured += 1
+                measured = self._measured % self.sample_every == 0
+            self._collections[(event.connection_id, event.request_id)] = (collection, measured)
+        if measured:
+            MongoMetrics._observe_sizes(collection, "write", MongoMetrics._written(event.command, event.command_name))
+
+    def _finished(self, event, outcome):
+        with self._lock:
+            collection, measured = self._collections.pop((event.connection_id, event.request_id), ("", False))
+        seconds = event.duration_micros / 1000000
+        MONGO_OPERATION_SECONDS.labels(collection, event.command_name, outcome).observe(seconds)
+
+        # Commands run in the thread of the request that made them, slow requests report the total
+        if has_request_context() and "mongo_seconds" in g:
+            g.mongo_seconds += seconds
+            g.mongo_commands += 1
+        return collection, measured
+
+    def succeeded(self, event):
+        collection, measured = self._finished(event, "success")
+        if measured:
+            MongoMetrics._observe_sizes(collection, "read", MongoMetrics._read(event.reply, event.command_name))
+
+    def failed(self, event):
+        self._finished(event, "failure")
@@ -0,0 +1,131 @@
+from bson import ObjectId
+from pymongo import MongoClient, ReturnDocument
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from mentorhub_utils import MentorHub_Config, MentorHubMongoIO
+from src.config.curriculum_config import CurriculumConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+class RoutedDatabase:
+    """Wraps a database, so that its collections are read with the read preference configured for them, see MongoIO.read_preference"""
+
+    def __init__(self, database):
+        self.database = database
+
+    def __getattr__(self, name):
+        return getattr(self.database, name)
+
+    def __getitem__(self, name):
+        return self.get_collection(name)
+
+    def get_collection(self, name, codec_options=None, read_preference=None, write_concern=None, read_concern=None):
+        return self.database.get_collection(name, codec_options, read_preference or MongoIO.read_preference(name), write_concern, read_concern)
+
+class MongoIO:
+    """Database io functions that are not provided by the shared MentorHubMongoIO singleton"""
+
+    READ_PREFERENCES = {
+        "primary": Primary, "primaryPreferred": PrimaryPreferred, "secondary": Secondary,
+        "secondaryPreferred": SecondaryPreferred, "nearest": Nearest
+    }
+    _read_preferences = None    # collection name -> read preference, of the collections that have one configured
+
+    @staticmethod
+    def reconnect(close=False):
+        """
+        Replace the client with a new one owned by this process, with the configured pool size - used after a fork.
+        Close the client being replaced only when this process created it.
+        """
+        config = MentorHub_Config.get_instance()
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+
+        # The client inherited from the parent shares its sockets, and must not be used or closed
+        if close and mentorhub_mongoIO.connected:
+            mentorhub_mongoIO.client.close()
+        max_pool_size = CurriculumConfig.get_instance().MONGO_MAX_POOL_SIZE
+        mentorhub_mongoIO.client = MongoClient(config.MONGO_CONNECTION_STRING, maxPoolSize=max_pool_size, serverSelectionTimeoutMS=2000, socketTimeoutMS=5000)
+        mentorhub_mongoIO.db = RoutedDatabase(mentorhub_mongoIO.client.get_database(config.MONGO_DB_NAME))
+        mentorhub_mongoIO.connected = True
+        logger.info("Connected to MongoDB with a pool of %s", max_pool_size)
+
+    @staticmethod
+    def route_reads():
+        """Read each collection of the shared client with its configured read preference, including the reads of MentorHubMongoIO"""
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+        if mentorhub_mongoIO.connected and not isinstance(mentorhub_mongoIO.db, RoutedDatabase):
+            mentorhub_mongoIO.db = RoutedDatabase(mentorhub_mongoIO.db)
+            logger.info("Reading %s", {name: preference.document for name, preference in MongoIO._configured_read_preferences().items()})
+
+    @staticmethod
+    def _make_read_preference(mode, max_staleness_seconds):
+        """A read preference, with a maximum staleness for modes that read from secondaries, 0 or less for no maximum"""
+        if mode not in MongoIO.READ_PREFERENCES:
+            logger.warning("Unknown read preference %s, reading from the primary", mode)
+            mode = "primary"
+        if mode == "primary":
+            return Primary()
+        return MongoIO.READ_PREFERENCES[mode](max_staleness=max_staleness_seconds if max_staleness_seconds > 0 else -1)
+
+    @staticmethod
+    def _configured_read_preferences():
+        if MongoIO._read_preferences == None:
+            config = MentorHub_Config.get_instance()
+            curriculum_config = CurriculumConfig.get_instance()
+            catalog = MongoIO._make_read_preference(curriculum_config.CATALOG_READ_PREFERENCE, curriculum_config.CATALOG_MAX_STALENESS_SECONDS)
+            MongoIO._read_preferences = {
+                config.PATHS_COLLECTION_NAME: catalog,
+                config.TOPICS_COLLECTION_NAME: catalog
+            }
+        return MongoIO._read_preferences
+
+    @staticmethod
+    def read_preference(collection_name):
+        """The read preference configured for a collection, or None to use the client's"""
+        return MongoIO._configured_read_preferences().get(collection_name)
+
+    @staticmethod
+    def get_document(collection_name, document_id, projection=None, primary=False):
+        """
+        Retrieve a document by ID, including or excluding the projected fields. Read from the primary, whatever the
+        read preference of the collection, when primary is True - to check a precondition, or read before a write.
+        """
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+        if not mentorhub_mongoIO.connected: return None
+
+        try:
+            collection = mentorhub_mongoIO.db.get_collection(collection_name, read_preference=Primary() if primary else None)
+            document = collection.find_one({"_id": ObjectId(document_id)}, projection)
+            return document
+        except Exception as e:
+            logger.error("Failed to get document: %s", e)
+            raise
+
+    @staticmethod
+    def find_one_and_update(collection_name, document_id, update, match=None, projection=None, upsert=False, array_filters=None):
+        """
+        Atomically update a document by ID and return the updated document.
+
+        Args:
+            collection_name (str): Name of the collection to update.
+            document_id (str): The _id of the document to update.
+            update (dict or list): Update operators, or an aggregation pipeline.
+            match (dict, optional): Additional filter conditions. Defaults to {}.
+            projection (dict, optional): Fields to include or exclude. Defaults to None.
+            upsert (bool, optional): Insert the document if it does not exist. Defaults to False.
+            array_filters (list, optional): Filters for $[identifier] array updates. Defaults to None.
+
+        Returns:
+            dict: The updated (or inserted) document, or None if no document matched.
+        """
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+        if not mentorhub_mongoIO.connected: return None
+
+        try:
+            collection = mentorhub_mongoIO.db.get_collection(collection_name)
+            match = {**(match or {}), "_id": ObjectId(document_id)}
+            document = collection.find_one_and_update(match, update, projection=projection, upsert=upsert, array_filters=array_filters, return_document=ReturnDocument.AFTER)
+            return document
+        except Exception as e:
+            logger.error("Failed to find and update document: %s", e)
+            raise
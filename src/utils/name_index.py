@@ -0,0 +1,71 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right
+
+class NameIndex:
+    """In memory n-gram index of catalog names, for case insensitive substring search in name order"""
+
+    # Names are indexed by every substring up to this long
+    GRAM_SIZE = 3
+
+    def __init__(self, documents):
+        # Documents are held in name order, and found by their position in that order
+        self.documents = sorted(documents or [], key=NameIndex._key)
+        self._keys = [NameIndex._key(document) for document in self.documents]
+        self._names = [(document.get("name") or "").casefold() for document in self.documents]
+        self._grams = {}    # n-gram -> set of positions
+        for position, name in enumerate(self._names):
+            for gram in self._ngrams(name):
+                self._grams.setdefault(gram, set()).add(position)
+
+    @staticmethod
+    def _key(document):
+        """The (name, _id) sort key of a document, that is unique and used for keyset paging"""
+        return (document.get("name") or "", str(document.get("_id")))
+
+    @staticmethod
+    def cursor(document):
+        """An opaque cursor for the page after document"""
+        return base64.urlsafe_b64encode(json.dumps(NameIndex._key(document)).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """The (name, _id) key of a cursor, raises ValueError if it is not a valid cursor"""
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except Exception:
+            raise ValueError(f"Invalid cursor '{cursor}'")
+        if not isinstance(key, list) or len(key) != 2 or not all(isinstance(part, str) for part in key):
+            raise ValueError(f"Invalid cursor '{cursor}'")
+        return tuple(key)
+
+    @staticmethod
+    def _ngrams(text):
+        """All the substrings of text up to GRAM_SIZE long"""
+        return {text[start:start + size] for size in range(1, NameIndex.GRAM_SIZE + 1) for start in range(len(text) - size + 1)}
+
+    def _positions(self, query):
+        """Positions of the names that contain query, in name order"""
+        if not query:
+            return range(len(self.documents))
+        if len(query) <= NameIndex.GRAM_SIZE:
+            return sorted(self._grams.get(query, ()))
+
+        # Names that contain every n-gram of the query are candidates, which are then checked
+        size = NameIndex.GRAM_SIZE
+        postings = sorted((self._grams.get(query[start:start + size], set()) for start in range(len(query) - size + 1)), key=len)
+        candidates = set.intersection(*postings)
+        return sorted(position for position in candidates if query in self._names[position])
+
+    def search(self, query, limit=None, after=None):
+        """Documents whose name contains query, ignoring case and matched literally, in name order after the (name, _id) key"""
+        positions = self._positions((query or "").casefold())
+        if after != None:
+            start = bisect_right(self._keys, tuple(after))
+            positions = positions[bisect_left(positions, start):]
+        if limit != None:
+            positions = positions[:limit]
+        return [self.documents[position] for position in positions]
+
+    def __len__(self):
+        return len(self.documents)
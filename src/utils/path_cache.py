@@ -0,0 +1,111 @@
+import hashlib
+import threading
+import time
+from bson import BSON, ObjectId
+from mentorhub_utils import MentorHub_Config, MentorHubMongoIO
+from src.config.curriculum_config import CurriculumConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+class PathCache:
+    """Process wide, versioned, cache of the paths catalog, used to hydrate paths stored by reference"""
+    _lock = threading.Lock()
+    _paths = {}         # path _id string -> cached path
+    _links = {}         # resource link -> {path _id string: resource}, so a link is resolved without reading _paths
+    _loaded_at = None   # time.monotonic() of the last load
+    version = 0         # incremented every time the catalog is loaded
+
+    @staticmethod
+    def _path_version(path):
+        """A content hash of a path document, that changes when the path is edited"""
+        return hashlib.blake2b(BSON.encode(path), digest_size=8).hexdigest()
+
+    @staticmethod
+    def _cache_path(path):
+        """Build the cached form of a path, with an index of its resources by link"""
+        resources = {}
+        for segment in path.get('segments', []):
+            for topic in segment.get('topics', []):
+                for resource in topic.get('resources', []):
+                    resources.setdefault(resource.get('link'), resource)
+        return {
+            "path": path,
+            "version": PathCache._path_version(path),
+            "resources": resources
+        }
+
+    @staticmethod
+    def _load():
+        """Load the paths catalog from the database"""
+        config = MentorHub_Config.get_instance()
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+
+        paths = {}
+        links = {}
+        for path in mentorhub_mongoIO.get_documents(config.PATHS_COLLECTION_NAME) or []:
+            path_id = str(path["_id"])
+            paths[path_id] = PathCache._cache_path(path)
+            for link, resource in paths[path_id]["resources"].items():
+                links.setdefault(link, {})[path_id] = resource
+
+        PathCache._paths = paths
+        PathCache._links = links
+        PathCache._loaded_at = time.monotonic()
+        PathCache.version += 1
+        logger.info("Path Cache version %s loaded %s paths", PathCache.version, len(paths))
+
+    @staticmethod
+    def _refresh():
+        """Reload the catalog if it has never been loaded, or has expired"""
+        ttl = CurriculumConfig.get_instance().PATH_CACHE_TTL_SECONDS
+        if PathCache._loaded_at != None and time.monotonic() - PathCache._loaded_at < ttl:
+            return
+        with PathCache._lock:
+            if PathCache._loaded_at == None or time.monotonic() - PathCache._loaded_at >= ttl:
+                PathCache._load()
+
+    @staticmethod
+    def get(path_id):
+        """Get the cached path, or None if there is no such path"""
+        PathCache._refresh()
+        return PathCache._paths.get(str(path_id))
+
+    @staticmethod
+    def load(path_id):
+        """
+        Read one path that is not in the cached catalog, such as a path created since it was loaded, and add it to
+        the catalog. Returns the cached path, or None if there is no such path.
+        """
+        config = MentorHub_Config.get_instance()
+        mentorhub_mongoIO = MentorHubMongoIO.get_instance()
+
+        if not ObjectId.is_valid(str(path_id)):
+            return None
+        path = mentorhub_mongoIO.get_document(config.PATHS_COLLECTION_NAME, str(path_id))
+        if path == None:
+            return None
+
+        # Readers use the catalog without the lock, so it is replaced rather than changed
+        cached = PathCache._cache_path(path)
+        with PathCache._lock:
+            paths = {**PathCache._paths, str(path_id): cached}
+            links = dict(PathCache._links)
+            for link, resource in cached["resources"].items():
+                links[link] = {**links.get(link, {}), str(path_id): resource}
+            PathCache._paths = paths
+            PathCache._links = links
+        logger.info("Path Cache added path %s", path_id)
+        return cached
+
+    @staticmethod
+    def resources_with(link):
+        """Get the (path _id, resource) of every path that includes the resource link, from one version of the catalog"""
+        PathCache._refresh()
+        return list(PathCache._links.get(link, {}).items())
+
+    @staticmethod
+    def invalidate():
+        """Discard the cached catalog, it will be reloaded when next used"""
+        with PathCache._lock:
+            PathCache._loaded_at = None
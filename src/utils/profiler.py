@@ -0,0 +1,127 @@
+import cProfile
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from flask import g, request
+from mentorhub_utils import create_token
+from src.config.curriculum_config import CurriculumConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+class RequestProfiler:
+    """
+    Profile a request with cProfile when PROFILE_REQUESTS is true and a Staff member asks for it with the
+    X-Profile: true header, at most once every PROFILE_INTERVAL_SECONDS in each process. The profile is
+    saved in PROFILE_FOLDER, and named in the X-Profile response header. Requests that take longer than
+    SLOW_REQUEST_MS are logged, with the time spent waiting for MongoDB.
+
+    cProfile profiles the whole OS thread, and gevent runs every request of a worker on one thread, switching
+    between them. So requests are not profiled when gevent has patched threading - use sync workers to profile.
+    """
+
+    HEADER = "X-Profile"
+
+    def __init__(self, app=None):
+        config = CurriculumConfig.get_instance()
+        self.enabled = config.PROFILE_REQUESTS == "true"
+        self.folder = config.PROFILE_FOLDER
+        self.interval = config.PROFILE_INTERVAL_SECONDS
+        self.slow_seconds = config.SLOW_REQUEST_MS / 1000
+        self.greenlets = RequestProfiler._gevent_patched()
+        self._lock = threading.Lock()
+        self._last_profile = None   # time.monotonic() of the last profile started
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Time, and when asked profile, the requests of the app"""
+        app.before_request(self.start)
+        app.after_request(self.finish)
+        app.teardown_request(self.teardown)
+
+    @staticmethod
+    def _gevent_patched():
+        """True when gevent has patched threading, so concurrent requests share an OS thread"""
+        try:
+            from gevent import monkey
+        except ImportError:
+            return False
+        return monkey.is_module_patched("threading")
+
+    @staticmethod
+    def profile_path(folder, name):
+        """The path of a saved profile, or None if the name is not one the profiler could have saved"""
+        if not re.fullmatch(r"[\w.-]+\.prof", name):
+            return None
+        return os.path.join(folder, name)
+
+    def _allowed(self):
+        """True if this request asked to be profiled, by a Staff member, and no other profile was started recently"""
+        if not self.enabled or request.headers.get(RequestProfiler.HEADER, "").lower() != "true":
+            return False
+        if "Staff" not in create_token().get("roles", []):
+            logger.warning("Profile requested without the Staff role")
+            return False
+        if self.greenlets:
+            logger.warning("Profile requested from a gevent worker, where it would include other requests, not profiled")
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._last_profile != None and now - self._last_profile < self.interval:
+                logger.info("Profile requested too soon after the last one, not profiled")
+                return False
+            self._last_profile = now
+        return True
+
+    def start(self):
+        """A before_request handler, that starts the request timer and the profiler"""
+        g.request_started = time.perf_counter()
+        g.mongo_seconds = 0
+        g.mongo_commands = 0
+        if self._allowed():
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                g.profile = profile
+            except ValueError as e:
+                # Another profiler is already running
+                logger.warning("Request could not be profiled: %s", e)
+
+    def _save(self, profile):
+        """Save a profile, named for the time and request, and return the name"""
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        endpoint = re.sub(r"[^\w-]+", "_", request.path).strip("_")
+        name = f"{stamp}-{request.method}-{endpoint}-{os.getpid()}.prof"
+        os.makedirs(self.folder, exist_ok=True)
+        profile.dump_stats(os.path.join(self.folder, name))
+        return name
+
+    def finish(self, response):
+        """An after_request handler, that saves the profile and logs slow requests"""
+        profile = g.pop("profile", None)
+        if profile != None:
+            profile.disable()
+            try:
+                name = self._save(profile)
+                response.headers[RequestProfiler.HEADER] = name
+                logger.info("Profile of %s %s saved as %s", request.method, request.path, name)
+            except OSError as e:
+                logger.warning("Failed to save profile: %s", e)
+
+        if self.slow_seconds > 0 and "request_started" in g:
+            elapsed = time.perf_counter() - g.request_started
+            if elapsed >= self.slow_seconds:
+                logger.warning(
+                    "Slow request %s %s %s took %.0fms, %.0fms in %s MongoDB commands and %.0fms in the API, returning %s bytes",
+                    request.method, request.full_path.rstrip('?'), response.status_code, elapsed * 1000,
+                    g.mongo_seconds * 1000, g.mongo_commands, (elapsed - g.mongo_seconds) * 1000, response.content_length)
+        return response
+
+    def teardown(self, error=None):
+        """Stop the profiler if the request failed before finish()"""
+        profile = g.pop("profile", None)
+        if profile != None:
+            profile.disable()
@@ -0,0 +1,53 @@
+import copy
+import threading
+
+class SingleFlight:
+    """Coalesce concurrent identical calls, so that callers with the same key share one in-flight call"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.followers = 0
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}    # key -> in-flight _Call
+
+    def do(self, key, function, copy_result=True):
+        """
+        Call function(), or wait for the in-flight call with the same key and return a deep copy of its result.
+        Results that are shared and never changed, such as cached values, need not be copied - pass copy_result=False.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call == None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error != None:
+                raise call.error
+            return copy.deepcopy(call.result) if copy_result else call.result
+
+        try:
+            result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                followers = call.followers
+            if followers and call.error == None:
+                # Followers copy a snapshot, so the leader is free to change its result
+                call.result = copy.deepcopy(result) if copy_result else result
+            call.done.set()
+        return result
+
+    def __len__(self):
+        return len(self._calls)
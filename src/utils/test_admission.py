@@ -0,0 +1,215 @@
+import threading
+import unittest
+from flask import Blueprint, Flask, g, jsonify
+from prometheus_client import REGISTRY
+from pymongo import _csot
+from pymongo.errors import AutoReconnect, NetworkTimeout, OperationFailure, ServerSelectionTimeoutError, WaitQueueTimeoutError
+from src.utils.admission import AdmissionControl, CircuitBreaker, Limiter, processing_error
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class TestLimiter(unittest.TestCase):
+
+    def test_limit_and_queue(self):
+        limiter = Limiter(2, 0)
+        self.assertEqual(limiter.acquire(0.01), "admitted")
+        self.assertEqual(limiter.acquire(0.01), "admitted")
+        self.assertEqual(limiter.acquire(0.01), "queue_full")
+        limiter.release()
+        self.assertEqual(limiter.acquire(0.01), "admitted")
+
+    def test_queue_timeout(self):
+        limiter = Limiter(1, 1)
+        limiter.acquire(0.01)
+        self.assertEqual(limiter.acquire(0.01), "queue_timeout")
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_release_admits_waiting(self):
+        limiter = Limiter(1, 1)
+        limiter.acquire(0.01)
+        outcomes = []
+        waiter = threading.Thread(target=lambda: outcomes.append(limiter.acquire(5)))
+        waiter.start()
+        while limiter.waiting == 0:
+            pass
+        limiter.release()
+        waiter.join()
+        self.assertEqual(outcomes, ["admitted"])
+        self.assertEqual(limiter.active, 1)
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_consecutive_timeouts(self):
+        breaker = CircuitBreaker(3, 60)
+        for timed_out in [True, True, False, True, True]:
+            self.assertEqual(breaker.allow(), "allowed")
+            self.assertEqual(breaker.record(timed_out), CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.allow(), "allowed")
+        self.assertEqual(breaker.record(True), CircuitBreaker.OPEN)
+        self.assertEqual(breaker.allow(), "open")
+        self.assertEqual(breaker.retry_after(), 60)
+
+    def test_only_the_trial_closes_it(self):
+        breaker = CircuitBreaker(1, 60)
+        breaker.record(True)
+
+        # Requests admitted before the breaker opened do not close it
+        self.assertEqual(breaker.record(False), CircuitBreaker.OPEN)
+        breaker.opened -= 60
+        self.assertEqual(breaker.allow(), "trial")
+        self.assertEqual(breaker.record(False), CircuitBreaker.HALF_OPEN)
+        self.assertEqual(breaker.allow(), "open")
+        self.assertEqual(breaker.record(False, trial=True), CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.allow(), "allowed")
+
+    def test_half_open_trial(self):
+        breaker = CircuitBreaker(1, 60)
+        breaker.allow()
+        breaker.record(True)
+        breaker.opened -= 60
+
+        # One trial request, that times out and opens the breaker again
+        self.assertEqual(breaker.allow(), "trial")
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(breaker.allow(), "open")
+        self.assertEqual(breaker.record(True, trial=True), CircuitBreaker.OPEN)
+        self.assertEqual(breaker.allow(), "open")
+
+        # A trial that did not use MongoDB is abandoned, and the next request is the trial
+        breaker.opened -= 60
+        self.assertEqual(breaker.allow(), "trial")
+        breaker.abandon_trial()
+        self.assertEqual(breaker.allow(), "trial")
+        self.assertEqual(breaker.record(False, trial=True), CircuitBreaker.CLOSED)
+
+class TestProcessingError(unittest.TestCase):
+
+    def test_timeouts(self):
+        with Flask(__name__).test_request_context():
+            for error in [ServerSelectionTimeoutError("No servers"), WaitQueueTimeoutError("Pool full"), NetworkTimeout("timed out"),
+                          OperationFailure("operation exceeded time limit", 50)]:
+                g.mongo_timeout = False
+                response = processing_error(error)
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.headers["Retry-After"], "1")
+                self.assertTrue(g.mongo_timeout)
+
+    def test_other_errors(self):
+        with Flask(__name__).test_request_context():
+            for error in [ValueError("not found"), AutoReconnect("connection reset"), OperationFailure("duplicate", 11000)]:
+                response, status = processing_error(error)
+                self.assertEqual(status, 500)
+                self.assertEqual(response.json, {"error": "A processing error occurred"})
+                self.assertNotIn("mongo_timeout", g)
+
+class TestAdmissionControl(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.admission = AdmissionControl()
+        self.admission.enabled = True
+        self.admission.queue_timeout = 0.01
+        self.admission.limiters["catalog"] = Limiter(1, 0)
+        self.admission.breakers["catalog"] = CircuitBreaker(2, 30)
+        self.admission.init_app(self.app)
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+        self.deadlines = []
+
+        paths = Blueprint('path_routes', __name__)
+        @paths.route('/')
+        def get_paths():
+            self.deadlines.append(_csot.get_timeout())
+            return jsonify([])
+        @paths.route('/slow')
+        def get_slow():
+            self.entered.set()
+            self.proceed.wait(5)
+            return jsonify([])
+        @paths.route('/timeout')
+        def get_timeout():
+            # No command event is published when no server can be selected
+            try:
+                raise ServerSelectionTimeoutError("No servers")
+            except Exception as e:
+                return processing_error(e)
+        @paths.route('/mongo')
+        def get_mongo():
+            g.mongo_commands += 1
+            return jsonify([])
+        self.app.register_blueprint(paths, url_prefix='/api/path')
+
+        @self.app.route('/api/config/')
+        def get_config():
+            return jsonify({})
+        self.client = self.app.test_client()
+
+    def test_admitted_with_deadline(self):
+        admitted = sample("admission_requests_total", route_class="catalog", outcome="admitted")
+        response = self.client.get('/api/path/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.deadlines, [self.admission.deadlines["catalog"]])
+        self.assertEqual(_csot.get_timeout(), None)
+        self.assertEqual(self.admission.limiters["catalog"].active, 0)
+        self.assertEqual(sample("admission_requests_total", route_class="catalog", outcome="admitted"), admitted + 1)
+
+    def test_rejected_when_saturated(self):
+        rejected = sample("admission_requests_total", route_class="catalog", outcome="queue_full")
+        slow = threading.Thread(target=lambda: self.client.get('/api/path/slow'))
+        slow.start()
+        self.entered.wait(5)
+
+        response = self.client.get('/api/path/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(self.client.get('/api/config/').status_code, 200)
+
+        self.proceed.set()
+        slow.join()
+        self.assertEqual(self.client.get('/api/path/').status_code, 200)
+        self.assertEqual(sample("admission_requests_total", route_class="catalog", outcome="queue_full"), rejected + 1)
+
+    def test_mongo_timeouts_open_the_breaker(self):
+        for i in range(2):
+            response = self.client.get('/api/path/timeout')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json, {"error": "The database did not respond in time, try again later"})
+        self.assertEqual(sample("circuit_breaker_state", route_class="catalog"), CircuitBreaker.OPEN)
+
+        response = self.client.get('/api/path/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "30")
+        self.assertEqual(self.deadlines, [])
+        self.assertEqual(self.admission.limiters["catalog"].active, 0)
+
+    def test_cached_requests_are_not_recorded(self):
+        breaker = self.admission.breakers["catalog"]
+        self.client.get('/api/path/timeout')
+        self.client.get('/api/path/')
+        self.assertEqual(breaker.timeouts, 1)
+        self.client.get('/api/path/mongo')
+        self.assertEqual(breaker.timeouts, 0)
+
+    def test_trial_request(self):
+        breaker = self.admission.breakers["catalog"]
+        self.client.get('/api/path/timeout')
+        self.client.get('/api/path/timeout')
+        breaker.opened -= 30
+
+        # A trial that is served from the cache leaves the breaker half open, one that uses MongoDB closes it
+        self.assertEqual(self.client.get('/api/path/').status_code, 200)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.trial)
+        self.assertEqual(self.client.get('/api/path/mongo').status_code, 200)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_disabled(self):
+        app = Flask(__name__)
+        admission = AdmissionControl()
+        admission.enabled = False
+        admission.init_app(app)
+        self.assertEqual(app.before_request_funcs, {})
+
+if __name__ == '__main__':
+    unittest.main()
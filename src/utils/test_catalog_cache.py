@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from prometheus_client import REGISTRY
+from src.utils.catalog_cache import CatalogCache
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        CatalogCache.invalidate()
+
+    def tearDown(self):
+        CatalogCache.invalidate()
+
+    def _count(self, collection, result):
+        return REGISTRY.get_sample_value('catalog_cache_requests_total', {"collection": collection, "result": result}) or 0
+
+    def test_get_counts_hits_and_misses(self):
+        hits = self._count("test_paths", "hit")
+        misses = self._count("test_paths", "miss")
+        load = MagicMock(return_value=[{"name": "A Path"}])
+
+        self.assertEqual(CatalogCache.get("test_paths", ("list", ""), load), [{"name": "A Path"}])
+        self.assertEqual(CatalogCache.get("test_paths", ("list", ""), load), [{"name": "A Path"}])
+        load.assert_called_once()
+        self.assertEqual(self._count("test_paths", "hit"), hits + 1)
+        self.assertEqual(self._count("test_paths", "miss"), misses + 1)
+
+    def test_not_found_is_cached(self):
+        load = MagicMock(return_value=None)
+        self.assertIsNone(CatalogCache.get("test_paths", ("document", "x"), load))
+        self.assertIsNone(CatalogCache.get("test_paths", ("document", "x"), load))
+        load.assert_called_once()
+
+    def test_get_many(self):
+        hits = self._count("test_paths", "hit")
+        misses = self._count("test_paths", "miss")
+        CatalogCache.get("test_paths", "a", lambda: "A")
+        load = MagicMock(return_value={"b": "B"})
+
+        # The misses are loaded together, and not found values are cached
+        self.assertEqual(CatalogCache.get_many("test_paths", ["c", "a", "b"], load), [None, "A", "B"])
+        load.assert_called_once_with(["c", "b"])
+        self.assertEqual(CatalogCache.get_many("test_paths", ["b", "c"], load), ["B", None])
+        load.assert_called_once()
+        self.assertEqual(self._count("test_paths", "hit"), hits + 3)
+        self.assertEqual(self._count("test_paths", "miss"), misses + 3)
+
+    def test_invalidate_one_collection(self):
+        paths = MagicMock(return_value=["path"])
+        topics = MagicMock(return_value=["topic"])
+        CatalogCache.get("test_paths", "key", paths)
+        CatalogCache.get("test_topics", "key", topics)
+
+        CatalogCache.invalidate("test_paths")
+        CatalogCache.get("test_paths", "key", paths)
+        CatalogCache.get("test_topics", "key", topics)
+        self.assertEqual(paths.call_count, 2)
+        self.assertEqual(topics.call_count, 1)
+
+    @patch('src.utils.catalog_cache.PathCache')
+    def test_apply_changes(self, mock_path_cache):
+        load = MagicMock(return_value=["topic"])
+        CatalogCache.get("topics", "key", load)
+
+        # A local stand-in for the change stream
+        CatalogCache.apply_changes("topics", [{"operationType": "update", "documentKey": {"_id": "x"}}])
+        CatalogCache.get("topics", "key", load)
+        self.assertEqual(load.call_count, 2)
+        mock_path_cache.invalidate.assert_not_called()
+
+        # Path changes also reload the catalog used to hydrate curricula
+        CatalogCache.apply_changes("paths", [{"operationType": "insert"}])
+        mock_path_cache.invalidate.assert_called_once()
+
+    @patch('src.utils.catalog_cache.threading.Thread')
+    def test_watch_started_once(self, mock_thread):
+        CatalogCache.watch("test_watched")
+        CatalogCache.watch("test_watched")
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+        del CatalogCache._watchers["test_watched"]
+
+if __name__ == '__main__':
+    unittest.main()
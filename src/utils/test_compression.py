@@ -0,0 +1,108 @@
+import gzip
+import os
+import unittest
+import zlib
+from unittest.mock import patch
+from flask import Flask, Response, jsonify
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.compression import Compression
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        CurriculumConfig._instance = None
+        self.large = {"resources": [{"link": f"https://example.com/resources/{i}"} for i in range(100)]}
+        app = Flask(__name__)
+
+        @app.route('/large')
+        def large():
+            response = jsonify(self.large)
+            response.set_etag("abc123")
+            return response
+
+        @app.route('/small')
+        def small():
+            return jsonify({"ok": True})
+
+        @app.route('/stream')
+        def stream():
+            return Response((f'"{i}",' for i in range(1000)), mimetype="application/json")
+
+        @app.route('/api/health/')
+        def health():
+            return Response("metric 1\n" * 1000, mimetype="text/plain")
+
+        @app.route('/image')
+        def image():
+            return Response(b"\x00" * 10000, mimetype="image/png")
+
+        self.compression = Compression(app, skip_paths=['/api/health/'])
+        self.client = app.test_client()
+
+    def tearDown(self):
+        CurriculumConfig._instance = None
+
+    def test_gzip(self):
+        response = self.client.get('/large', headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["ETag"], 'W/"abc123"')
+        self.assertEqual(int(response.headers["Content-Length"]), len(response.data))
+        self.assertEqual(gzip.decompress(response.data), jsonify_bytes(self.large))
+
+    def test_not_accepted(self):
+        for accept in [None, "identity", "gzip;q=0", "deflate"]:
+            response = self.client.get('/large', headers={"Accept-Encoding": accept} if accept else {})
+            self.assertNotIn("Content-Encoding", response.headers)
+            self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+            self.assertEqual(response.headers["ETag"], '"abc123"')
+
+    def test_best_match(self):
+        self.compression.encodings = ["br", "gzip"]
+        with patch.object(Compression, "compress_data", side_effect=lambda encoding, data: encoding.encode()):
+            self.assertEqual(self.client.get('/large', headers={"Accept-Encoding": "gzip, br"}).data, b"br")
+            self.assertEqual(self.client.get('/large', headers={"Accept-Encoding": "gzip, br;q=0.5"}).data, b"gzip")
+            self.assertEqual(self.client.get('/large', headers={"Accept-Encoding": "*"}).data, b"br")
+
+    def test_below_min_size(self):
+        response = self.client.get('/small', headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.json, {"ok": True})
+
+    def test_stream(self):
+        response = self.client.get('/stream', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(gzip.decompress(response.data).decode(), "".join(f'"{i}",' for i in range(1000)))
+
+    def test_stream_flushes_each_chunk(self):
+        chunks = Compression.compress_stream("gzip", iter([b"first", b"second"]))
+        decompressor = zlib.decompressobj(31)
+        self.assertEqual(decompressor.decompress(next(chunks)), b"first")
+        self.assertEqual(decompressor.decompress(next(chunks)), b"second")
+
+    def test_skipped(self):
+        for path in ['/api/health/', '/image']:
+            response = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            self.assertNotIn("Content-Encoding", response.headers)
+            self.assertNotIn("Vary", response.headers)
+
+    @patch.dict(os.environ, {"COMPRESSION_ENCODINGS": "none", "COMPRESSION_MIN_SIZE": "10"})
+    def test_config(self):
+        CurriculumConfig._instance = None
+        compression = Compression()
+        self.assertEqual(compression.encodings, [])
+        self.assertEqual(compression.min_size, 10)
+
+    @patch.dict(os.environ, {"COMPRESSION_ENCODINGS": "unknown, gzip"})
+    def test_unavailable_encodings(self):
+        CurriculumConfig._instance = None
+        self.assertEqual(Compression().encodings, ["gzip"])
+
+def jsonify_bytes(obj):
+    app = Flask(__name__)
+    with app.app_context():
+        return app.json.response(obj).get_data()
+
+if __name__ == '__main__':
+    unittest.main()
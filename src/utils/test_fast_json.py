@@ -0,0 +1,70 @@
+import random
+import unittest
+from datetime import date, datetime, timezone
+from bson import Int64, ObjectId
+from flask import Flask
+from mentorhub_utils import MongoJSONEncoder
+from src.utils import fast_json
+from src.utils.fast_json import FastMongoJSONProvider
+
+@unittest.skipIf(fast_json.orjson == None, "orjson is not installed")
+class TestFastMongoJSONProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.fast = FastMongoJSONProvider(self.app)
+        self.default = MongoJSONEncoder(self.app)
+
+    def assertIdentical(self, obj):
+        with self.app.app_context():
+            self.assertEqual(self.fast.response(obj).get_data(), self.default.response(obj).get_data())
+
+    def test_curriculum(self):
+        breadcrumb = {"atTime": datetime(2024, 8, 1, 12, 0, 0, 123000), "byUser": ObjectId("aaaa00000000000000000001"), "fromIp": "127.0.0.1", "correlationId": "aaaa-aaaa"}
+        self.assertIdentical({
+            "_id": ObjectId("5f3e9a000000000000000001"),
+            "completed": [{"name": "Résumé Writing 📝", "link": "https://x.com/a?b=1&c=\"2\"", "completed": datetime(2024, 1, 1), "rating": 4.5, "review": "Nice\n\tDone\x7f"}],
+            "now": [],
+            "next": [{"path": "Odin", "segments": [{"segment": "HTML", "topics": [{"topic": "Intro", "resources": [{"name": "a", "link": "b", "count": Int64(5)}]}]}]}],
+            "lastSaved": breadcrumb
+        })
+
+    def test_values_encoded_by_default(self):
+        self.assertIdentical([date(2024, 1, 1), datetime(2024, 1, 1, tzinfo=timezone.utc), {1, 2}, b"bytes", (1, 2), None, True])
+
+    def test_escapes(self):
+        self.assertIdentical({"a": "é – 😀 \x7f", "b": "C:\\Users\\xe9 😀"})
+        self.assertIdentical({"a": "é", "b": "\\x41 \\U0001f600"})
+        self.assertIdentical(["1e5,", "e-10]", "0.00001"])
+
+    def test_floats(self):
+        self.assertIdentical([0.1, 4.5, -0.0, 100.0, 1e15, 9999999999999998.0, 0.0001, 0.00012])
+        for value in [1e16, 1.5e-5, 2.5e-7, 1e300, 5e-324, -1e22, [{"a": 1e-10}]]:
+            self.assertIdentical(value)
+            self.assertIdentical({"value": value})
+
+    def test_unsupported_by_orjson(self):
+        self.assertIdentical({"big": 2 ** 70})
+        self.assertIdentical({"b": {1: "int key", 2: "int key"}})
+
+    def test_random_documents(self):
+        generator = random.Random(42)
+        def value(depth):
+            kind = generator.randrange(10 if depth < 4 else 6)
+            if kind == 0: return generator.choice(["", "plain", "ünï", "emoji 😀", "quote \" \\ /", "ctrl \x00\x1f", "1e5", "0.0000"])
+            if kind == 1: return generator.randint(-2 ** 63, 2 ** 63 - 1)
+            if kind == 2: return generator.uniform(-1e6, 1e6) * 10 ** generator.randint(-20, 20)
+            if kind == 3: return ObjectId()
+            if kind == 4: return datetime(2024, 1, 1, 0, 0, generator.randrange(60), generator.randrange(1000000))
+            if kind == 5: return generator.choice([None, True, False])
+            if kind < 8: return [value(depth + 1) for i in range(generator.randrange(4))]
+            return {generator.choice(["a", "B", "é", "z", "_id", "now"]) + str(i): value(depth + 1) for i in range(generator.randrange(4))}
+        for i in range(300):
+            self.assertIdentical(value(0))
+
+    def test_indented_in_debug(self):
+        self.app.debug = True
+        self.assertIdentical({"b": [1, {"c": ObjectId("aaaa00000000000000000001")}], "a": {}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import json
+import logging
+import queue
+import sys
+import unittest
+from flask import Flask
+from prometheus_client import REGISTRY
+from src.utils.log_queue import DroppingQueueHandler, JsonFormatter, LogQueue, TextFormatter
+
+BREADCRUMB = {"atTime": "2024-01-01T00:00:00", "byUser": "aaaa00000000000000000001", "fromIp": "127.0.0.1", "correlationId": "abc-123"}
+
+def record(message, *args, **extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+class TestFormatters(unittest.TestCase):
+
+    def test_json(self):
+        entry = json.loads(JsonFormatter().format(record("Get %s", "Curriculum", breadcrumb=BREADCRUMB, correlationId="abc-123")))
+        self.assertEqual(entry["message"], "Get Curriculum")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["correlationId"], "abc-123")
+        self.assertEqual(entry["byUser"], "aaaa00000000000000000001")
+        self.assertEqual(entry["fromIp"], "127.0.0.1")
+
+    def test_json_without_breadcrumb(self):
+        entry = json.loads(JsonFormatter().format(record("Started")))
+        self.assertEqual(entry["message"], "Started")
+        self.assertEqual(entry["correlationId"], "")
+
+    def test_text(self):
+        self.assertEqual(TextFormatter().format(record("Get Curriculum", breadcrumb=BREADCRUMB)), f"INFO:test:Get Curriculum {BREADCRUMB}")
+        self.assertEqual(TextFormatter().format(record("Started")), "INFO:test:Started")
+
+class TestDroppingQueueHandler(unittest.TestCase):
+
+    def test_lazy_formatting(self):
+        handler = DroppingQueueHandler(queue.SimpleQueue(), 10)
+        handler.emit(record("Now %s", ["a", "b"]))
+        queued = handler.queue.get_nowait()
+        self.assertEqual(queued.msg, "Now %s")
+        self.assertEqual(queued.args, (["a", "b"],))
+
+    def test_correlation_id(self):
+        handler = DroppingQueueHandler(queue.SimpleQueue(), 10)
+        handler.emit(record("Get", breadcrumb=BREADCRUMB))
+        self.assertEqual(handler.queue.get_nowait().correlationId, "abc-123")
+
+        with Flask(__name__).test_request_context(headers={"X-Correlation-Id": "from-header"}):
+            handler.emit(record("Failed"))
+        self.assertEqual(handler.queue.get_nowait().correlationId, "from-header")
+
+    def test_exception(self):
+        handler = DroppingQueueHandler(queue.SimpleQueue(), 10)
+        try:
+            raise ValueError("failed")
+        except ValueError:
+            failed = logging.LogRecord("test", logging.ERROR, __file__, 1, "Failed", None, sys.exc_info())
+        handler.emit(failed)
+        queued = handler.queue.get_nowait()
+        self.assertIsNone(queued.exc_info)
+        self.assertIn("ValueError: failed", queued.exc_text)
+
+    def test_drops_when_full(self):
+        dropped = REGISTRY.get_sample_value("log_records_dropped_total", {"level": "INFO"}) or 0
+        handler = DroppingQueueHandler(queue.SimpleQueue(), 2)
+        for i in range(5):
+            handler.emit(record(f"Message {i}"))
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(REGISTRY.get_sample_value("log_records_dropped_total", {"level": "INFO"}), dropped + 3)
+
+class TestLogQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.handlers, self.level = self.root.handlers[:], self.root.level
+
+    def tearDown(self):
+        LogQueue.stop()
+        for handler in self.handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.level)
+
+    def test_writes_in_background(self):
+        stream = io.StringIO()
+        LogQueue.start("json", 100, stream=stream)
+        logging.getLogger("test.log_queue").info("Get Curriculum", extra={"breadcrumb": BREADCRUMB})
+        logging.getLogger("test.log_queue").debug("Not logged")
+        self.assertEqual(self.root.handlers, [LogQueue.handler])
+        self.assertEqual(LogQueue.thread.name, "log-writer")
+
+        handler = LogQueue.handler
+        LogQueue.stop()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["correlationId"], "abc-123")
+        self.assertNotIn(handler, self.root.handlers)
+
+    def test_restart(self):
+        stream = io.StringIO()
+        LogQueue.start("text", 100, stream=stream)
+        thread = LogQueue.thread
+        LogQueue.restart()
+        self.assertIsNot(LogQueue.thread, thread)
+        self.assertFalse(thread.is_alive())
+
+        logging.getLogger("test.log_queue").warning("Restarted")
+        LogQueue.stop()
+        self.assertEqual(stream.getvalue(), "WARNING:test.log_queue:Restarted\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from bson import ObjectId
+from mentorhub_utils import MentorHub_Config
+from src.utils.mentor_cache import MentorCache
+
+class TestMentorCache(unittest.TestCase):
+
+    def setUp(self):
+        MentorCache.invalidate()
+
+    def tearDown(self):
+        MentorCache.invalidate()
+
+    @patch('src.utils.mentor_cache.MongoIO')
+    def test_get_mentor_id_cached(self, mock_mongo_io_class):
+        config = MentorHub_Config.get_instance()
+        mock_mongo_io_class.get_document.return_value = {"_id": ObjectId("000000000000000000000001"), "mentorId": "000000000000000000000012"}
+
+        # Only the mentorId is read, and only once
+        self.assertEqual(MentorCache.get_mentor_id("000000000000000000000001"), "000000000000000000000012")
+        self.assertEqual(MentorCache.get_mentor_id("000000000000000000000001"), "000000000000000000000012")
+        mock_mongo_io_class.get_document.assert_called_once_with(config.PEOPLE_COLLECTION_NAME, "000000000000000000000001", {"mentorId": 1})
+
+    @patch('src.utils.mentor_cache.MongoIO')
+    def test_get_mentor_id_not_found(self, mock_mongo_io_class):
+        mock_mongo_io_class.get_document.return_value = None
+
+        self.assertIsNone(MentorCache.get_mentor_id("000000000000000000000001"))
+        self.assertIsNone(MentorCache.get_mentor_id("000000000000000000000001"))
+        mock_mongo_io_class.get_document.assert_called_once()
+
+    @patch('src.utils.mentor_cache.MongoIO')
+    def test_apply_changes(self, mock_mongo_io_class):
+        mock_mongo_io_class.get_document.side_effect = [
+            {"mentorId": "000000000000000000000012"},
+            {"mentorId": "000000000000000000000034"}
+        ]
+        self.assertEqual(MentorCache.get_mentor_id("AAAA00000000000000000001"), "000000000000000000000012")
+
+        # A local stand-in for the change stream, reassigning the mentor
+        MentorCache.apply_changes([
+            {"operationType": "update", "documentKey": {"_id": ObjectId("aaaa00000000000000000001")}},
+            {"operationType": "invalidate"}
+        ])
+        self.assertEqual(MentorCache.get_mentor_id("aaaa00000000000000000001"), "000000000000000000000034")
+        self.assertEqual(mock_mongo_io_class.get_document.call_count, 2)
+
+    @patch('src.utils.mentor_cache.threading.Thread')
+    def test_watch_started_once(self, mock_thread):
+        MentorCache._watcher = None
+        MentorCache.watch()
+        MentorCache.watch()
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+        MentorCache._watcher = None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from datetime import timedelta
+from prometheus_client import REGISTRY
+from pymongo.monitoring import CommandFailedEvent, CommandStartedEvent, CommandSucceededEvent
+from src.utils.metrics import MongoMetrics, timed
+
+ADDRESS = ("localhost", 27017)
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class Service:
+    @staticmethod
+    @timed
+    def method(fail=False):
+        if fail:
+            raise ValueError("failed")
+        return "result"
+
+class TestTimed(unittest.TestCase):
+
+    def test_timed(self):
+        labels = {"service": "Service", "method": "method"}
+        successes = sample("service_method_seconds_count", outcome="success", **labels)
+        failures = sample("service_method_seconds_count", outcome="failure", **labels)
+
+        self.assertEqual(Service.method(), "result")
+        with self.assertRaises(ValueError):
+            Service.method(fail=True)
+
+        self.assertEqual(sample("service_method_seconds_count", outcome="success", **labels), successes + 1)
+        self.assertEqual(sample("service_method_seconds_count", outcome="failure", **labels), failures + 1)
+        self.assertEqual(Service.method.__name__, "method")
+
+class TestMongoMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = MongoMetrics()
+        self.request_id = 0
+
+    def _run(self, command, reply=None, failure=None, duration=timedelta(milliseconds=3)):
+        self.request_id += 1
+        command_name = next(iter(command))
+        self.listener.started(CommandStartedEvent(command, "mentorhub", self.request_id, ADDRESS, None))
+        if failure:
+            self.listener.failed(CommandFailedEvent(duration, failure, command_name, self.request_id, ADDRESS, None))
+        else:
+            self.listener.succeeded(CommandSucceededEvent(duration, reply or {"ok": 1}, command_name, self.request_id, ADDRESS, None))
+
+    def test_find(self):
+        operations = sample("mongo_operation_seconds_count", collection="test_paths", operation="find", outcome="success")
+        reads = sample("mongo_document_bytes_count", collection="test_paths", direction="read")
+
+        # Reads are timed, but the documents are not measured
+        self._run({"find": "test_paths", "filter": {}}, {"cursor": {"firstBatch": [{"name": "a"}], "id": 0}, "ok": 1})
+
+        self.assertEqual(sample("mongo_operation_seconds_count", collection="test_paths", operation="find", outcome="success"), operations + 1)
+        self.assertEqual(sample("mongo_document_bytes_count", collection="test_paths", direction="read"), reads)
+        self.assertEqual(self.listener._collections, {})
+
+    def test_get_more(self):
+        operations = sample("mongo_operation_seconds_count", collection="test_paths", operation="getMore", outcome="success")
+        self._run({"getMore": 1234, "collection": "test_paths"}, {"cursor": {"nextBatch": [{"name": "c"}], "id": 0}, "ok": 1})
+        self.assertEqual(sample("mongo_operation_seconds_count", collection="test_paths", operation="getMore", outcome="success"), operations + 1)
+
+    def test_find_and_modify(self):
+        reads = sample("mongo_document_bytes_count", collection="test_curriculum", direction="read")
+        writes = sample("mongo_document_bytes_count", collection="test_curriculum", direction="write")
+
+        # Pipeline updates are not measured, the updated document is
+        self._run({"findAndModify": "test_curriculum", "update": [{"$set": {"now": []}}]}, {"value": {"now": []}, "ok": 1})
+        self._run({"findAndModify": "test_curriculum", "update": {"$set": {"now": []}}}, {"value": None, "ok": 1})
+
+        self.assertEqual(sample("mongo_document_bytes_count", collection="test_curriculum", direction="read"), reads + 1)
+        self.assertEqual(sample("mongo_document_bytes_count", collection="test_curriculum", direction="write"), writes + 1)
+
+    def test_insert(self):
+        writes = sample("mongo_document_bytes_count", collection="test_people", direction="write")
+        self._run({"insert": "test_people", "documents": [{"a": 1}, {"b": 2}]})
+        self.assertEqual(sample("mongo_document_bytes_count", collection="test_people", direction="write"), writes + 2)
+
+    def test_sampled(self):
+        self.listener = MongoMetrics(sample_every=3)
+        writes = sample("mongo_document_bytes_count", collection="test_sampled", direction="write")
+        reads = sample("mongo_document_bytes_count", collection="test_sampled", direction="read")
+        operations = sample("mongo_operation_seconds_count", collection="test_sampled", operation="findAndModify", outcome="success")
+
+        # Every command is timed, one in three is measured, both the update and the document it returns
+        for i in range(6):
+            self._run({"findAndModify": "test_sampled", "update": {"$set": {"i": i}}}, {"value": {"i": i}, "ok": 1})
+        self.assertEqual(sample("mongo_document_bytes_count", collection="test_sampled", direction="write"), writes + 2)
+        self.assertEqual(sample("mongo_document_bytes_count", collection="test_sampled", direction="read"), reads + 2)
+        self.assertEqual(sample("mongo_operation_seconds_count", collection="test_sampled", operation="findAndModify", outcome="success"), operations + 6)
+
+    def test_failed(self):
+        failures = sample("mongo_operation_seconds_count", collection="test_people", operation="find", outcome="failure")
+        self._run({"find": "test_people"}, failure={"errmsg": "timed out"})
+        self.assertEqual(sample("mongo_operation_seconds_count", collection="test_people", operation="find", outcome="failure"), failures + 1)
+        self.assertEqual(self.listener._collections, {})
+
+    def test_no_collection(self):
+        operations = sample("mongo_operation_seconds_count", collection="", operation="ping", outcome="success")
+        self._run({"ping": 1})
+        self.assertEqual(sample("mongo_operation_seconds_count", collection="", operation="ping", outcome="success"), operations + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from mentorhub_utils import MentorHub_Config
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.mongo_io import MongoIO, RoutedDatabase
+
+class TestMongoIO(unittest.TestCase):
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_document_success(self, mock_get_instance):
+        # Mock the MongoIO collection
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_collection = mock_mongo_io.db.get_collection.return_value
+        mock_collection.find_one.return_value = {"foo": "bar"}
+
+        document = MongoIO.get_document("collection", "aaaa00000000000000000001", {"secret": 0})
+        self.assertEqual(document, {"foo": "bar"})
+        mock_collection.find_one.assert_called_once_with({"_id": ObjectId("aaaa00000000000000000001")}, {"secret": 0})
+        mock_mongo_io.db.get_collection.assert_called_once_with("collection", read_preference=None)
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_document_from_primary(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+
+        # Preconditions are read from the primary, whatever the read preference of the collection
+        MongoIO.get_document("collection", "aaaa00000000000000000001", {"lastSaved": 1}, primary=True)
+        mock_mongo_io.db.get_collection.assert_called_once_with("collection", read_preference=Primary())
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_find_one_and_update_success(self, mock_get_instance):
+        # Mock the MongoIO collection
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_collection = mock_mongo_io.db.get_collection.return_value
+        mock_collection.find_one_and_update.return_value = {"foo": "bar"}
+
+        document = MongoIO.find_one_and_update("collection", "aaaa00000000000000000001", [{"$set": {"a": 1}}], {"b": 2})
+        self.assertEqual(document, {"foo": "bar"})
+        mock_mongo_io.db.get_collection.assert_called_once_with("collection")
+        mock_collection.find_one_and_update.assert_called_once_with(
+            {"b": 2, "_id": ObjectId("aaaa00000000000000000001")},
+            [{"$set": {"a": 1}}],
+            projection=None,
+            upsert=False,
+            array_filters=None,
+            return_document=ReturnDocument.AFTER
+        )
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_find_one_and_update_not_connected(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_mongo_io.connected = False
+        mock_get_instance.return_value = mock_mongo_io
+
+        document = MongoIO.find_one_and_update("collection", "aaaa00000000000000000001", {"$set": {"a": 1}})
+        self.assertIsNone(document)
+        mock_mongo_io.db.get_collection.assert_not_called()
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_find_one_and_update_error(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.db.get_collection.return_value.find_one_and_update.side_effect = Exception("boom")
+
+        with self.assertRaises(Exception):
+            MongoIO.find_one_and_update("collection", "aaaa00000000000000000001", {"$set": {"a": 1}})
+
+    @patch('src.utils.mongo_io.MongoClient')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_reconnect(self, mock_get_instance, mock_mongo_client):
+        config = MentorHub_Config.get_instance()
+        mock_mongo_io = MagicMock(connected=False)
+        inherited = mock_mongo_io.client
+        mock_get_instance.return_value = mock_mongo_io
+
+        # A new pooled client replaces the one inherited from the parent, which is not closed
+        MongoIO.reconnect()
+        mock_mongo_client.assert_called_once_with(config.MONGO_CONNECTION_STRING, maxPoolSize=CurriculumConfig.get_instance().MONGO_MAX_POOL_SIZE, serverSelectionTimeoutMS=2000, socketTimeoutMS=5000)
+        self.assertIs(mock_mongo_io.client, mock_mongo_client.return_value)
+        self.assertIs(mock_mongo_io.db.database, mock_mongo_client.return_value.get_database.return_value)
+        mock_mongo_client.return_value.get_database.assert_called_once_with(config.MONGO_DB_NAME)
+        self.assertTrue(mock_mongo_io.connected)
+        inherited.close.assert_not_called()
+
+    @patch('src.utils.mongo_io.MongoClient')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_reconnect_closes_own_client(self, mock_get_instance, mock_mongo_client):
+        mock_mongo_io = MagicMock(connected=True)
+        connected = mock_mongo_io.client
+        mock_get_instance.return_value = mock_mongo_io
+
+        # A worker that connected when it loaded the app closes that client
+        MongoIO.reconnect(close=True)
+        connected.close.assert_called_once()
+        self.assertIs(mock_mongo_io.client, mock_mongo_client.return_value)
+
+class TestReadRouting(unittest.TestCase):
+
+    def setUp(self):
+        MongoIO._read_preferences = None
+
+    def tearDown(self):
+        MongoIO._read_preferences = None
+
+    def test_default_read_preferences(self):
+        config = MentorHub_Config.get_instance()
+        self.assertEqual(MongoIO.read_preference(config.PATHS_COLLECTION_NAME), SecondaryPreferred(max_staleness=90))
+        self.assertEqual(MongoIO.read_preference(config.TOPICS_COLLECTION_NAME), SecondaryPreferred(max_staleness=90))
+
+        # Curricula are always read from the client's primary
+        self.assertIsNone(MongoIO.read_preference(config.CURRICULUM_COLLECTION_NAME))
+        self.assertIsNone(MongoIO.read_preference(config.PEOPLE_COLLECTION_NAME))
+
+    def test_make_read_preference(self):
+        self.assertEqual(MongoIO._make_read_preference("nearest", 120).document, {"mode": "nearest", "maxStalenessSeconds": 120})
+        self.assertEqual(MongoIO._make_read_preference("secondary", 0).document, {"mode": "secondary"})
+        self.assertEqual(MongoIO._make_read_preference("primary", 90), Primary())
+        self.assertEqual(MongoIO._make_read_preference("secondaries", 90), Primary())
+
+    def test_routed_database(self):
+        config = MentorHub_Config.get_instance()
+        database = MagicMock()
+        routed = RoutedDatabase(database)
+
+        routed.get_collection(config.PATHS_COLLECTION_NAME)
+        database.get_collection.assert_called_with(config.PATHS_COLLECTION_NAME, None, SecondaryPreferred(max_staleness=90), None, None)
+        routed[config.PEOPLE_COLLECTION_NAME]
+        database.get_collection.assert_called_with(config.PEOPLE_COLLECTION_NAME, None, None, None, None)
+        routed.get_collection(config.PATHS_COLLECTION_NAME, read_preference=Primary())
+        database.get_collection.assert_called_with(config.PATHS_COLLECTION_NAME, None, Primary(), None, None)
+        self.assertIs(routed.name, database.name)
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_route_reads(self, mock_get_instance):
+        mock_mongo_io = MagicMock(connected=True)
+        database = mock_mongo_io.db
+        mock_get_instance.return_value = mock_mongo_io
+
+        MongoIO.route_reads()
+        MongoIO.route_reads()
+        self.assertIsInstance(mock_mongo_io.db, RoutedDatabase)
+        self.assertIs(mock_mongo_io.db.database, database)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from src.utils.name_index import NameIndex
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.documents = [
+            {"_id": "4", "name": "Intermediate HTML and CSS"},
+            {"_id": "1", "name": "Foundations"},
+            {"_id": "3", "name": "Full Stack JavaScript"},
+            {"_id": "2", "name": "Full Stack Ruby on Rails"},
+            {"_id": "5"}
+        ]
+        self.index = NameIndex(self.documents)
+
+    def names(self, documents):
+        return [document.get("name") for document in documents]
+
+    def test_empty_query_lists_in_name_order(self):
+        self.assertEqual(self.names(self.index.search("")), [None, "Foundations", "Full Stack JavaScript", "Full Stack Ruby on Rails", "Intermediate HTML and CSS"])
+        self.assertEqual(self.names(self.index.search(None, 2)), [None, "Foundations"])
+        self.assertEqual(len(self.index), 5)
+
+    def test_short_queries(self):
+        self.assertEqual(self.names(self.index.search("f")), ["Foundations", "Full Stack JavaScript", "Full Stack Ruby on Rails"])
+        self.assertEqual(self.names(self.index.search("CSS")), ["Intermediate HTML and CSS"])
+        self.assertEqual(self.names(self.index.search("zz")), [])
+
+    def test_long_queries(self):
+        self.assertEqual(self.names(self.index.search("full stack")), ["Full Stack JavaScript", "Full Stack Ruby on Rails"])
+        self.assertEqual(self.names(self.index.search("stack ruby")), ["Full Stack Ruby on Rails"])
+        self.assertEqual(self.names(self.index.search("Full Stack", 1)), ["Full Stack JavaScript"])
+
+        # Every n-gram matches, but not as one substring
+        self.assertEqual(self.names(self.index.search("stackstack")), [])
+
+    def test_queries_are_literal(self):
+        index = NameIndex([{"_id": "1", "name": "C++ (Part 1)"}, {"_id": "2", "name": "Cpp Part 1"}])
+        self.assertEqual(self.names(index.search("c++ (")), ["C++ (Part 1)"])
+        self.assertEqual(self.names(index.search("^c")), [])
+        self.assertEqual(self.names(index.search(".")), [])
+
+    def test_keyset_pages(self):
+        index = NameIndex([{"_id": str(number), "name": "Same Name" if number < 4 else f"Name {number}"} for number in range(8)])
+        pages = []
+        after = None
+        while True:
+            page = index.search("name", 3, after)
+            pages.append([document["_id"] for document in page])
+            if len(page) < 3:
+                break
+            after = NameIndex.decode_cursor(NameIndex.cursor(page[-1]))
+        self.assertEqual(pages, [["4", "5", "6"], ["7", "0", "1"], ["2", "3"]])
+
+        # Paging works with filtered results too
+        self.assertEqual(self.names(self.index.search("full", None, ("Full Stack JavaScript", "3"))), ["Full Stack Ruby on Rails"])
+        self.assertEqual(self.names(self.index.search("", 1, ("Foundations", "1"))), ["Full Stack JavaScript"])
+
+    def test_invalid_cursor(self):
+        for cursor in ["", "not-a-cursor", NameIndex.cursor({"name": "A", "_id": "1"})[:-2], "WzFd"]:
+            with self.assertRaises(ValueError):
+                NameIndex.decode_cursor(cursor)
+
+if __name__ == '__main__':
+    unittest.main()
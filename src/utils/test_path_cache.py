@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from bson import ObjectId
+from src.utils.path_cache import PathCache
+
+class TestPathCache(unittest.TestCase):
+
+    def setUp(self):
+        # Test Data
+        self.path = {"_id": ObjectId("cccc00000000000000000001"), "path": "The Odin Project", "segments": [{"segment": "Intermediate HTML and CSS", "topics": [{"topic": "Intermediate HTML", "resources": [{"name": "Howdocomputersreadcode?V", "link": "https://somevalidlink.22.com"}, {"name": "A one-off resource", "link": "https://some.com/resource"}]}]}]}
+        self.other = {"_id": ObjectId("cccc00000000000000000002"), "path": "EngineerKit", "segments": [{"segment": "Basics", "topics": [{"topic": "Resources", "resources": [{"name": "A one-off resource", "link": "https://some.com/resource"}]}]}]}
+        PathCache.invalidate()
+
+    def tearDown(self):
+        PathCache.invalidate()
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_get_success(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_documents.return_value = [self.path, self.other]
+
+        cached = PathCache.get("cccc00000000000000000001")
+        self.assertEqual(cached["path"], self.path)
+        self.assertEqual(cached["version"], PathCache._path_version(self.path))
+        self.assertEqual(list(cached["resources"].keys()), ["https://somevalidlink.22.com", "https://some.com/resource"])
+        self.assertIsNone(PathCache.get("cccc00000000000000000009"))
+
+        # The catalog is loaded once, and then served from memory
+        self.assertEqual(PathCache.get(ObjectId("cccc00000000000000000002"))["path"], self.other)
+        mock_mongo_io.get_documents.assert_called_once()
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_resources_with(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_documents.return_value = [self.path, self.other]
+
+        self.assertEqual(PathCache.resources_with("https://some.com/resource"), [
+            ("cccc00000000000000000001", self.path["segments"][0]["topics"][0]["resources"][1]),
+            ("cccc00000000000000000002", self.other["segments"][0]["topics"][0]["resources"][0])
+        ])
+        self.assertEqual([path_id for path_id, resource in PathCache.resources_with("https://somevalidlink.22.com")], ["cccc00000000000000000001"])
+        self.assertEqual(PathCache.resources_with("https://not.found.com"), [])
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_invalidate_reloads(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_documents.return_value = [self.path]
+
+        version = PathCache.get("cccc00000000000000000001")["version"]
+        loaded = PathCache.version
+
+        # An edited path gets a new version after the catalog is reloaded
+        self.path["segments"] = []
+        PathCache.invalidate()
+        self.assertNotEqual(PathCache.get("cccc00000000000000000001")["version"], version)
+        self.assertEqual(PathCache.version, loaded + 1)
+        self.assertEqual(mock_mongo_io.get_documents.call_count, 2)
+
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_load_new_path(self, mock_get_instance):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_documents.return_value = [self.path]
+        mock_mongo_io.get_document.side_effect = lambda collection, path_id: self.other if path_id == "cccc00000000000000000002" else None
+
+        # A path created since the catalog was loaded is read on its own, and added to the catalog
+        self.assertIsNone(PathCache.get("cccc00000000000000000002"))
+        self.assertEqual(PathCache.load("cccc00000000000000000002")["path"], self.other)
+        self.assertEqual(PathCache.get("cccc00000000000000000002")["path"], self.other)
+        self.assertEqual([path_id for path_id, resource in PathCache.resources_with("https://some.com/resource")], ["cccc00000000000000000001", "cccc00000000000000000002"])
+        mock_mongo_io.get_documents.assert_called_once()
+
+        # Missing and invalid ids are not found
+        self.assertIsNone(PathCache.load("cccc00000000000000000009"))
+        self.assertIsNone(PathCache.load("not-an-id"))
+        self.assertEqual(mock_mongo_io.get_document.call_count, 2)
+
+    @patch('src.utils.path_cache.time.monotonic')
+    @patch('mentorhub_utils.MentorHubMongoIO.get_instance')
+    def test_expires(self, mock_get_instance, mock_monotonic):
+        mock_mongo_io = MagicMock()
+        mock_get_instance.return_value = mock_mongo_io
+        mock_mongo_io.get_documents.return_value = [self.path]
+
+        mock_monotonic.return_value = 1000
+        PathCache.get("cccc00000000000000000001")
+        mock_monotonic.return_value = 1299
+        PathCache.get("cccc00000000000000000001")
+        self.assertEqual(mock_mongo_io.get_documents.call_count, 1)
+        mock_monotonic.return_value = 1300
+        PathCache.get("cccc00000000000000000001")
+        self.assertEqual(mock_mongo_io.get_documents.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import pstats
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from flask import Flask, g, jsonify
+from src.config.curriculum_config import CurriculumConfig
+from src.utils.profiler import RequestProfiler
+
+class TestRequestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"PROFILE_REQUESTS": "true", "PROFILE_FOLDER": self.folder.name, "SLOW_REQUEST_MS": "50"})
+        self.env.start()
+        CurriculumConfig._instance = None
+
+        app = Flask(__name__)
+        self.profiler = RequestProfiler(app)
+
+        @app.route('/api/curriculum/<id>')
+        def get(id):
+            g.mongo_seconds += 0.02
+            g.mongo_commands += 2
+            return jsonify({"id": id})
+
+        @app.route('/slow')
+        def slow():
+            time.sleep(0.06)
+            return jsonify({})
+
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.env.stop()
+        self.folder.cleanup()
+        CurriculumConfig._instance = None
+
+    def test_profile(self):
+        response = self.client.get('/api/curriculum/AAAA00000000000000000001', headers={"X-Profile": "true"})
+        self.assertEqual(response.json, {"id": "AAAA00000000000000000001"})
+        name = response.headers["X-Profile"]
+        self.assertRegex(name, r"^\d{8}T\d{12}-GET-api_curriculum_AAAA00000000000000000001-\d+\.prof$")
+        stats = pstats.Stats(os.path.join(self.folder.name, name))
+        self.assertTrue(any(function[2] == "get" for function in stats.stats))
+
+    def test_not_asked(self):
+        response = self.client.get('/api/curriculum/1')
+        self.assertNotIn("X-Profile", response.headers)
+        self.assertEqual(os.listdir(self.folder.name), [])
+
+    def test_rate_limited(self):
+        self.assertIn("X-Profile", self.client.get('/api/curriculum/1', headers={"X-Profile": "true"}).headers)
+        self.assertNotIn("X-Profile", self.client.get('/api/curriculum/1', headers={"X-Profile": "true"}).headers)
+
+        self.profiler._last_profile -= self.profiler.interval
+        self.assertIn("X-Profile", self.client.get('/api/curriculum/1', headers={"X-Profile": "true"}).headers)
+
+    @patch('src.utils.profiler.create_token', return_value={"user_id": "aaaa00000000000000000001", "roles": ["Member"]})
+    def test_staff_only(self, mock_token):
+        response = self.client.get('/api/curriculum/1', headers={"X-Profile": "true"})
+        self.assertNotIn("X-Profile", response.headers)
+
+    def test_disabled(self):
+        self.profiler.enabled = False
+        response = self.client.get('/api/curriculum/1', headers={"X-Profile": "true"})
+        self.assertNotIn("X-Profile", response.headers)
+
+    def test_not_profiled_with_gevent(self):
+        # Every request of a gevent worker runs on the same thread, so its profile would include the others
+        self.profiler.greenlets = True
+        with self.assertLogs('src.utils.profiler', level='WARNING') as logs:
+            response = self.client.get('/api/curriculum/1', headers={"X-Profile": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile", response.headers)
+        self.assertIn("gevent worker", logs.output[0])
+        self.assertEqual(os.listdir(self.folder.name), [])
+
+    def test_gevent_patched(self):
+        monkey = MagicMock()
+        monkey.is_module_patched.side_effect = lambda module: module == "threading"
+        with patch.dict(sys.modules, {"gevent": MagicMock(monkey=monkey), "gevent.monkey": monkey}):
+            self.assertTrue(RequestProfiler._gevent_patched())
+            monkey.is_module_patched.side_effect = lambda module: False
+            self.assertFalse(RequestProfiler._gevent_patched())
+
+    def test_slow_request_logged(self):
+        with self.assertLogs('src.utils.profiler', level='WARNING') as logs:
+            self.client.get('/slow?x=1')
+        self.assertIn("Slow request GET /slow?x=1 200 took", logs.output[0])
+        self.assertIn("in 0 MongoDB commands", logs.output[0])
+
+    def test_fast_request_not_logged(self):
+        with patch('src.utils.profiler.logger') as mock_logger:
+            self.client.get('/api/curriculum/1')
+        mock_logger.warning.assert_not_called()
+
+    def test_profile_path(self):
+        self.assertEqual(RequestProfiler.profile_path("/tmp/profiles", "a-GET-b.prof"), "/tmp/profiles/a-GET-b.prof")
+        self.assertIsNone(RequestProfiler.profile_path("/tmp/profiles", "../etc/passwd"))
+        self.assertIsNone(RequestProfiler.profile_path("/tmp/profiles", "a.txt"))
+
+if __name__ == '__main__':
+    unittest.main()
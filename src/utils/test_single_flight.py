@@ -0,0 +1,91 @@
+import functools
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from src.utils.single_flight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def _blocked(self, result):
+        """A call that waits to be released, so that others can join it"""
+        def call():
+            self.started.set()
+            self.release.wait(5)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return MagicMock(side_effect=call)
+
+    def _run(self, keys, function):
+        """Start a leader and then followers for keys, and wait for them all to finish"""
+        results = {}
+        def run(name, key):
+            try:
+                results[name] = self.flight.do(key, function)
+            except Exception as e:
+                results[name] = e
+        leader = threading.Thread(target=run, args=("leader", keys[0]))
+        leader.start()
+        self.started.wait(5)
+        followers = [threading.Thread(target=run, args=(f"follower{number}", key)) for number, key in enumerate(keys[1:])]
+        for follower in followers:
+            follower.start()
+        while self.flight._calls.get(keys[0]) != None and self.flight._calls[keys[0]].followers < keys.count(keys[0]) - 1:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        return results
+
+    def test_concurrent_calls_share_one_call(self):
+        function = self._blocked({"name": "A Path", "segments": []})
+        results = self._run(["key", "key", "key"], function)
+
+        function.assert_called_once()
+        self.assertEqual(results["leader"], {"name": "A Path", "segments": []})
+        self.assertEqual(results["follower0"], results["leader"])
+        self.assertEqual(results["follower1"], results["leader"])
+
+        # Every caller can safely change its own result
+        self.assertIsNot(results["follower0"], results["leader"])
+        self.assertIsNot(results["follower0"]["segments"], results["follower1"]["segments"])
+        self.assertEqual(len(self.flight), 0)
+
+    def test_shared_results_not_copied(self):
+        self.flight.do = functools.partial(self.flight.do, copy_result=False)
+        function = self._blocked({"name": "A Path", "segments": []})
+        results = self._run(["key", "key"], function)
+
+        function.assert_called_once()
+        self.assertIs(results["follower0"], results["leader"])
+
+    def test_errors_are_shared(self):
+        error = ValueError("Failed")
+        function = self._blocked(error)
+        results = self._run(["key", "key"], function)
+
+        function.assert_called_once()
+        self.assertIs(results["leader"], error)
+        self.assertIs(results["follower0"], error)
+        self.assertEqual(len(self.flight), 0)
+
+    def test_sequential_calls_are_not_shared(self):
+        function = MagicMock(side_effect=[1, 2])
+        self.assertEqual(self.flight.do("key", function), 1)
+        self.assertEqual(self.flight.do("key", function), 2)
+        self.assertEqual(len(self.flight), 0)
+
+    def test_different_keys_are_not_shared(self):
+        function = MagicMock(return_value="other")
+        self.flight._calls["key"] = SingleFlight._Call()
+        self.assertEqual(self.flight.do("other", function), "other")
+        function.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+from src.utils.ttl_cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_get_set(self):
+        cache = TTLCache(10, 60)
+        self.assertIsNone(cache.get("key"))
+        self.assertIs(cache.get("key", TTLCache.MISSING), TTLCache.MISSING)
+        cache.set("key", "value")
+        cache.set("none", None)
+        self.assertEqual(cache.get("key"), "value")
+        self.assertIsNone(cache.get("none", TTLCache.MISSING))
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 2)
+
+    def test_least_recently_used_evicted(self):
+        cache = TTLCache(2, 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    @patch('src.utils.ttl_cache.time.monotonic')
+    def test_expires(self, mock_monotonic):
+        cache = TTLCache(10, 30)
+        mock_monotonic.return_value = 100
+        cache.set("key", "value")
+        mock_monotonic.return_value = 129
+        self.assertEqual(cache.get("key"), "value")
+        mock_monotonic.return_value = 130
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_and_clear(self):
+        cache = TTLCache(10, 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
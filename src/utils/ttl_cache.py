@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """A thread safe, size bounded, least recently used cache whose entries expire"""
+
+    # Returned by get() when there is no cached value, so that None can be cached
+    MISSING = object()
+
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key -> (expires at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get the cached value, or default if it is not cached or has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry == None or entry[0] <= time.monotonic():
+                if entry != None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Cache a value, evicting the least recently used values when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Discard a cached value"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Discard all cached values"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
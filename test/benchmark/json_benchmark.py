@@ -0,0 +1,83 @@
+"""
+Compare the time to encode realistic curricula with MongoJSONEncoder, and with the orjson FastMongoJSONProvider.
+
+    pipenv run benchmark [iterations]
+"""
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask
+from mentorhub_utils import MongoJSONEncoder
+from src.utils import fast_json
+
+# Mostly plain text, with some accents and emoji
+REVIEWS = ["", "Good introduction", "Too long, but worth it", "Great résumé tips 👍", "Clear and concise, recommended"]
+
+def breadcrumb(generator):
+    return {
+        "atTime": datetime(2024, 1, 1) + timedelta(seconds=generator.randrange(10000000)),
+        "byUser": ObjectId(),
+        "fromIp": f"10.0.{generator.randrange(256)}.{generator.randrange(256)}",
+        "correlationId": f"{generator.getrandbits(64):016x}"
+    }
+
+def resource(generator, index):
+    return {
+        "name": f"Resource {index} - Getting Started",
+        "link": f"https://example.com/resources/{index}?page={generator.randrange(100)}",
+        "description": "A short description of what the learner will get from this resource. " * 2,
+        "skills": ["HTML", "CSS", "JavaScript"][:generator.randrange(1, 4)]
+    }
+
+def curriculum(generator, paths=3, segments=5, topics=4, resources=5, completed=300):
+    """A curriculum with some large paths in next, and hundreds of completed resources"""
+    index = iter(range(1000000))
+    return {
+        "_id": ObjectId(),
+        "completed": [
+            {**resource(generator, next(index)), "completed": breadcrumb(generator)["atTime"], "rating": generator.randrange(1, 6), "review": generator.choice(REVIEWS)}
+            for i in range(completed)
+        ],
+        "now": [resource(generator, next(index)) for i in range(5)],
+        "next": [{
+            "_id": ObjectId(),
+            "path": f"Path {p}",
+            "segments": [{
+                "name": f"Segment {s}",
+                "topics": [{
+                    "name": f"Topic {t}",
+                    "description": "What this topic is about",
+                    "resources": [resource(generator, next(index)) for r in range(resources)]
+                } for t in range(topics)]
+            } for s in range(segments)]
+        } for p in range(paths)],
+        "lastSaved": breadcrumb(generator)
+    }
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    generator = random.Random(42)
+    app = Flask(__name__)
+    providers = {"MongoJSONEncoder": MongoJSONEncoder(app)}
+    if fast_json.orjson == None:
+        print("orjson is not installed, only MongoJSONEncoder is benchmarked")
+    else:
+        providers["FastMongoJSONProvider"] = fast_json.FastMongoJSONProvider(app)
+
+    sizes = {"small": curriculum(generator, paths=1, completed=20), "typical": curriculum(generator), "large": curriculum(generator, paths=10, completed=1000)}
+    with app.app_context():
+        for size, document in sizes.items():
+            expected = providers["MongoJSONEncoder"].response(document).get_data()
+            print(f"{size} curriculum, {len(expected)} bytes")
+            baseline = None
+            for name, provider in providers.items():
+                if provider.response(document).get_data() != expected:
+                    print(f"  {name} does not match MongoJSONEncoder")
+                seconds = min(timeit.repeat(lambda: provider.response(document), number=iterations, repeat=3)) / iterations
+                baseline = baseline or seconds
+                print(f"  {name:24} {seconds * 1000:8.3f} ms  {baseline / seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main()
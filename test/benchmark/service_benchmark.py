@@ -0,0 +1,240 @@
+"""
+Benchmark the service layer, and the API through the Flask test client, against an in memory mongomock
+database holding generated curricula. Reports the latency percentiles, peak memory allocated and
+response payload size of each operation, and compares them with a saved baseline.
+
+    pipenv run benchmark --save baseline.json
+    pipenv run benchmark --baseline baseline.json --completed 1000
+
+mongomock measures the time spent in the API (encoding, decoding, hydrating and scanning documents)
+but not the time MongoDB takes. It does not support the update pipelines and array filters used to
+assign and complete a single resource, so those moves are benchmarked through batch_update.
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from bson import ObjectId
+from flask import Flask
+import mongomock
+from mentorhub_utils import MentorHub_Config, MentorHubMongoIO, MongoJSONEncoder
+from src.routes.curriculum_routes import create_curriculum_routes
+from src.routes.path_routes import create_path_routes
+from src.routes.topic_routes import create_topic_routes
+from src.services.curriculum_services import CurriculumService
+from src.services.paths_services import PathsService
+from src.services.topics_services import TopicService
+from src.utils.catalog_cache import CatalogCache
+from src.utils.path_cache import PathCache
+
+STAFF = {"user_id": "aaaa00000000000000000001", "roles": ["Staff"]}
+CURRICULUM_ID = "aaaa00000000000000000002"
+REFERENCE_ID = "aaaa00000000000000000003"
+
+def breadcrumb():
+    return {"atTime": datetime.now(), "byUser": ObjectId(STAFF["user_id"]), "fromIp": "127.0.0.1", "correlationId": "benchmark"}
+
+def generate_path(generator, number, segments, topics, resources):
+    """A catalog path of segments x topics x resources"""
+    return {
+        "_id": ObjectId(),
+        "path": f"Path {number}",
+        "name": f"Path {number} {generator.choice(['Web', 'Data', 'Cloud', 'Mobile'])} Development",
+        "segments": [{
+            "segment": f"Segment {s}",
+            "topics": [{
+                "topic": f"Topic {number}.{s}.{t}",
+                "resources": [{
+                    "name": f"Resource {number}.{s}.{t}.{r}",
+                    "link": f"https://example.com/paths/{number}/segments/{s}/topics/{t}/resources/{r}",
+                    "description": "A short description of what the learner will get from this resource",
+                    "skills": ["HTML", "CSS", "JavaScript"][:generator.randrange(1, 4)]
+                } for r in range(resources)]
+            } for t in range(topics)]
+        } for s in range(segments)]
+    }
+
+def generate_curriculum(generator, curriculum_id, paths, completed):
+    """A curriculum with the paths embedded in next, and a long completed list"""
+    return {
+        "_id": ObjectId(curriculum_id),
+        "completed": [{
+            "name": f"Completed {c}",
+            "link": f"https://example.com/completed/{c}",
+            "description": "A resource that has been completed",
+            "completed": datetime(2024, 1, 1, generator.randrange(24), generator.randrange(60)),
+            "rating": generator.randrange(1, 6),
+            "review": generator.choice(["", "Good introduction", "Too long, but worth it", "Clear and concise"])
+        } for c in range(completed)],
+        "now": [],
+        "next": paths,
+        "resourceIndex": CurriculumService._build_index(paths),
+        "lastSaved": breadcrumb()
+    }
+
+class Benchmark:
+    """Generates the database, runs each operation, and reports the results"""
+
+    def __init__(self, args):
+        self.args = args
+        self.results = {}
+        generator = random.Random(args.seed)
+        config = MentorHub_Config.get_instance()
+        self.config = config
+
+        # An in memory database in place of the shared MongoDB client
+        mongo = MentorHubMongoIO.get_instance()
+        mongo.client = mongomock.MongoClient()
+        mongo.db = mongo.client.get_database(config.MONGO_DB_NAME)
+        mongo.connected = True
+        self.db = mongo.db
+
+        self.paths = [generate_path(generator, p, args.segments, args.topics, args.resources) for p in range(args.catalog)]
+        self.db[config.PATHS_COLLECTION_NAME].insert_many(self.paths)
+        self.db[config.TOPICS_COLLECTION_NAME].insert_many([
+            {"_id": ObjectId(), "name": f"Topic {t} {generator.choice(['Basics', 'Advanced', 'Patterns'])}", "description": "A topic"} for t in range(args.catalog * 10)
+        ])
+        self.curriculum = generate_curriculum(generator, CURRICULUM_ID, self.paths[:args.paths], args.completed)
+        self.reference = {**generate_curriculum(generator, REFERENCE_ID, [], args.completed), "next": [
+            {"pathId": path["_id"], "path": path["path"], "version": PathCache._path_version(path), "removed": []} for path in self.paths[:args.paths]
+        ]}
+
+        # The API, as server.py builds it, without connecting to MongoDB
+        self.app = Flask(__name__)
+        self.app.json = MongoJSONEncoder(self.app)
+        self.app.register_blueprint(create_curriculum_routes(), url_prefix='/api/curriculum')
+        self.app.register_blueprint(create_path_routes(), url_prefix='/api/path')
+        self.app.register_blueprint(create_topic_routes(), url_prefix='/api/topic')
+        self.client = self.app.test_client()
+
+    def reset(self):
+        """Put the curricula back as they were generated"""
+        collection = self.db[self.config.CURRICULUM_COLLECTION_NAME]
+        collection.replace_one({"_id": self.curriculum["_id"]}, self.curriculum, upsert=True)
+        collection.replace_one({"_id": self.reference["_id"]}, self.reference, upsert=True)
+
+    def payload(self, result):
+        """The size of the JSON a result is returned as"""
+        if hasattr(result, "data"):
+            return len(result.data)
+        with self.app.app_context():
+            return len(self.app.json.dumps(result))
+
+    def measure(self, name, operation, setup=None):
+        """Time operation, after setup if it changes the database, then measure its allocations"""
+        if self.args.only and not any(only in name for only in self.args.only):
+            return
+        for i in range(self.args.warmup):
+            setup and setup()
+            operation()
+
+        timings = []
+        for i in range(self.args.iterations):
+            setup and setup()
+            start = time.perf_counter()
+            result = operation()
+            timings.append(time.perf_counter() - start)
+
+        # Allocations are traced separately, as tracing slows everything down
+        peaks = []
+        tracemalloc.start()
+        for i in range(min(self.args.iterations, 10)):
+            setup and setup()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            operation()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+
+        timings.sort()
+        percentile = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+        self.results[name] = {
+            "p50_ms": percentile(0.50), "p95_ms": percentile(0.95), "p99_ms": percentile(0.99),
+            "peak_kb": max(peaks) / 1024, "payload_bytes": self.payload(result)
+        }
+
+    def run(self):
+        token = STAFF
+        curriculum = CURRICULUM_ID
+        path_id = str(self.paths[-1]["_id"])
+        links = [topic["resources"][0]["link"] for topic in self.paths[0]["segments"][0]["topics"]][:5]
+        operations = [op for link in links for op in [{"action": "assign", "link": link}, {"action": "complete", "link": link, "rating": 5}]]
+        ids = [str(path["_id"]) for path in self.paths[:10]]
+        self.reset()
+
+        self.measure("curriculum.get", lambda: CurriculumService.get_or_create_curriculum(curriculum, token, breadcrumb()))
+        self.measure("curriculum.get_page", lambda: CurriculumService.get_or_create_curriculum(curriculum, token, breadcrumb(), ["now", "completed"], 20))
+        self.measure("curriculum.get_etag", lambda: CurriculumService.get_etag(curriculum, token))
+        self.measure("curriculum.update_now", lambda: CurriculumService.update_curriculum(curriculum, {"now": []}, token, breadcrumb()), self.reset)
+        self.measure("curriculum.update_now_delta", lambda: CurriculumService.update_curriculum(curriculum, {"now": []}, token, breadcrumb(), delta=True), self.reset)
+        self.measure("curriculum.add_path", lambda: CurriculumService.add_path(curriculum, path_id, token, breadcrumb()), self.reset)
+        self.measure("curriculum.batch_update", lambda: CurriculumService.batch_update(curriculum, operations, token, breadcrumb()), self.reset)
+        self.measure("curriculum.get_referenced", lambda: CurriculumService.get_or_create_curriculum(REFERENCE_ID, token, breadcrumb()), self.reset)
+
+        self.measure("paths.search", lambda: PathsService.get_paths("web", token))
+        self.measure("paths.get", lambda: PathsService.get_path(path_id, token))
+        self.measure("paths.get_by_id", lambda: PathsService.get_paths_by_id(ids, token))
+        self.measure("topics.search", lambda: TopicService.get_topics("basics", token))
+
+        self.measure("http.get_curriculum", lambda: self.client.get(f'/api/curriculum/{curriculum}'))
+        self.measure("http.get_curriculum_page", lambda: self.client.get(f'/api/curriculum/{curriculum}?fields=now,completed&completed_limit=20'))
+        self.measure("http.patch_curriculum", lambda: self.client.patch(f'/api/curriculum/{curriculum}', json={"now": []}), self.reset)
+        self.measure("http.get_paths", lambda: self.client.get('/api/path?query=web'))
+        self.measure("http.get_path", lambda: self.client.get(f'/api/path/{path_id}'))
+
+    def report(self, baseline=None):
+        """Print the results, and return the names of the operations that regressed from the baseline"""
+        regressions = []
+        print(f"{'operation':30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KB':>9} {'payload':>9}  vs baseline")
+        for name, result in self.results.items():
+            line = f"{name:30} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f} {result['p99_ms']:9.3f} {result['peak_kb']:9.1f} {result['payload_bytes']:9}"
+            if baseline and name in baseline:
+                changes = {key: (result[key] - baseline[name][key]) / baseline[name][key] * 100 for key in ["p50_ms", "peak_kb", "payload_bytes"] if baseline[name].get(key)}
+                line += "  " + " ".join(f"{key.split('_')[0]} {change:+.0f}%" for key, change in changes.items())
+                if any(change > self.args.threshold for change in changes.values()):
+                    regressions.append(name)
+                    line += "  REGRESSION"
+            print(line)
+        return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--paths", type=int, default=3, help="paths in the next list of the curriculum")
+    parser.add_argument("--segments", type=int, default=5, help="segments in each path")
+    parser.add_argument("--topics", type=int, default=4, help="topics in each segment")
+    parser.add_argument("--resources", type=int, default=5, help="resources in each topic")
+    parser.add_argument("--completed", type=int, default=300, help="resources in the completed list of the curriculum")
+    parser.add_argument("--catalog", type=int, default=50, help="paths in the catalog, with 10 times as many topics")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls of each operation")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls of each operation before it is timed")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the generated data")
+    parser.add_argument("--only", action="append", help="only run operations whose name contains this, may be repeated")
+    parser.add_argument("--save", help="save the results to this file, as a baseline")
+    parser.add_argument("--baseline", help="compare the results with this saved baseline")
+    parser.add_argument("--threshold", type=float, default=25, help="percent increase from the baseline that is a regression")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    benchmark = Benchmark(args)
+    benchmark.run()
+    CatalogCache.invalidate()
+    PathCache.invalidate()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+    regressions = benchmark.report(baseline)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"args": {key: value for key, value in vars(args).items() if key not in ["save", "baseline"]}, "results": benchmark.results}, file, indent=2)
+    if regressions:
+        print(f"{len(regressions)} operations regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
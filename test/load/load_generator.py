@@ -0,0 +1,299 @@
+"""
+Replay a weighted mix of curriculum and catalog requests against a running API, from many simulated
+members and mentors, and report the latency percentiles and throughput of each kind of request.
+
+    pipenv run loadgen --rate 50 --duration 60 --members 500 --output results.jsonl
+
+Requests arrive at --rate per second, at random (Poisson) intervals, whether or not earlier requests
+have finished - an open loop, like real traffic. Latency is measured from when a request was due to
+be sent, so time spent waiting for one of the --connections keep-alive connections is included.
+
+Members get their curriculum, add paths, assign resources from next and complete resources in now.
+Mentors get the curricula of members, and everyone searches the catalog. Each run is appended to
+--output as one JSON line, for tracking trends over time.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+# The default mix of requests, in relative weights
+MIX = "get_curriculum=40,search_paths=15,search_topics=10,assign=12,complete=10,add_path=5,mentor_get=8"
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None, timeout=30):
+        """Send a request, and return the status, headers and decoded body"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept-Encoding: gzip\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n")
+        self.writer.write(head.encode() + data)
+        await self.writer.drain()
+        return await asyncio.wait_for(self._response(), timeout)
+
+    async def _response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by the server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        if headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        elif headers.get("content-encoding") == "deflate":
+            body = zlib.decompress(body)
+        return status, headers, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+class Pool:
+    """A fixed number of keep-alive connections, requests wait for a free one"""
+
+    def __init__(self, host, port, size, timeout=30):
+        self.timeout = timeout
+        self.connections = asyncio.Queue()
+        for i in range(size):
+            self.connections.put_nowait(Connection(host, port))
+
+    async def request(self, method, path, body=None):
+        connection = await self.connections.get()
+        try:
+            status, headers, data = await connection.request(method, path, body, self.timeout)
+            return status, (json.loads(data) if data and headers.get("content-type", "").startswith("application/json") else None)
+        except BaseException:
+            # The connection may be part way through a response
+            connection.close()
+            raise
+        finally:
+            self.connections.put_nowait(connection)
+
+    async def close(self):
+        while not self.connections.empty():
+            self.connections.get_nowait().close()
+
+class Member:
+    """A simulated member, who remembers what was in their curriculum the last time they saw it"""
+
+    def __init__(self, number):
+        self.id = f"ffff{number:020x}"
+        self.next = []
+        self.now = []
+
+    def learn(self, curriculum):
+        """Remember the links in next and now from a curriculum response"""
+        if not isinstance(curriculum, dict):
+            return
+        if "next" in curriculum:
+            self.next = [resource.get("link") for path in curriculum["next"] or []
+                for segment in path.get("segments", []) for topic in segment.get("topics", []) for resource in topic.get("resources", [])]
+        if "now" in curriculum:
+            self.now = [resource.get("link") for resource in curriculum["now"] or []]
+
+class LoadGenerator:
+    """Sends the requests of the mix at the arrival rate, and collects the latency of each"""
+
+    WORDS = ["a", "e", "data", "web", "intro", "cloud", "python", "design", "sre", "l"]
+
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.mix = {name: float(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+        unknown = set(self.mix) - set(self.scenarios())
+        if unknown:
+            raise ValueError(f"Unknown requests in the mix: {sorted(unknown)}")
+        self.members = [Member(number) for number in range(args.members)]
+        self.path_ids = []
+        self.results = {}     # request name -> list of (latency seconds, ok)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def scenarios(self):
+        return {
+            "get_curriculum": self.get_curriculum, "mentor_get": self.mentor_get, "search_paths": self.search_paths,
+            "search_topics": self.search_topics, "assign": self.assign, "complete": self.complete, "add_path": self.add_path
+        }
+
+    async def get_curriculum(self, member):
+        status, body = await self.pool.request("GET", f"/api/curriculum/{member.id}")
+        member.learn(body)
+        return "get_curriculum", status
+
+    async def mentor_get(self, member):
+        # Mentors are not distinguished by the API yet, tokens are not read from the request
+        status, body = await self.pool.request("GET", f"/api/curriculum/{member.id}")
+        return "mentor_get", status
+
+    async def search_paths(self, member):
+        status, body = await self.pool.request("GET", f"/api/path?query={quote(self.random.choice(LoadGenerator.WORDS))}")
+        return "search_paths", status
+
+    async def search_topics(self, member):
+        status, body = await self.pool.request("GET", f"/api/topic?query={quote(self.random.choice(LoadGenerator.WORDS))}")
+        return "search_topics", status
+
+    async def add_path(self, member):
+        if not self.path_ids:
+            return await self.search_paths(member)
+        status, body = await self.pool.request("POST", f"/api/curriculum/{member.id}/path/{self.random.choice(self.path_ids)}?delta=true")
+        member.learn(body)
+        return "add_path", status
+
+    async def assign(self, member):
+        if not member.next:
+            return await self.add_path(member)
+        link = member.next.pop(self.random.randrange(len(member.next)))
+        # Links that contain a / can not be a path segment, and are assigned with a batch
+        if "/" in link:
+            status, body = await self.pool.request("PATCH", f"/api/curriculum/{member.id}/batch", [{"action": "assign", "link": link}])
+            member.learn(body.get("curriculum") if isinstance(body, dict) else None)
+            return "assign_batch", status
+        status, body = await self.pool.request("PATCH", f"/api/curriculum/{member.id}/assign/{quote(link, safe='')}?delta=true")
+        member.learn(body)
+        return "assign", status
+
+    async def complete(self, member):
+        if not member.now:
+            return await self.assign(member)
+        link = member.now.pop(self.random.randrange(len(member.now)))
+        review = {"rating": self.random.randrange(1, 6), "review": "Load test"}
+        if "/" in link:
+            status, body = await self.pool.request("PATCH", f"/api/curriculum/{member.id}/batch", [{"action": "complete", "link": link, **review}])
+            member.learn(body.get("curriculum") if isinstance(body, dict) else None)
+            return "complete_batch", status
+        status, body = await self.pool.request("PATCH", f"/api/curriculum/{member.id}/complete/{quote(link, safe='')}?delta=true", review)
+        member.learn(body)
+        return "complete", status
+
+    async def arrival(self, name, due):
+        """Send one request, recording its latency from when it was due"""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        member = self.random.choice(self.members)
+        try:
+            name, status = await self.scenarios()[name](member)
+            ok = 200 <= status < 400
+        except Exception:
+            ok = False
+        finally:
+            self.in_flight -= 1
+        self.results.setdefault(name, []).append((time.perf_counter() - due, ok))
+
+    async def run(self):
+        host, _, port = self.args.host.partition(":")
+        self.pool = Pool(host, int(port or 80), self.args.connections, self.args.timeout)
+
+        # The catalog, for members to add paths from
+        status, paths = await self.pool.request("GET", "/api/path")
+        self.path_ids = [path["_id"] for path in paths or []] if status == 200 else []
+
+        names, weights = list(self.mix), list(self.mix.values())
+        tasks = {}      # task -> request name and when it was due, of the requests in flight
+        start = time.perf_counter()
+        due = start
+        while due - start < self.args.duration:
+            due += self.random.expovariate(self.args.rate)
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            name = self.random.choices(names, weights)[0]
+            task = asyncio.ensure_future(self.arrival(name, due))
+            tasks[task] = (name, due)
+            task.add_done_callback(lambda task: tasks.pop(task, None))
+        sent = time.perf_counter() - start
+        if tasks:
+            await asyncio.wait(list(tasks), timeout=self.args.timeout)
+
+        # Requests still waiting for a connection or a response have timed out, and are errors
+        timed_out = time.perf_counter()
+        for task, (name, due) in list(tasks.items()):
+            self.results.setdefault(name, []).append((timed_out - due, False))
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        await self.pool.close()
+        return sent, elapsed
+
+def summarize(samples, seconds):
+    """Latency percentiles in milliseconds, errors and throughput of a list of (latency, ok) samples"""
+    latencies = sorted(latency for latency, ok in samples)
+    percentile = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+    return {
+        "count": len(samples), "errors": sum(1 for latency, ok in samples if not ok), "per_second": round(len(samples) / seconds, 2),
+        "p50_ms": percentile(0.50), "p95_ms": percentile(0.95), "p99_ms": percentile(0.99), "max_ms": round(latencies[-1] * 1000, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="localhost:8088", help="host:port of the API")
+    parser.add_argument("--rate", type=float, default=20, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send requests for")
+    parser.add_argument("--members", type=int, default=100, help="simulated members and mentees")
+    parser.add_argument("--connections", type=int, default=50, help="keep-alive connections to the API")
+    parser.add_argument("--mix", default=MIX, help=f"relative weights of the requests, default {MIX}")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for a response")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a repeatable sequence of requests")
+    parser.add_argument("--output", help="append the results to this file, as a JSON line")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args)
+    sent, elapsed = asyncio.run(generator.run())
+
+    results = {name: summarize(samples, sent) for name, samples in sorted(generator.results.items())}
+    everything = [sample for samples in generator.results.values() for sample in samples]
+    total = summarize(everything, sent) if everything else {}
+
+    print(f"{'request':16} {'count':>7} {'errors':>7} {'per sec':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, result in [*results.items(), ("total", total)]:
+        if result:
+            print(f"{name:16} {result['count']:7} {result['errors']:7} {result['per_second']:8} {result['p50_ms']:9} {result['p95_ms']:9} {result['p99_ms']:9} {result['max_ms']:9}")
+    print(f"Sent for {sent:.1f}s at a target of {args.rate}/s, finished after {elapsed:.1f}s, at most {generator.max_in_flight} requests in flight")
+
+    if args.output:
+        with open(args.output, "a") as file:
+            file.write(json.dumps({
+                "at": datetime.now(timezone.utc).isoformat(), "host": args.host, "rate": args.rate, "duration": args.duration,
+                "members": args.members, "connections": args.connections, "mix": args.mix,
+                "total": total, "requests": results
+            }) + "\n")
+    if not everything or total["errors"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()